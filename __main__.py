@@ -1,25 +1,32 @@
 # -*- coding: utf-8 -*-
 """ @author: Gabriel Maccari """
 
+import multiprocessing
+import os
 import sys
-from PyQt6.QtWidgets import QApplication
-from icecream import ic
 from platform import platform
-from PyQt6 import sip  # necessário para criar o exe com pyinstaller
 
-from controller import UIController
-
-ic.configureOutput(prefix='LOG| ', includeContext=True)
 OS = platform()
 
 
-class App(QApplication):
-    def __init__(self, sys_argv):
-        super(App, self).__init__(sys_argv)
-        self.controller = UIController()
+def run_gui() -> int:
+    # O PyQt6 e a interface só são importados no modo gráfico, para que a linha de comando (ver cli.py) e os processos
+    # usados na leitura de planilhas em paralelo iniciem rápido e ocupem pouca memória
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6 import sip  # necessário para criar o exe com pyinstaller
+    from icecream import ic
 
+    from controller import UIController
+    from model import TABLE_EXTENSIONS
+
+    ic.configureOutput(prefix='LOG| ', includeContext=True)
+
+    class App(QApplication):
+        def __init__(self, sys_argv):
+            super(App, self).__init__(sys_argv)
+            self.controller = UIController()
 
-if __name__ == '__main__':
     app = App(sys.argv)
     if OS.startswith("Windows"):
         app.setStyle("windowsvista")
@@ -29,4 +36,24 @@ if __name__ == '__main__':
     else:
         app.setStyle("Fusion")
 
-    sys.exit(app.exec())
+    # Tabelas passadas como argumento (ex: arquivo aberto pelo sistema com "Abrir com") são abertas ao iniciar. Os
+    # argumentos do Qt já foram removidos da lista pelo QApplication
+    paths = [a for a in app.arguments()[1:] if os.path.isfile(a) and os.path.splitext(a)[1].lower() in TABLE_EXTENSIONS]
+    if paths:
+        QTimer.singleShot(0, lambda: app.controller.open_files(paths))
+
+    return app.exec()
+
+
+if __name__ == '__main__':
+    # Necessário para que os processos usados na leitura de planilhas em paralelo funcionem no exe do pyinstaller
+    multiprocessing.freeze_support()
+
+    # Com opções da linha de comando (ex: -x, -r ou --help), roda a conversão pela linha de comando. Caso contrário,
+    # abre a interface gráfica
+    from cli import is_cli_call
+    if is_cli_call(sys.argv[1:]):
+        from cli import main
+        sys.exit(main(sys.argv[1:]))
+
+    sys.exit(run_gui())
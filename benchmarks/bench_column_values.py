@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara a abertura da lista de valores únicos e a conversão para booleano refazendo astype("string") em toda a coluna
+# (como era feito antes) com o índice de valores em cache (DataHandler.get_column_values).
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_column_values [número de linhas]
+
+import sys
+import time
+import geopandas
+import numpy
+import pandas
+
+from model import DataHandler
+
+
+def string_uniques(column: pandas.Series) -> (list[str], bool):
+    uniques = column.astype("string").unique()
+    return sorted(v for v in uniques if not pandas.isna(v)), any(pandas.isna(v) for v in uniques)
+
+
+def string_boolean(column: pandas.Series, true_key: str, false_key: str) -> pandas.Series:
+    if not column.astype("string").isin((true_key, false_key)).all():
+        raise ValueError()
+    return column.astype("string").map({true_key: True, false_key: False}).astype(bool)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = numpy.random.default_rng(0)
+    column = pandas.Series(rng.choice(["Sim", "Não"], rows), dtype=object)
+
+    # Lista de valores aberta duas vezes (janela de valores únicos e diálogo do booleano) e conversão
+    start = time.perf_counter()
+    string_uniques(column)
+    sorted(str(v) for v in column.unique())
+    expected = string_boolean(column, "Sim", "Não")
+    baseline = time.perf_counter() - start
+
+    handler = DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"Afloramento": column})
+    start = time.perf_counter()
+    sorted(handler.get_column_values("Afloramento")["uniques"])
+    sorted(handler.get_column_values("Afloramento")["uniques"])
+    handler.change_column_dtype("Afloramento", "Boolean", true_key="Sim", false_key="Não")
+    indexed = time.perf_counter() - start
+
+    assert handler.gdf["Afloramento"].equals(expected)
+    print(f"Linhas: {rows}")
+    print(f"astype(\"string\") a cada uso: {baseline:.2f} s | Índice de valores em cache: {indexed:.2f} s "
+          f"({baseline / indexed:.1f}x)")
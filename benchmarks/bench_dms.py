@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara a conversão GMS -> graus decimais vetorizada (parse_dms_coordinates) com o laço original, valor a valor.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_dms [número de linhas]
+
+import re
+import sys
+import time
+import numpy
+import pandas
+
+from model import parse_dms_coordinates
+
+
+def legacy_convert(values: pandas.Series) -> list[float]:
+    result = []
+    for value in values.values:
+        value = str(value).strip()
+        parts = re.split(r"°|º|'|’|′|\"|”|″|''", value)
+        d, m, s = int(parts[0]), int(parts[1]), float(parts[2].replace(",", "."))
+        dd = d + (m / 60) + (s / 3600)
+        if parts[3] in "SWOswo":
+            dd *= -1
+        result.append(dd)
+    return result
+
+
+def make_column(rows: int, hemisphere: str, max_degrees: int) -> pandas.Series:
+    rng = numpy.random.default_rng(0)
+    d = rng.integers(0, max_degrees, rows)
+    m = rng.integers(0, 60, rows)
+    s = rng.uniform(0, 60, rows).round(4)
+    return pandas.Series([f"{a}°{b}'{c:.4f}\"{hemisphere}".replace(".", ",") for a, b, c in zip(d, m, s)])
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    x_values = make_column(n, "W", 180)
+
+    start = time.perf_counter()
+    expected = legacy_convert(x_values)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decimal, errors = parse_dms_coordinates(x_values, "x")
+    vectorized_time = time.perf_counter() - start
+
+    assert not errors.any()
+    assert numpy.allclose(decimal, expected)
+
+    print(f"Linhas: {n}")
+    print(f"Laço original: {legacy_time:.3f} s")
+    print(f"Vetorizado:    {vectorized_time:.3f} s ({legacy_time / vectorized_time:.1f}x)")
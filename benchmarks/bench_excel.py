@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara o tempo de leitura de uma pasta de trabalho grande com cada leitor disponível (ver model.get_excel_engine).
+# A tabela de exemplo (exemplo_dados_entrada.xlsx) é repetida até o número de linhas desejado e salva em um arquivo
+# temporário. Gerar o arquivo com 1 milhão de linhas pode levar alguns minutos.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_excel [número de linhas]
+
+import os
+import sys
+import tempfile
+import time
+import pandas
+
+from model import DataHandler, CALAMINE_AVAILABLE, get_excel_engine
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    example = pandas.read_excel("exemplo_dados_entrada.xlsx")
+    df = pandas.concat([example] * (rows // len(example.index) + 1), ignore_index=True).iloc[:rows]
+
+    path = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_{rows}.xlsx")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        df.to_excel(path, index=False)
+        print(f"Arquivo gerado em {time.perf_counter() - start:.1f} s: {path}")
+
+    print(f"Linhas: {rows} | Tamanho: {os.path.getsize(path) / 1024 ** 2:.1f} MB | "
+          f"Leitor automático: {get_excel_engine(path) or 'padrão do pandas'}")
+
+    engines = ["openpyxl"] + (["calamine"] if CALAMINE_AVAILABLE else [])
+    for engine in engines:
+        handler = DataHandler()
+        start = time.perf_counter()
+        handler.read_excel_file(path, engine=engine)
+        handler.read_excel_sheet(0)
+        elapsed = time.perf_counter() - start
+        print(f"{engine:>9}: {elapsed:.2f} s")
+
+    if not CALAMINE_AVAILABLE:
+        print("calamine não instalado (pip install python-calamine)")
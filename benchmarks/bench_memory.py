@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara o tempo de leitura e a memória ocupada por um CSV de pontos no modo clássico (dtypes do numpy) e no modo
+# Arrow (DataHandler(arrow=True)). Sem um arquivo, gera um CSV com colunas de texto típicas de tabelas de campo.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_memory [arquivo.csv | número de linhas]
+
+import os
+import sys
+import tempfile
+import time
+import numpy
+import pandas
+
+from model import DataHandler, ARROW_AVAILABLE
+
+
+def make_csv(rows: int) -> str:
+    path = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_{rows}.csv")
+    if not os.path.exists(path):
+        rng = numpy.random.default_rng(0)
+        df = pandas.DataFrame({
+            "Cod_ponto": [f"EX{i:07d}" for i in range(rows)],
+            "Latitude": rng.uniform(-30, -20, rows).round(6),
+            "Longitude": rng.uniform(-54, -48, rows).round(6),
+            "Litologia": rng.choice(["Granito", "Gnaisse", "Xisto", "Quartzito", "Basalto"], rows),
+            "Descricao": [f"Afloramento em corte de estrada, ponto {i}" for i in range(rows)],
+            "Amostras": rng.integers(0, 5, rows),
+        })
+        df.to_csv(path, sep=";", decimal=",", index=False)
+    return path
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else "1000000"
+    path = arg if arg.endswith(".csv") else make_csv(int(arg))
+    print(f"Arquivo: {path} ({os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+
+    for arrow in (False, True):
+        if arrow and not ARROW_AVAILABLE:
+            print("Modo Arrow: pyarrow não instalado (pip install pyarrow)")
+            break
+        handler = DataHandler(arrow=arrow)
+        start = time.perf_counter()
+        handler.read_csv_file(path)
+        elapsed = time.perf_counter() - start
+        memory = handler.gdf.memory_usage(index=True, deep=True).sum()
+        print(f"Modo {'Arrow' if arrow else 'clássico'}: {elapsed:.2f} s | {memory / 1024 ** 2:.1f} MB")
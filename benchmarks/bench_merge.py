@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara a mescla de planilhas original (pandas.merge de duas em duas) com DataHandler.merge_sheets (uma única união
+# indexada pela coluna de mescla, com leitura das planilhas em paralelo) em uma pasta de trabalho com 20 planilhas.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_merge [linhas por planilha] [número de planilhas]
+
+import os
+import sys
+import tempfile
+import time
+import numpy
+import pandas
+
+from model import DataHandler
+
+
+def legacy_merge(dfs: list[pandas.DataFrame], merge_column: str) -> pandas.DataFrame:
+    df = dfs[0]
+    for i in range(1, len(dfs)):
+        df = pandas.merge(df, dfs[i], how='outer', on=merge_column)
+    return df
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    sheets = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rng = numpy.random.default_rng(0)
+
+    path = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_merge_{rows}_{sheets}.xlsx")
+    if not os.path.exists(path):
+        with pandas.ExcelWriter(path) as writer:
+            for s in range(sheets):
+                # Cada planilha tem a maior parte dos pontos e alguns pontos exclusivos
+                ids = rng.permutation(numpy.arange(rows + rows // 10))[:rows]
+                df = pandas.DataFrame({"Cod_ponto": [f"EX{i:07d}" for i in ids]})
+                for c in range(5):
+                    df[f"medida_{s}_{c}"] = rng.random(rows).round(4)
+                df[f"obs_{s}"] = rng.choice(["a", "b", "c"], rows)
+                df.to_excel(writer, sheet_name=f"Planilha{s}", index=False)
+
+    excel_file = pandas.ExcelFile(path)
+    start = time.perf_counter()
+    dfs = [DataHandler.process_data(excel_file.parse(sheet_name=s)) for s in excel_file.sheet_names]
+    parsed = time.perf_counter()
+    expected = legacy_merge(dfs, "Cod_ponto")
+    legacy_total = time.perf_counter() - start
+    print(f"Planilhas: {sheets} x {rows} linhas | CPUs: {os.cpu_count()}")
+    print(f"Original: {legacy_total:.2f} s (leitura {parsed - start:.2f} s, mescla {legacy_total - parsed + start:.3f} s)")
+
+    for workers in sorted({1, os.cpu_count() or 1}):
+        handler = DataHandler()
+        handler.read_excel_file(path)
+        handler.read_excel_sheet(0)
+        start = time.perf_counter()
+        handler.merge_sheets("Cod_ponto", workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(handler.gdf.index) == len(expected.index)
+        assert sorted(handler.gdf.columns) == sorted(expected.columns)
+        print(f"merge_sheets, {workers:>2} processo(s): {elapsed:.2f} s")
+
+    # Apenas a mescla, com as planilhas já lidas (em cache)
+    start = time.perf_counter()
+    legacy_merge(dfs, "Cod_ponto")
+    legacy_merge_time = time.perf_counter() - start
+    start = time.perf_counter()
+    handler.read_excel_sheet(0)
+    handler.merge_sheets("Cod_ponto")
+    print(f"Só a mescla: original {legacy_merge_time:.3f} s | merge_sheets {time.perf_counter() - start:.3f} s")
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Mede DataHandler.merge_files (leitura dos arquivos em processos paralelos e combinação em uma só tabela) em uma pasta
+# com vários arquivos xlsx e csv, comparando a leitura sequencial com a paralela.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_merge_files [linhas por arquivo] [número de arquivos]
+
+import os
+import sys
+import tempfile
+import time
+import numpy
+import pandas
+
+from model import DataHandler
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rng = numpy.random.default_rng(0)
+
+    directory = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_files_{rows}_{files}")
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+        for f in range(files):
+            # Os arquivos se sobrepõem parcialmente nos IDs, para gerar conflitos no modo "stack"
+            df = pandas.DataFrame({"Cod_ponto": [f"EX{i:07d}" for i in range(f * rows // 2, f * rows // 2 + rows)],
+                                   "Latitude": rng.uniform(-30, -25, rows).round(6),
+                                   "Longitude": rng.uniform(-54, -48, rows).round(6),
+                                   f"medida_{f}": rng.random(rows).round(4)})
+            if f % 2:
+                df.to_csv(os.path.join(directory, f"tabela{f}.csv"), sep=";", decimal=",", index=False)
+            else:
+                df.to_excel(os.path.join(directory, f"tabela{f}.xlsx"), index=False)
+
+    print(f"Arquivos: {files} x {rows} linhas | CPUs: {os.cpu_count()}")
+    for mode in ("stack", "join"):
+        for workers in sorted({1, os.cpu_count() or 1, files}):
+            handler = DataHandler()
+            start = time.perf_counter()
+            report = handler.merge_files(directory, mode=mode, merge_column="Cod_ponto", workers=workers)
+            elapsed = time.perf_counter() - start
+            conflicts = sum(entry["conflicting_rows"] for entry in report)
+            print(f"{mode}, {workers:>2} processo(s): {elapsed:.2f} s | {len(handler.gdf.index)} linhas, "
+                  f"{conflicts} conflitos")
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara a execução das etapas uma a uma no DataHandler (como a interface faz) com o Pipeline, que funde conversões de
+# tipo de colunas diferentes e reprojeções consecutivas antes de executá-las, e com a repetição do pipeline a partir da
+# sua receita (como a linha de comando faz). Os três devem dar o mesmo resultado, inclusive com conversões sucessivas de
+# uma mesma coluna (ex: Boolean com true_key e depois Integer), que não podem ser fundidas.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_pipeline [número de linhas]
+
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy
+import pandas
+
+from model import DataHandler
+from pipeline import Pipeline
+
+REPROJECTIONS = ("EPSG:4326", "EPSG:31982", "EPSG:5880", "EPSG:31982")
+
+
+def build(path: str) -> Pipeline:
+    pipeline = Pipeline.read(path)
+    # Colunas diferentes: fundidas em uma só conversão
+    pipeline.cast("Medida", "String").cast("Codigo", "String")
+    # Mesma coluna: mantidas em sequência
+    pipeline.cast("Flag", "Boolean", true_key="Sim", false_key="Não").cast("Flag", "Integer")
+    pipeline.cast("Medida", "Float")
+    pipeline.set_geometry("Longitude", "Latitude", "EPSG:4674")
+    for crs in REPROJECTIONS:
+        pipeline.reproject(crs)
+    return pipeline
+
+
+def run_stepwise(pipeline: Pipeline) -> DataHandler:
+    # Etapas uma a uma, sem fusão, calculando cada reprojeção (como ao reprojetar várias vezes pela interface)
+    handler = DataHandler()
+    handler.read_csv_file(pipeline.source["path"])
+    for name, params in pipeline.steps:
+        if name == "cast":
+            for column, (dtype_key, kwargs) in params["columns"].items():
+                handler.change_column_dtype(column, dtype_key, **kwargs)
+        elif name == "set_geometry":
+            handler.set_geodataframe_geometry(params["crs_key"], params["x"], params["y"], params["z"], params["dms"])
+        elif name == "reproject":
+            handler.reproject_geodataframe(params["crs_key"])
+            handler.points.coordinates()
+    return handler
+
+
+def same_result(a: DataHandler, b: DataHandler) -> bool:
+    xa, ya, _ = a.points.coordinates()
+    xb, yb, _ = b.points.coordinates()
+    return (pandas.DataFrame(a.gdf).equals(pandas.DataFrame(b.gdf)) and a.gdf.dtypes.equals(b.gdf.dtypes)
+            and numpy.allclose(xa, xb, equal_nan=True) and numpy.allclose(ya, yb, equal_nan=True))
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rng = numpy.random.default_rng(0)
+
+    path = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_pipeline_v2_{rows}.csv")
+    if not os.path.exists(path):
+        pandas.DataFrame({"Longitude": rng.uniform(-54, -48, rows).round(6),
+                          "Latitude": rng.uniform(-30, -25, rows).round(6),
+                          "Medida": rng.random(rows).round(4),
+                          "Codigo": rng.integers(0, 1000, rows),
+                          "Flag": rng.choice(["Sim", "Não"], rows)}).to_csv(path, sep=";", decimal=",", index=False)
+
+    start = time.perf_counter()
+    handler = run_stepwise(build(path))
+    stepwise = time.perf_counter() - start
+
+    pipeline = build(path)
+    start = time.perf_counter()
+    result = pipeline.run()
+    result.points.coordinates()
+    fused = time.perf_counter() - start
+
+    # Repetição pela receita, como na linha de comando, sem a exportação que from_recipe acrescenta
+    replay = Pipeline.from_recipe(json.loads(json.dumps(pipeline.to_recipe())), path)
+    replay.steps = [step for step in replay.steps if step[0] != "export"]
+    replayed = replay.run()
+
+    x1, y1, _ = handler.points.coordinates()
+    x2, y2, _ = result.points.coordinates()
+    print(f"Linhas: {rows}")
+    print(pipeline.explain())
+    print(f"Etapa por etapa: {stepwise:.2f} s | Pipeline: {fused:.2f} s | "
+          f"diferença máxima nas coordenadas: {max(numpy.nanmax(abs(x1 - x2)), numpy.nanmax(abs(y1 - y2))):.2e} m")
+
+    equivalent = {"Pipeline": same_result(handler, result), "receita": same_result(handler, replayed)}
+    print("Mesmo resultado das etapas uma a uma: " + " | ".join(f"{k}: {v}" for k, v in equivalent.items()))
+    if not all(equivalent.values()):
+        sys.exit(1)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara o fluxo com geometria construída de imediato (points_from_xy + GeoDataFrame.to_crs + .x/.y) com o fluxo
+# de geometria adiada do DataHandler (set_geodataframe_geometry + reproject_geodataframe + save_coordinates_as_columns),
+# usando diferentes números de threads na reprojeção.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_reproject [número de pontos]
+
+import os
+import sys
+import time
+import numpy
+import pandas
+import geopandas
+
+from model import DataHandler, get_crs
+
+SOURCE_CRS = "SIRGAS 2000 (EPSG:4674)"
+TARGET_CRS = "SIRGAS 2000 / UTM zone 22S (EPSG:31982)"
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = numpy.random.default_rng(0)
+    df = pandas.DataFrame({"id": numpy.arange(n), "x": rng.uniform(-54, -48, n), "y": rng.uniform(-30, -20, n)})
+
+    start = time.perf_counter()
+    gdf = geopandas.GeoDataFrame(df, geometry=geopandas.points_from_xy(df["x"], df["y"]), crs=get_crs(SOURCE_CRS))
+    gdf = gdf.to_crs(get_crs(TARGET_CRS))
+    expected_x, expected_y = gdf.geometry.x.to_numpy(), gdf.geometry.y.to_numpy()
+    baseline = time.perf_counter() - start
+    print(f"Pontos: {n} | CPUs: {os.cpu_count()}")
+    print(f"Geometria imediata (points_from_xy + to_crs): {baseline:.3f} s")
+
+    for workers in (1, 2, 4, 8, 16):
+        if workers > 2 * (os.cpu_count() or 1):
+            break
+        handler = DataHandler()
+        handler.gdf = geopandas.GeoDataFrame(df.copy())
+        start = time.perf_counter()
+        handler.set_geodataframe_geometry(SOURCE_CRS, "x", "y")
+        handler.reproject_geodataframe(TARGET_CRS)
+        handler.points.coordinates(workers=workers)
+        handler.save_coordinates_as_columns("x_utm", "y_utm")
+        elapsed = time.perf_counter() - start
+        assert numpy.allclose(handler.gdf["x_utm"], expected_x) and numpy.allclose(handler.gdf["y_utm"], expected_y)
+        print(f"Geometria adiada, {workers:>2} thread(s): {elapsed:.3f} s ({baseline / elapsed:.1f}x)")
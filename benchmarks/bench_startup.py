@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Mede o tempo de importação do model.py e do primeiro acesso ao catálogo de SRCs (CRS_DICT), com e sem o catálogo
+# salvo em disco, em processos separados. Também mede a montagem do catálogo direto da base do PROJ, que era feita em
+# toda inicialização antes do cache.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_startup [repetições]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = """
+import time
+start = time.perf_counter()
+import model
+imported = time.perf_counter()
+len(model.CRS_DICT)
+loaded = time.perf_counter()
+if model.CRS_DICT.rebuild_thread is not None:
+    model.CRS_DICT.rebuild_thread.join()
+start_build = time.perf_counter()
+import crs_catalog
+crs_catalog.build_crs_catalog()
+built = time.perf_counter()
+print(imported - start, loaded - imported, built - start_build)
+"""
+
+
+def run(cache_dir: str) -> list[float]:
+    env = dict(os.environ, LOCALAPPDATA=cache_dir)
+    output = subprocess.run([sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, check=True).stdout
+    return [float(v) for v in output.split()]
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = run(cache_dir)
+        warm = [run(cache_dir) for _ in range(repeats)]
+
+    print(f"Montagem do catálogo direto da base do PROJ: {cold[2]:.3f} s")
+    print(f"Sem cache:  import model {cold[0]:.3f} s | primeiro acesso ao CRS_DICT {cold[1]:.3f} s")
+    print(f"Com cache:  import model {min(w[0] for w in warm):.3f} s | "
+          f"primeiro acesso ao CRS_DICT {min(w[1] for w in warm):.3f} s (melhor de {repeats})")
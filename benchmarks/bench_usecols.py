@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Compara a leitura de uma tabela larga (300 colunas) inteira com a leitura de apenas 10 colunas (usecols), em CSV e
+# em xlsx.
+# Uso (a partir da raiz do repositório): python -m benchmarks.bench_usecols [número de linhas]
+
+import os
+import sys
+import tempfile
+import time
+import numpy
+import pandas
+
+from model import DataHandler
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = numpy.random.default_rng(0)
+    df = pandas.DataFrame(rng.random((rows, 300)).round(4), columns=[f"analito_{i}" for i in range(300)])
+    df.insert(0, "Cod_ponto", [f"EX{i:07d}" for i in range(rows)])
+    usecols = df.columns[:10].to_list()
+
+    for extension in ("csv", "xlsx"):
+        path = os.path.join(tempfile.gettempdir(), f"table2spatial_bench_wide_{rows}.{extension}")
+        if not os.path.exists(path):
+            if extension == "csv":
+                df.to_csv(path, sep=";", decimal=",", index=False)
+            else:
+                df.to_excel(path, index=False)
+
+        for columns in (None, usecols):
+            handler = DataHandler()
+            start = time.perf_counter()
+            if extension == "csv":
+                handler.read_csv_file(path, usecols=columns)
+            else:
+                handler.read_excel_file(path)
+                handler.read_excel_sheet(0, usecols=columns)
+            elapsed = time.perf_counter() - start
+            memory = handler.gdf.memory_usage(index=True, deep=True).sum()
+            label = "todas as colunas" if columns is None else f"{len(columns)} colunas"
+            print(f"{extension:>4}, {label:>16}: {elapsed:.2f} s | {memory / 1024 ** 2:.1f} MB")
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from model import CSV_CHUNK_SIZE, TABLE_EXTENSIONS, resolve_crs_key
+from pipeline import Pipeline, get_output_path, get_recipe_output_format
+
+# Formatos de saída aceitos pela linha de comando (ver DataHandler.export_geodataframe)
+OUTPUT_FORMATS = ("gpkg", "geojson", "shp", "csv", "xlsx")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Monta o parser dos argumentos da linha de comando.
+    :return: O objeto argparse.ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="table2spatial",
+        description="Converte tabelas de pontos (xlsx, xlsm, ods ou csv) em arquivos vetoriais, sem abrir a interface "
+                    "gráfica. Sem argumentos, o table2spatial abre a interface gráfica.")
+    parser.add_argument("inputs", nargs="+", help="Arquivos de entrada ou pastas (são lidas todas as tabelas nelas).")
+    parser.add_argument("-r", "--recipe", default=None,
+                        help="Receita gravada na interface gráfica (arquivo JSON) a ser repetida sobre os arquivos. Com "
+                             "uma receita, as colunas, os SRCs e as demais etapas vêm dela, e apenas -f, -o, --layer, "
+                             "--arrow e -w são usados.")
+    parser.add_argument("-x", "--x-column", default=None,
+                        help="Coluna das coordenadas x (longitude/easting). Obrigatório sem uma receita.")
+    parser.add_argument("-y", "--y-column", default=None,
+                        help="Coluna das coordenadas y (latitude/northing). Obrigatório sem uma receita.")
+    parser.add_argument("-z", "--z-column", default=None, help="Coluna das coordenadas z (opcional).")
+    parser.add_argument("-s", "--crs", default="EPSG:4674",
+                        help="SRC das coordenadas. Ex: EPSG:4674, 4674 ou \"SIRGAS 2000 (EPSG:4674)\". Padrão: EPSG:4674.")
+    parser.add_argument("-t", "--target-crs", default=None, help="SRC de destino, caso os pontos devam ser reprojetados.")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default=None,
+                        help="Formato de saída. Padrão: gpkg, ou o formato exportado na receita.")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="Pasta dos arquivos de saída. Padrão: a mesma pasta de cada arquivo de entrada.")
+    parser.add_argument("--sheet", default="0", help="Nome ou índice da planilha dos arquivos xlsx/xlsm/ods. Padrão: 0.")
+    parser.add_argument("--layer", default=None,
+                        help="Nome da camada (para arquivos gpkg). Padrão: pontos, ou o nome usado na receita.")
+    parser.add_argument("--dms", action="store_true", help="As coordenadas estão em graus, minutos e segundos.")
+    parser.add_argument("--decimal", default=",", help="Separador decimal dos arquivos CSV. Padrão: vírgula.")
+    parser.add_argument("--arrow", action="store_true", help="Usa colunas baseadas no pyarrow (requer o pyarrow).")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Número de arquivos convertidos ao mesmo tempo, em processos separados. Padrão: nº de CPUs.")
+    return parser
+
+
+def collect_input_files(inputs: list[str]) -> list[str]:
+    """
+    Lista os arquivos de entrada, substituindo as pastas pelas tabelas contidas nelas.
+    :param inputs: Caminhos de arquivos e/ou pastas.
+    :return: Os caminhos dos arquivos.
+    """
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            paths.extend(sorted(os.path.join(path, f) for f in os.listdir(path)
+                                if os.path.splitext(f)[1].lower() in TABLE_EXTENSIONS))
+        else:
+            paths.append(path)
+
+    # Um arquivo informado mais de uma vez (ex: sozinho e dentro de uma pasta) é convertido uma única vez
+    unique_paths = {}
+    for path in paths:
+        unique_paths.setdefault(os.path.normcase(os.path.abspath(path)), path)
+    return list(unique_paths.values())
+
+
+def make_unique_output_paths(paths: list[str], output_paths: list[str]) -> list[str]:
+    """
+    Renomeia os arquivos de saída repetidos, que seriam gravados ao mesmo tempo por processos diferentes (ex:
+    pontos.csv e pontos.xlsx na mesma pasta, ou arquivos com o mesmo nome em pastas diferentes com -o). A partir da
+    segunda ocorrência, o nome recebe um número: pontos.gpkg, pontos_2.gpkg, pontos_3.gpkg. Os arquivos de saída
+    também nunca recebem o caminho de um arquivo de entrada.
+    :param paths: Caminhos dos arquivos de entrada.
+    :param output_paths: Caminhos dos arquivos de saída, na mesma ordem (ver get_output_path).
+    :return: Os caminhos dos arquivos de saída, sem repetições.
+    """
+    def key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    reserved = {key(p) for p in paths} | {key(p) for p in output_paths}
+    taken = {key(p) for p in paths}
+    unique_paths = []
+    for output_path in output_paths:
+        if key(output_path) in taken:
+            root, extension = os.path.splitext(output_path)
+            number = 2
+            while key(f"{root}_{number}{extension}") in reserved | taken:
+                number += 1
+            output_path = f"{root}_{number}{extension}"
+        taken.add(key(output_path))
+        unique_paths.append(output_path)
+    return unique_paths
+
+
+def is_cli_call(argv: list[str]) -> bool:
+    """
+    Verifica se os argumentos do programa pedem a conversão pela linha de comando, isto é, se algum deles é uma opção
+    da linha de comando (ex: -x, --recipe ou --help). Caminhos de arquivos sozinhos (ex: um arquivo aberto pelo
+    sistema com "Abrir com") e argumentos do Qt abrem a interface gráfica.
+    :param argv: Os argumentos, sem o nome do programa.
+    :return: True ou False.
+    """
+    options = {option for action in build_parser()._actions for option in action.option_strings}
+    return any(arg.split("=", 1)[0] in options for arg in argv)
+
+
+def convert_file(path: str, output_path: str, options: dict) -> int:
+    """
+    Converte uma tabela de pontos em um arquivo vetorial ou tabela (ver pipeline.Pipeline), repetindo uma receita ou
+    com as opções da linha de comando. Arquivos CSV são convertidos em blocos, sem carregá-los inteiros na memória,
+    quando as etapas e o formato de saída permitem. Função de módulo para poder ser executada em outro processo (ver
+    convert_files).
+    :param path: Caminho do arquivo de entrada.
+    :param output_path: Caminho do arquivo de saída.
+    :param options: Dicionário com as chaves "recipe", "format", "crs_key", "target_crs_key", "x", "y", "z", "dms", "sheet", "layer", "decimal" e "arrow".
+    :return: O número de pontos convertidos.
+    """
+    if options["recipe"] is not None:
+        pipeline = Pipeline.from_recipe(options["recipe"], path, output_path, options["format"], options["layer"],
+                                        options["arrow"] or None)
+    else:
+        pipeline = Pipeline.read(path, options["sheet"], options["decimal"], arrow=options["arrow"])
+        pipeline.set_geometry(options["x"], options["y"], options["crs_key"], options["z"], options["dms"])
+        if options["target_crs_key"] is not None:
+            pipeline.reproject(options["target_crs_key"])
+        pipeline.export(output_path, options["layer"] or "pontos")
+
+    if pipeline.is_streamable():
+        pipeline.source["chunksize"] = CSV_CHUNK_SIZE
+    pipeline.run()
+    return pipeline.exported[output_path]
+
+
+def convert_files(paths: list[str], output_paths: list[str], options: dict, workers: int | None = None):
+    """
+    Converte vários arquivos ao mesmo tempo, em processos separados (ver convert_file). Os resultados são entregues
+    na ordem dos arquivos, à medida que as conversões terminam.
+    :param paths: Caminhos dos arquivos de entrada.
+    :param output_paths: Caminhos dos arquivos de saída.
+    :param options: As opções de conversão (ver convert_file).
+    :param workers: Número máximo de processos. Se None, usa o número de CPUs. Com 1, os arquivos são convertidos em sequência.
+    :return: Gerador de tuplas (caminho de entrada, caminho de saída, número de pontos ou a exceção ocorrida).
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+
+    if workers <= 1:
+        for path, output_path in zip(paths, output_paths):
+            try:
+                yield path, output_path, convert_file(path, output_path, options)
+            except Exception as error:
+                yield path, output_path, error
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(convert_file, path, output_path, options)
+                   for path, output_path in zip(paths, output_paths)]
+        for path, output_path, future in zip(paths, output_paths, futures):
+            try:
+                yield path, output_path, future.result()
+            except Exception as error:
+                yield path, output_path, error
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Ponto de entrada da linha de comando.
+    :param argv: Os argumentos. Se None, usa sys.argv.
+    :return: O código de saída: 0 se todos os arquivos foram convertidos, 1 caso contrário.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    recipe, crs_key, target_crs_key = None, None, None
+    try:
+        if args.recipe is not None:
+            recipe = Pipeline.load_recipe(args.recipe)
+        else:
+            if args.x_column is None or args.y_column is None:
+                parser.error("os argumentos -x/--x-column e -y/--y-column são obrigatórios sem uma receita (-r/--recipe).")
+            crs_key = resolve_crs_key(args.crs)
+            target_crs_key = resolve_crs_key(args.target_crs) if args.target_crs is not None else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    paths = collect_input_files(args.inputs)
+    if not paths:
+        parser.error("Nenhuma tabela encontrada nos caminhos informados.")
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    output_format = args.format or (get_recipe_output_format(recipe) if recipe is not None else "gpkg")
+    output_paths = make_unique_output_paths(paths, [get_output_path(path, output_format, args.output_dir)
+                                                    for path in paths])
+
+    options = {"recipe": recipe, "format": args.format, "crs_key": crs_key, "target_crs_key": target_crs_key, "x": args.x_column, "y": args.y_column,
+               "z": args.z_column, "dms": args.dms, "sheet": int(args.sheet) if args.sheet.isdigit() else args.sheet,
+               "layer": args.layer, "decimal": args.decimal, "arrow": args.arrow}
+
+    start = time.perf_counter()
+    failures = 0
+    for path, output_path, result in convert_files(paths, output_paths, options, args.workers):
+        if isinstance(result, Exception):
+            failures += 1
+            print(f"ERRO  {path}: {result}")
+        else:
+            print(f"OK    {path} -> {output_path} ({result} pontos)")
+
+    print(f"{len(paths) - failures} de {len(paths)} arquivos convertidos em {time.perf_counter() - start:.2f} s.")
+    return 1 if failures else 0
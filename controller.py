@@ -6,11 +6,15 @@ import pandas
 from PyQt6 import QtCore, QtGui, QtWidgets
 from icecream import ic
 
-from model import DataHandler, CRS_DICT, DATETIME_FORMATS, get_dtype_key
+from model import DataHandler, CRS_DICT, CRS_INDEX, DATETIME_FORMATS, PREVIEW_ROWS, get_dtype_key, format_bytes
 from view import MainWindow, ListRow, ListWindow, center_window_on_point
-from dialogs import show_popup, show_file_dialog, show_selection_dialog, show_input_dialog, show_question_dialog
+from dialogs import (show_popup, show_file_dialog, show_selection_dialog, show_input_dialog, show_question_dialog,
+                     show_checklist_dialog)
 from extensions.stereogram import StereogramWindow
 from extensions.rose_chart import RoseChartWindow
+from tasks import TaskRunner
+from history import Snapshot
+from pipeline import Pipeline
 
 
 class UIController:
@@ -20,20 +24,39 @@ class UIController:
 
         self.column_list_widgets = []
         self.dtypes_list = []
+        # Colunas da planilha/arquivo em importação, antes da seleção de colunas
+        self.source_columns = []
 
         self.no_coordinates_mode = False
 
+        # Receita com as ações feitas na tabela atual (ver Pipeline.to_recipe), e as etapas de cada ação que pode ser
+        # desfeita, acompanhando o histórico de edições do DataHandler
+        self.recipe = None
+        self.recipe_undo_steps = []
+        self.recipe_redo_steps = []
+
+        # Executa as operações pesadas (abertura, importação, reprojeção e exportação) fora da thread da interface
+        self.tasks = TaskRunner(self.view)
+
         self.view.show()
 
+        # Carrega o catálogo de SRCs em segundo plano, para que a janela apareça sem esperar pela base do PROJ
+        CRS_DICT.load_in_background()
+
         # Conecta os botões da interface às funções do controlador
         self.view.import_button.clicked.connect(self.import_button_clicked)
         self.view.merge_button.clicked.connect(self.merge_button_clicked)
         self.view.reproject_button.clicked.connect(self.reproject_button_clicked)
         self.view.export_button.clicked.connect(self.export_button_clicked)
         self.view.graph_button.clicked.connect(self.graph_button_clicked)
+        self.view.undo_button.clicked.connect(self.undo_button_clicked)
+        self.view.redo_button.clicked.connect(self.redo_button_clicked)
+        self.view.recipe_button.clicked.connect(self.recipe_button_clicked)
 
-        # Conecta o botão de OK da tela de importação à função do controlador
+        # Conecta os botões de OK e de sugestão de SRC da tela de importação às funções do controlador
         self.view.import_ok_btn.clicked.connect(self.import_ok_button_clicked)
+        self.view.suggest_crs_btn.clicked.connect(self.suggest_crs_button_clicked)
+        self.view.select_columns_btn.clicked.connect(self.select_columns_button_clicked)
 
         # Conecta os componentes da tela de reprojeção às funções do controlador
         self.view.save_coords_chk.checkStateChanged.connect(self.save_coords_checkbox_checked)
@@ -44,45 +67,142 @@ class UIController:
 
     def import_button_clicked(self) -> None:
         try:
-            # Mostra um diálogo para seleção de um arquivo
-            path = show_file_dialog(
-                caption="Selecione uma tabela contendo os dados de entrada.",
+            if self.refuse_if_busy():
+                return
+
+            # Mostra um diálogo para seleção de um ou mais arquivos
+            paths = show_file_dialog(
+                caption="Selecione uma ou mais tabelas contendo os dados de entrada.",
                 extension_filter=("Formatos suportados (*.xlsx *.xlsm *.csv *.ods);;"
                                   "Pasta de Trabalho do Excel (*.xlsx);;"
                                   "Pasta de Trabalho Habilitada para Macro do Excel (*.xlsm);;"
                                   "Comma Separated Values (*.csv);;"
                                   "OpenDocument Spreadsheet (*.ods)"),
-                mode="open", parent=self.view
+                mode="open_multiple", parent=self.view
             )
 
             # Se nenhum arquivo foi selecionado, retorna
-            if not path:
+            if not paths:
                 return
 
-            toggle_wait_cursor(True)
+            self.open_files(paths)
 
-            # Lê o arquivo. Caso não seja um CSV, guarda também os nomes das planilhas (abas) do arquivo
+        except Exception as error:
+            self.handle_exception(error, "import_button_clicked()", "Ops! Ocorreu um erro ao abrir o arquivo.")
+
+    def open_files(self, paths: list[str]) -> None:
+        # Abre as tabelas selecionadas no diálogo ou passadas como argumento ao iniciar o programa
+        try:
+            if self.refuse_if_busy():
+                return
+
+            # Se mais de um arquivo foi selecionado, combina os arquivos em uma só tabela
+            if len(paths) > 1:
+                self.import_multiple_files(paths)
+                return
+            path = paths[0]
+
+            # Lê o arquivo em segundo plano, em um novo DataHandler, para que os dados atuais só sejam substituídos se a
+            # leitura terminar. Caso não seja um CSV, abre a pasta de trabalho para a leitura das planilhas (abas). Apenas
+            # as primeiras linhas são lidas para a tela de importação, e a tabela inteira só é lida ao clicar em OK
             is_csv = path.endswith(".csv")
-            if is_csv:
-                self.model.read_csv_file(path)
-                self.model.excel_file = None
-                sheets = None
-            else:
-                self.model.read_excel_file(path)
-                sheets = self.model.excel_file.sheet_names
+            handler = DataHandler(arrow=self.model.arrow)
+
+            def open_file(progress):
+                if is_csv:
+                    handler.read_csv_file(path, nrows=PREVIEW_ROWS)
+                else:
+                    handler.read_excel_file(path)
+                return handler
+
+            self.run_task(open_file, "Abrindo o arquivo...", lambda _: self.file_opened(handler, is_csv),
+                          "open_files()", "Ops! Ocorreu um erro ao abrir o arquivo.")
+
+        except Exception as error:
+            self.handle_exception(error, "open_files()", "Ops! Ocorreu um erro ao abrir o arquivo.")
+
+    def file_opened(self, handler: DataHandler, is_csv: bool) -> None:
+        try:
+            self.model = handler
+            sheets = None if is_csv else self.model.excel_file.sheet_names
 
             # Troca para a tela de importação
             self.setup_import_screen(csv=is_csv, sheets=sheets)
             self.view.switch_stack(1)
 
-            toggle_wait_cursor(False)
-
         except Exception as error:
-            self.handle_exception(error, "import_button_clicked()", "Ops! Ocorreu um erro ao abrir o arquivo.")
+            self.handle_exception(error, "file_opened()", "Ops! Ocorreu um erro ao abrir o arquivo.")
             # Reconecta os componentes caso tenha dado erro na função model.process_data()
             if isinstance(error, IndexError):
                 self.connect_import_screen_components(True)
 
+    def import_multiple_files(self, paths: list[str]) -> None:
+        try:
+            if self.refuse_if_busy():
+                return
+
+            # Lê os arquivos em paralelo, em segundo plano
+            self.run_task(lambda progress: self.model.read_files(paths, progress=progress), "Lendo os arquivos...",
+                          lambda result: self.files_read(*result), "import_multiple_files()",
+                          "Ops! Não foi possível combinar os arquivos.")
+
+        except Exception as error:
+            self.handle_exception(error, "import_multiple_files()", "Ops! Não foi possível combinar os arquivos.")
+
+    def files_read(self, tables: dict[str, pandas.DataFrame], report: list[dict]) -> None:
+        try:
+            if not tables:
+                raise ValueError("Nenhum dos arquivos selecionados pôde ser lido.")
+
+            modes = {"Empilhar as linhas dos arquivos": "stack", "Mesclar os arquivos por uma coluna identificadora": "join"}
+            mode, ok_clicked = show_selection_dialog(message="Como os arquivos devem ser combinados?",
+                                                     items=list(modes.keys()), title="Combinar arquivos",
+                                                     parent=self.view)
+            if not ok_clicked:
+                return
+            mode = modes[mode]
+
+            # Oferece como coluna identificadora apenas as colunas presentes em todos os arquivos
+            common_columns = [c for c in next(iter(tables.values())).columns
+                              if all(c in df.columns for df in tables.values())]
+            if mode == "join":
+                if not common_columns:
+                    raise ValueError("Os arquivos selecionados não possuem nenhuma coluna em comum.")
+                message = "Selecione a coluna identificadora para a mescla:"
+                items = common_columns
+            else:
+                message = "Selecione uma coluna identificadora para descartar linhas com IDs repetidos (opcional):"
+                items = ["(Nenhuma)"] + common_columns
+            merge_column, ok_clicked = show_selection_dialog(message=message, items=items, title="Combinar arquivos",
+                                                             parent=self.view)
+            if not ok_clicked:
+                return
+            if merge_column == "(Nenhuma)":
+                merge_column = None
+
+            toggle_wait_cursor(True)
+            report = self.model.combine_tables(tables, report, mode, merge_column)
+
+            # Troca para a tela de importação
+            self.setup_import_screen(csv=True)
+            self.view.switch_stack(1)
+            toggle_wait_cursor(False)
+
+            # Mostra o relatório de linhas descartadas e arquivos ignorados
+            details = []
+            for entry in report:
+                if entry["error"] is not None:
+                    details.append(f"{entry['file']}: ignorado ({entry['error']})")
+                else:
+                    details.append(f"{entry['file']}: {entry['rows']} linhas, {entry['skipped_rows']} linhas vazias "
+                                   f"descartadas, {entry['conflicting_rows']} linhas com ID repetido descartadas")
+            merged_files = sum(entry["error"] is None for entry in report)
+            show_popup(f"{merged_files} de {len(report)} arquivos foram combinados em uma tabela com "
+                       f"{len(self.model.gdf.index)} linhas.", details="\n".join(details), parent=self.view)
+
+        except Exception as error:
+            self.handle_exception(error, "files_read()", "Ops! Não foi possível combinar os arquivos.")
+
     def setup_import_screen(self, csv: bool = False, sheets: list | None = None) -> None:
         # Desconecta os componentes para poder atualizar sem dar trigger nas funções
         try:
@@ -100,11 +220,20 @@ class UIController:
         # planilhas como opções na combobox
         if not csv:
             self.view.sheet_cbx.addItems(sheets)
-            self.model.read_excel_sheet(0)
+            self.model.read_excel_sheet(0, nrows=PREVIEW_ROWS)
+            # Lê as demais planilhas em segundo plano, para agilizar a troca de planilha e a mescla
+            if len(sheets) > 1:
+                self.model.preload_sheets_in_background()
+        self.source_columns = self.model.gdf.columns.to_list()
+
+        # A seleção de colunas relê o arquivo de origem, então não se aplica a tabelas combinadas de vários arquivos
+        self.view.select_columns_btn.setEnabled(self.model.csv_path is not None or self.model.excel_file is not None)
 
         # Preenche a combobox de SRCs, caso já não esteja preenchida
         if self.view.crs_cbx.count() == 0:
             self.view.crs_cbx.addItems(sorted(CRS_DICT.keys()))
+            # Monta o índice de áreas de uso dos SRCs para o botão de sugestão de SRC
+            CRS_INDEX.build_in_background()
         self.view.crs_cbx.setCurrentText("SIRGAS 2000 (EPSG:4674)")
 
         # Desmarca por padrão o formato GMS
@@ -190,15 +319,40 @@ class UIController:
 
     def sheet_selected(self):
         try:
+            if self.refuse_if_busy():
+                return
             toggle_wait_cursor(True)
             sheet = self.view.sheet_cbx.currentText()
-            self.model.read_excel_sheet(sheet)
+            self.model.read_excel_sheet(sheet, nrows=PREVIEW_ROWS)
+            self.source_columns = self.model.gdf.columns.to_list()
             self.fill_xyz_combos()
             self.check_if_selected_xyz_is_valid()
             toggle_wait_cursor(False)
         except Exception as error:
             self.handle_exception(error, "sheet_selected()")
 
+    def select_columns_button_clicked(self):
+        try:
+            if self.refuse_if_busy():
+                return
+            selection, ok_clicked = show_checklist_dialog(
+                message="Selecione as colunas a serem importadas. As demais colunas não serão lidas:",
+                items=self.source_columns, checked=self.model.usecols, title="Selecionar colunas", parent=self.view
+            )
+            if not ok_clicked:
+                return
+            if not selection:
+                raise ValueError("Selecione ao menos uma coluna.")
+
+            toggle_wait_cursor(True)
+            self.model.read_preview(None if len(selection) == len(self.source_columns) else selection)
+            self.fill_xyz_combos()
+            self.check_if_selected_xyz_is_valid()
+            toggle_wait_cursor(False)
+
+        except Exception as error:
+            self.handle_exception(error, "select_columns_button_clicked()", "Ops! Não foi possível selecionar as colunas.")
+
     def crs_selected(self):
         try:
             toggle_wait_cursor(True)
@@ -212,11 +366,35 @@ class UIController:
         except Exception as error:
             self.handle_exception(error, "crs_selected()")
 
+    def suggest_crs_button_clicked(self):
+        try:
+            toggle_wait_cursor(True)
+            x_column = self.view.x_cbx.currentText()
+            y_column = self.view.y_cbx.currentText()
+            suggestions = self.model.suggest_crs(x_column, y_column, self.view.dms_chk.isChecked())
+            toggle_wait_cursor(False)
+
+            if not suggestions:
+                show_popup("Nenhum SRC compatível com as coordenadas das colunas selecionadas foi encontrado.",
+                           parent=self.view)
+                return
+
+            crs_key, ok_clicked = show_selection_dialog(
+                message=f"SRCs compatíveis com as colunas {x_column} e {y_column}:", items=suggestions,
+                title="Sugerir SRC", parent=self.view
+            )
+            if ok_clicked:
+                self.view.crs_cbx.setCurrentText(crs_key)
+
+        except Exception as error:
+            self.handle_exception(error, "suggest_crs_button_clicked()", "Ops! Não foi possível sugerir um SRC.")
+
     def no_coordinates_mode_toggled(self):
         try:
             no_coordinates_mode = self.view.no_coordinates_chk.isChecked()
 
             self.view.crs_cbx.setEnabled(not no_coordinates_mode)
+            self.view.suggest_crs_btn.setEnabled(not no_coordinates_mode)
             self.view.dms_chk.setEnabled(not no_coordinates_mode)
             self.view.x_cbx.setEnabled(not no_coordinates_mode)
             self.view.y_cbx.setEnabled(not no_coordinates_mode)
@@ -239,18 +417,13 @@ class UIController:
 
     def import_ok_button_clicked(self):
         try:
-            toggle_wait_cursor(True)
-
-            self.no_coordinates_mode = self.view.no_coordinates_chk.isChecked()
+            if self.refuse_if_busy():
+                return
 
-            self.view.merge_button.setEnabled(
-                self.model.excel_file is not None and len(self.model.excel_file.sheet_names) > 1
-            )
-            self.view.reproject_button.setEnabled(not self.no_coordinates_mode)
-            self.view.export_button.setEnabled(True)
-            self.view.graph_button.setEnabled(True)
+            no_coordinates_mode = self.view.no_coordinates_chk.isChecked()
+            optimize_dtypes = self.view.optimize_dtypes_chk.isChecked()
 
-            if not self.no_coordinates_mode:
+            if not no_coordinates_mode:
                 crs_key = self.view.crs_cbx.currentText()
                 crs_type = CRS_DICT[crs_key]["type"]
                 x_column = self.view.x_cbx.currentText()
@@ -258,34 +431,79 @@ class UIController:
                 z_column = (self.view.z_cbx.currentText() if crs_type == "Geographic 3D CRS" else None)
                 dms = self.view.dms_chk.isChecked()
 
-                self.model.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms)
+            def load_table(progress):
+                # Lê a tabela inteira, já que a tela de importação usa apenas as primeiras linhas
+                self.model.load_full_table(progress=progress)
+
+                if not no_coordinates_mode:
+                    # Valida novamente as colunas de coordenadas, agora com todas as linhas
+                    self.model.validate_coordinates_columns(crs_key, x_column, y_column, z_column, dms)
+
+                memory_usage = self.model.optimize_dtypes() if optimize_dtypes else None
+
+                if not no_coordinates_mode:
+                    self.model.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms)
+
+                return memory_usage
 
-                crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
-                label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
-                # 85 porque é um soft cap do que cabe na interface
-                self.view.bottom_label.setText(label if len(label) < 85 else f"Pontos: {len(self.model.gdf.index)}")
+            # Grava a importação como o início de uma receita. Tabelas combinadas de vários arquivos não têm receita
+            recipe = None
+            source_path = self.model.csv_path or (self.model.excel_file.io if self.model.excel_file is not None else None)
+            if source_path is not None:
+                recipe = Pipeline.read(source_path, self.model.sheet if self.model.sheet is not None else 0,
+                                       self.model.csv_decimal, self.model.usecols, arrow=self.model.arrow)
+                if optimize_dtypes:
+                    recipe.optimize_dtypes()
+                if not no_coordinates_mode:
+                    recipe.set_geometry(x_column, y_column, crs_key, z_column, dms)
+
+            self.run_task(load_table, "Importando a tabela...",
+                          lambda memory_usage: self.table_loaded(no_coordinates_mode, memory_usage, recipe),
+                          "import_ok_button_clicked()", "Ocorreu um erro.")
+
+        except Exception as error:
+            self.handle_exception(error, "import_ok_button_clicked()")
+
+    def table_loaded(self, no_coordinates_mode: bool, memory_usage: tuple[int, int] | None,
+                     recipe: Pipeline | None = None) -> None:
+        try:
+            self.no_coordinates_mode = no_coordinates_mode
+            self.recipe = recipe
+            self.recipe_undo_steps, self.recipe_redo_steps = [], []
+
+            self.view.merge_button.setEnabled(
+                self.model.excel_file is not None and len(self.model.excel_file.sheet_names) > 1
+            )
+            self.view.reproject_button.setEnabled(not self.no_coordinates_mode)
+            self.view.export_button.setEnabled(True)
+            self.view.graph_button.setEnabled(True)
+            self.view.recipe_button.setEnabled(recipe is not None)
 
             self.update_column_list()
             self.view.switch_stack(0)
 
-            toggle_wait_cursor(False)
+            if memory_usage is not None:
+                memory_before, memory_after = memory_usage
+                show_popup(f"Tipos de dados otimizados. Memória ocupada pela tabela: {format_bytes(memory_before)} → "
+                           f"{format_bytes(memory_after)}.", parent=self.view)
         except Exception as error:
-            self.handle_exception(error, "import_ok_button_clicked()")
+            self.handle_exception(error, "table_loaded()")
 
     def update_column_list(self, current_row: int = -1):
         try:
             toggle_wait_cursor(True)
 
             self.view.columns_list.clear()
-            columns = self.model.gdf.columns.to_list()
-            dtypes = self.model.gdf.dtypes.to_list()
-
             row = 0
             self.column_list_widgets = []
             self.dtypes_list = []
 
-            for column_name, column_type in zip(columns, dtypes):
-                widget = ListRow(column_name, str(column_type))
+            for column_name, column_type in self.model.get_columns_dtypes():
+                if column_name in self.model.gdf.columns:
+                    memory = self.model.get_column_memory(column_name)
+                else:
+                    memory = self.model.points.memory_usage()
+                widget = ListRow(column_name, str(column_type), memory)
                 widget.dtype_cbx.currentTextChanged.connect(lambda dtype_change, x=row: self.column_dtype_changed(x))
 
                 try:
@@ -310,24 +528,41 @@ class UIController:
                 row += 1
 
             self.view.columns_list.setCurrentRow(current_row)
+            self.update_bottom_label()
+            self.update_history_buttons()
             toggle_wait_cursor(False)
         except Exception as error:
             self.handle_exception(error, "update_column_list()", "Ops! Ocorreu um erro ao atualizar a lista de colunas.")
 
+    def update_bottom_label(self):
+        rows = len(self.model.gdf.index)
+        memory = f"Memória: {format_bytes(self.model.get_memory_usage())}"
+
+        if self.model.points is None:
+            self.view.bottom_label.setText(f"Linhas: {rows}    {memory}")
+            return
+
+        crs_label = f"{self.model.points.crs.name} ({self.model.points.crs.type_name})"
+        label = f"Pontos: {rows}    SRC: {crs_label}    {memory}"
+        # 85 porque é um soft cap do que cabe na interface
+        self.view.bottom_label.setText(label if len(label) < 85 else f"Pontos: {rows}    {memory}")
+
     def column_dtype_changed(self, row: int):
         try:
+            if self.refuse_if_busy():
+                self.update_column_list(row)
+                return
             toggle_wait_cursor(True)
 
             widget = self.column_list_widgets[row]
             column = widget.column_lbl.text()
             target_dtype = widget.dtype_cbx.currentText()
+            description = f"Converter a coluna \"{column}\" para {target_dtype}"
 
             true_key, false_key, ok_clicked = None, None, True
 
             if target_dtype == "Boolean":
-                uniques = sorted([str(value) for value in self.model.gdf[column].unique()])
-                if "nan" in uniques:
-                    uniques.remove("nan")
+                uniques = list(self.model.get_column_values(column)["uniques"])
                 uniques.append("<Células vazias>")
                 uniques.append("<Nenhum>")
                 toggle_wait_cursor(False)
@@ -346,7 +581,9 @@ class UIController:
                 if ok_clicked:
                     if false_key not in uniques:
                         raise KeyError("O valor informado não existe na coluna.")
-                    self.model.change_column_dtype(column, target_dtype, true_key=true_key, false_key=false_key)
+                    with self.model.history.record(self.model, description, [column]):
+                        self.model.change_column_dtype(column, target_dtype, true_key=true_key, false_key=false_key)
+                    self.record_recipe_step(lambda r: r.cast(column, target_dtype, true_key=true_key, false_key=false_key))
 
             elif target_dtype == "Datetime":
                 toggle_wait_cursor(False)
@@ -354,11 +591,15 @@ class UIController:
                     "Selecione o formato de data e hora presente no campo:",
                     items=DATETIME_FORMATS.keys(), allow_edit=False, parent=self.view)
                 if ok_clicked:
-                    self.model.change_column_dtype(column, target_dtype, datetime_format=datetime_format)
+                    with self.model.history.record(self.model, description, [column]):
+                        self.model.change_column_dtype(column, target_dtype, datetime_format=datetime_format)
+                    self.record_recipe_step(lambda r: r.cast(column, target_dtype, datetime_format=datetime_format))
                 toggle_wait_cursor(True)
 
             else:
-                self.model.change_column_dtype(column, target_dtype)
+                with self.model.history.record(self.model, description, [column]):
+                    self.model.change_column_dtype(column, target_dtype)
+                self.record_recipe_step(lambda r: r.cast(column, target_dtype))
 
             self.dtypes_list[row] = target_dtype
             self.update_column_list(row)
@@ -370,21 +611,39 @@ class UIController:
 
     def merge_button_clicked(self):
         try:
+            if self.refuse_if_busy():
+                return
             merge_column, ok_clicked = show_selection_dialog(message="Selecione a coluna identificadora para a mescla:",
                                                              items=self.model.gdf.columns, title="Mesclar planilhas",
                                                              parent=self.view)
-            if ok_clicked:
-                merged_sheets, skipped_sheets = self.model.merge_sheets(merge_column)
-                show_popup(f"As seguintes planilhas foram mescladas com sucesso usando a coluna {merge_column}: "
-                           f"{', '.join(merged_sheets)}.\nAs demais planilhas do arquivo foram ignoradas pois não "
-                           f"contêm a coluna de mescla em questão.", parent=self.view)
-                self.update_column_list()
+            if not ok_clicked:
+                return
+
+            # O estado anterior é guardado antes da tarefa e só entra no histórico quando ela termina
+            snapshot = Snapshot(self.model, f"Mesclar as planilhas pela coluna \"{merge_column}\"", table=True)
+            self.run_task(lambda progress: self.model.merge_sheets(merge_column, progress=progress),
+                          "Mesclando as planilhas...", lambda result: self.sheets_merged(merge_column, snapshot, *result),
+                          "merge_button_clicked()", "Ops! Não foi possível mesclar as planilhas.")
 
         except Exception as error:
             self.handle_exception(error, "merge_button_clicked()", "Ops! Não foi possível mesclar as planilhas.")
 
+    def sheets_merged(self, merge_column: str, snapshot: Snapshot, merged_sheets: list[str],
+                      skipped_sheets: list[str]) -> None:
+        try:
+            self.model.history.push(snapshot)
+            self.record_recipe_step(lambda r: r.merge_sheets(merge_column))
+            self.update_column_list()
+            show_popup(f"As seguintes planilhas foram mescladas com sucesso usando a coluna {merge_column}: "
+                       f"{', '.join(merged_sheets)}.\nAs demais planilhas do arquivo foram ignoradas pois não "
+                       f"contêm a coluna de mescla em questão.", parent=self.view)
+        except Exception as error:
+            self.handle_exception(error, "sheets_merged()", "Ops! Não foi possível mesclar as planilhas.")
+
     def reproject_button_clicked(self):
         try:
+            if self.refuse_if_busy():
+                return
             toggle_wait_cursor(True)
 
             self.view.switch_stack(2)
@@ -463,45 +722,58 @@ class UIController:
 
     def reproject_ok_button_clicked(self):
         try:
-            toggle_wait_cursor(True)
+            if self.refuse_if_busy():
+                return
 
             crs_key = self.view.target_crs_cbx.currentText()
             save_coords = self.view.save_coords_chk.isChecked()
+            x_col = self.view.x_column_name_edt.text()
+            y_col = self.view.y_column_name_edt.text()
+            z_col = (self.view.z_column_name_edt.text() if CRS_DICT[crs_key]["type"] == "Geographic 3D CRS" else None)
+
+            # O estado anterior é guardado aqui, antes da tarefa, e só entra no histórico quando ela termina. Colunas
+            # de coordenadas já existentes são substituídas e precisam ser guardadas
+            replaced_columns = [x_col, y_col, z_col] if save_coords else []
+            snapshot = Snapshot(self.model, f"Reprojetar os pontos para {crs_key}", replaced_columns, points=True)
+
+            def reproject(progress):
+                # A reprojeção só é calculada aqui se as coordenadas forem salvas em colunas (ver LazyPoints). Se for
+                # cancelada, os pontos e o SRC voltam a ser os de antes
+                if save_coords:
+                    self.model.reproject_and_save_coordinates(crs_key, x_col, y_col, z_col, progress=progress)
+                else:
+                    self.model.reproject_geodataframe(crs_key)
+
+            # Grava a reprojeção (e as colunas de coordenadas salvas) na receita
+            def add_steps(recipe):
+                recipe.reproject(crs_key)
+                if save_coords:
+                    recipe.save_coordinates(x_col, y_col, z_col)
+
+            def reprojected(_):
+                self.model.history.push(snapshot)
+                self.record_recipe_step(add_steps)
+                self.points_reprojected()
+
+            self.run_task(reproject, "Reprojetando os pontos...", reprojected,
+                          "reproject_ok_button_clicked()", "Ops! Ocorreu um erro ao reprojetar.")
 
-            self.model.reproject_geodataframe(crs_key)
-
-            if save_coords:
-                x_col = self.view.x_column_name_edt.text()
-                y_col = self.view.y_column_name_edt.text()
-
-                self.model.gdf[x_col] = self.model.gdf.geometry.x
-                self.model.gdf[y_col] = self.model.gdf.geometry.y
-
-                if CRS_DICT[crs_key]["type"] == "Geographic 3D CRS":
-                    z_col = self.view.z_column_name_edt.text()
-                    self.model.gdf[z_col] = self.model.gdf.geometry.z
-
-                # Reordena as colunas para que a geometria fique no final
-                if "geometry" in self.model.gdf.columns and self.model.gdf["geometry"].dtype == "geometry":
-                    cols = [col for col in self.model.gdf.columns if col != "geometry"]
-                    cols.append("geometry")
-                    self.model.gdf = self.model.gdf[cols]
+        except Exception as error:
+            self.handle_exception(error, "reproject_ok_button_clicked()", "Ops! Ocorreu um erro ao reprojetar.")
 
+    def points_reprojected(self) -> None:
+        try:
             self.update_column_list()
             self.view.switch_stack()
-
-            crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
-            label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
-            self.view.bottom_label.setText(label if len(label) < 87 else f"Pontos: {len(self.model.gdf.index)}")
-
-            toggle_wait_cursor(False)
             show_popup("Pontos reprojetados com sucesso!", parent=self.view)
-
         except Exception as error:
-            self.handle_exception(error, "reproject_ok_button_clicked()", "Ops! Ocorreu um erro ao reprojetar.")
+            self.handle_exception(error, "points_reprojected()")
 
     def export_button_clicked(self):
         try:
+            if self.refuse_if_busy():
+                return
+
             if self.no_coordinates_mode:
                 output_formats = (
                     "Formatos suportados (*.csv *.xlsx);;"
@@ -536,14 +808,40 @@ class UIController:
                 if not ok_clicked:
                     return
 
-            toggle_wait_cursor(True)
-            self.model.export_geodataframe(file_name, layer_name)
-            toggle_wait_cursor(False)
-            show_popup("Pontos exportados com sucesso!", parent=self.view)
+            self.run_task(
+                lambda progress: self.model.export_geodataframe(file_name, layer_name, progress=progress),
+                "Exportando os pontos...", lambda _: self.points_exported(file_name, layer_name),
+                "export_button_clicked()", "Ops! Não foi possível exportar.",
+                on_cancelled=lambda: show_popup("Exportação cancelada. Nenhum arquivo foi gravado ou alterado.",
+                                                parent=self.view)
+            )
 
         except Exception as error:
             self.handle_exception(error, "export_button_clicked()", "Ops! Não foi possível exportar.")
 
+    def points_exported(self, file_name: str, layer_name: str) -> None:
+        if self.recipe is not None:
+            self.recipe.export(file_name, layer_name)
+        show_popup("Pontos exportados com sucesso!", parent=self.view)
+
+    def recipe_button_clicked(self):
+        try:
+            if self.recipe is None:
+                raise ValueError("Apenas tabelas importadas de um único arquivo podem ser salvas como receita.")
+
+            file_name = show_file_dialog(caption="Salvar receita", mode="save", parent=self.view,
+                                         extension_filter="Receita do table2spatial (*.json)")
+            if file_name == "":
+                return
+            if not file_name.endswith(".json"):
+                file_name += ".json"
+
+            self.recipe.save_recipe(file_name)
+            show_popup(f"Receita salva com as seguintes etapas:\n\n{self.recipe.explain()}\n\nPara repeti-la em outros "
+                       f"arquivos, use a linha de comando: table2spatial -r \"{file_name}\" <arquivos>", parent=self.view)
+        except Exception as error:
+            self.handle_exception(error, "recipe_button_clicked()", "Ops! Não foi possível salvar a receita.")
+
     def graph_button_clicked(self):
         try:
             action = self.view.graph_button.click_menu.exec(self.view.graph_button.mapToGlobal(self.view.graph_button.rect().bottomLeft()))
@@ -563,6 +861,8 @@ class UIController:
 
     def rename_column_action_triggered(self):
         try:
+            if self.refuse_if_busy():
+                return
             row = self.view.columns_list.currentRow()
             column = self.column_list_widgets[row].field
 
@@ -573,10 +873,10 @@ class UIController:
 
             toggle_wait_cursor(True)
 
-            if new_name in self.model.gdf.columns:
-                raise ValueError("O nome inserido já está sendo utilizado por outra coluna do GeoDataFrame.")
-
-            self.model.gdf.rename(columns={column: new_name}, inplace=True)
+            with self.model.history.record(self.model, f"Renomear a coluna \"{column}\" para \"{new_name}\"",
+                                           renames={column: new_name}):
+                self.model.rename_column(column, new_name)
+            self.record_recipe_step(lambda r: r.rename({column: new_name}))
             self.column_list_widgets[row].field = new_name
             self.update_column_list(row)
             toggle_wait_cursor(False)
@@ -585,6 +885,8 @@ class UIController:
 
     def delete_column_action_triggered(self):
         try:
+            if self.refuse_if_busy():
+                return
             row = self.view.columns_list.currentRow()
             column = self.column_list_widgets[row].field
 
@@ -594,7 +896,9 @@ class UIController:
                 return
 
             toggle_wait_cursor(True)
-            self.model.gdf.drop(columns=[column], inplace=True)
+            with self.model.history.record(self.model, f"Excluir a coluna \"{column}\"", [column]):
+                self.model.drop_column(column)
+            self.record_recipe_step(lambda r: r.drop(column))
             self.column_list_widgets.pop(row)
             self.update_column_list(row)
             toggle_wait_cursor(False)
@@ -608,18 +912,95 @@ class UIController:
             row = self.view.columns_list.currentRow()
             column = self.column_list_widgets[row].field
 
-            uniques = self.model.gdf[column].astype("string").unique()
-            has_na = any(pandas.isna(value) for value in uniques)
-            uniques = [value for value in uniques if not pandas.isna(value)]
+            values = self.model.get_column_values(column)
 
             toggle_wait_cursor(False)
 
-            list_window = ListWindow(sorted(uniques), has_na, self.view)
+            list_window = ListWindow(values["uniques"], values["nan_count"] > 0, self.view, values["counts"])
             list_window.show()
             center_window_on_point(list_window, list_window.parent.geometry().center())
         except Exception as error:
             self.handle_exception(error, "show_uniques_action_triggered()", "Ops! Ocorreu um erro ao obter a lista de valores únicos.")
 
+    def undo_button_clicked(self):
+        try:
+            if self.refuse_if_busy() or self.view.frame_stack.currentIndex() != 0:
+                return
+            toggle_wait_cursor(True)
+            if self.model.history.undo(self.model) is not None:
+                if self.recipe_undo_steps:
+                    # Guarda a posição das etapas desfeitas, para que sejam refeitas no mesmo lugar da receita
+                    steps = self.recipe_undo_steps.pop()
+                    position = next((i for i, s in enumerate(self.recipe.steps) if s is steps[0]), None) if steps else None
+                    self.recipe.steps = [s for s in self.recipe.steps if not any(s is step for step in steps)]
+                    self.recipe_redo_steps.append((position, steps))
+                self.update_column_list()
+            toggle_wait_cursor(False)
+        except Exception as error:
+            self.handle_exception(error, "undo_button_clicked()", "Ops! Não foi possível desfazer a operação.")
+
+    def redo_button_clicked(self):
+        try:
+            if self.refuse_if_busy() or self.view.frame_stack.currentIndex() != 0:
+                return
+            toggle_wait_cursor(True)
+            if self.model.history.redo(self.model) is not None:
+                if self.recipe_redo_steps:
+                    position, steps = self.recipe_redo_steps.pop()
+                    position = len(self.recipe.steps) if position is None else position
+                    self.recipe.steps[position:position] = steps
+                    self.recipe_undo_steps.append(steps)
+                self.update_column_list()
+            toggle_wait_cursor(False)
+        except Exception as error:
+            self.handle_exception(error, "redo_button_clicked()", "Ops! Não foi possível refazer a operação.")
+
+    def record_recipe_step(self, add_steps) -> None:
+        """
+        Grava uma ação que pode ser desfeita na receita, junto com o histórico de edições do DataHandler.
+        :param add_steps: Função que recebe a receita (Pipeline) e acrescenta as etapas da ação. Ex: lambda r: r.drop("X").
+        :return: Nada.
+        """
+        if self.recipe is None:
+            return
+        count = len(self.recipe.steps)
+        add_steps(self.recipe)
+        self.recipe_undo_steps.append(self.recipe.steps[count:])
+        self.recipe_redo_steps.clear()
+
+    def update_history_buttons(self):
+        undo_description = self.model.history.undo_description
+        redo_description = self.model.history.redo_description
+        self.view.undo_button.setEnabled(undo_description is not None)
+        self.view.redo_button.setEnabled(redo_description is not None)
+        self.view.undo_button.setToolTip(f"Desfazer: {undo_description} (Ctrl+Z)" if undo_description else "Desfazer (Ctrl+Z)")
+        self.view.redo_button.setToolTip(f"Refazer: {redo_description} (Ctrl+Y)" if redo_description else "Refazer (Ctrl+Y)")
+
+    def run_task(self, function, message: str, on_finished, context: str, error_message: str,
+                 on_cancelled=None) -> None:
+        """
+        Executa uma operação em segundo plano (ver tasks.TaskRunner). Erros são mostrados como em handle_exception.
+        :param function: A função a ser executada. Recebe o argumento "progress".
+        :param message: Mensagem exibida no diálogo de progresso.
+        :param on_finished: Função chamada com o retorno da operação, ao terminar.
+        :param context: O contexto informado em caso de erro.
+        :param error_message: A mensagem mostrada em caso de erro.
+        :param on_cancelled: Função chamada caso a operação seja cancelada.
+        :return: Nada.
+        """
+        self.tasks.start(function, message, on_finished,
+                         lambda error: self.handle_exception(error, context, error_message), on_cancelled)
+
+    def refuse_if_busy(self) -> bool:
+        """
+        Impede ações que alteram os dados enquanto uma operação está em andamento em segundo plano.
+        :return: True se há uma operação em andamento (e a ação deve ser recusada), False caso contrário.
+        """
+        if self.tasks.busy:
+            show_popup("Aguarde o fim da operação em andamento.", parent=self.view)
+            return True
+        return False
+
     def handle_exception(self, error, context, message: str = "Ocorreu um erro.", ):
         toggle_wait_cursor(False)
         ic(context, error)
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import json
+import math
+import os
+import threading
+import numpy
+import pyproj
+from collections.abc import Mapping
+
+from crs_pool import CRS_POOL
+
+CRS_TYPES = {
+    "PJType.GEOGRAPHIC_2D_CRS": "Geographic 2D CRS",
+    "PJType.GEOGRAPHIC_3D_CRS": "Geographic 3D CRS",
+    "PJType.PROJECTED_CRS": "Projected CRS",
+}
+
+# Versão do formato dos arquivos salvos em disco. Deve ser incrementada sempre que o formato mudar
+CACHE_FORMAT = 2
+
+# SRCs priorizados nas sugestões automáticas de SRC (ver CRSIndex.suggest)
+PREFERRED_CRS_NAMES = ("SIRGAS 2000",)
+
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA", os.path.join(os.path.expanduser("~"), ".cache")), "table2spatial")
+
+
+def get_database_version() -> str:
+    """
+    Retorna uma string que identifica a versão do pyproj, do PROJ e da base de dados EPSG em uso. É usada como chave
+    do catálogo de SRCs salvo em disco: se qualquer uma das versões mudar, o catálogo é considerado desatualizado.
+    :return: A string de versão.
+    """
+    epsg_version = pyproj.database.get_database_metadata("EPSG.VERSION")
+    return f"pyproj {pyproj.__version__} | PROJ {pyproj.proj_version_str} | EPSG {epsg_version} | format {CACHE_FORMAT}"
+
+
+def build_crs_catalog() -> dict[str, dict]:
+    """
+    Consulta a base de dados do PROJ e monta o catálogo de SRCs geográficos 2D, 3D e projetados.
+    :return: Dicionário no formato {"name (auth:code)": {"name": ..., "auth_name": ..., "code": ..., "type": ..., "deprecated": ..., "area_of_use": (west, south, east, north)}}.
+    """
+    crs_db = pyproj.database.query_crs_info(pj_types=("GEOGRAPHIC_2D_CRS", "PROJECTED_CRS", "GEOGRAPHIC_3D_CRS"))
+    return {
+        f"{crs_info.name} {'(3D) ' if CRS_TYPES[str(crs_info.type)] == 'Geographic 3D CRS' else ''}({crs_info.auth_name}:{crs_info.code})":
+        {
+            "name": crs_info.name,
+            "auth_name": crs_info.auth_name,
+            "code": crs_info.code,
+            "type": CRS_TYPES[str(crs_info.type)],
+            "deprecated": crs_info.deprecated,
+            "area_of_use": tuple(crs_info.area_of_use.bounds) if crs_info.area_of_use is not None else None
+        }
+        for crs_info in crs_db if not crs_info.auth_name.startswith("IAU")  # Os SRCs da IAU são para outros planetas
+    }
+
+
+class CRSCatalog(Mapping):
+    """
+    Catálogo de SRCs com a mesma interface de um dicionário somente leitura. A consulta à base de dados do PROJ é
+    feita apenas no primeiro acesso, e o resultado é salvo em disco em um arquivo JSON identificado pela versão da
+    base (ver get_database_version). Nas execuções seguintes, o catálogo é lido desse arquivo. Caso o arquivo esteja
+    desatualizado, ele é usado mesmo assim e um novo catálogo é montado e salvo em segundo plano.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_path = os.path.join(cache_dir, "crs_catalog.json")
+        self.rebuild_thread = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> dict:
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def data(self) -> dict[str, dict]:
+        if self._data is None:
+            self.load()
+        return self._data
+
+    def load(self) -> None:
+        """
+        Carrega o catálogo do arquivo em disco ou, caso ele não exista, consulta a base de dados do PROJ.
+        :return: Nada.
+        """
+        with self._lock:
+            if self._data is not None:
+                return
+
+            version = get_database_version()
+            cached_version, cached_data = self.read_cache()
+
+            if cached_data is None:
+                self._data = build_crs_catalog()
+                self.write_cache(version, self._data)
+            else:
+                self._data = cached_data
+                if cached_version != version:
+                    self.rebuild_thread = threading.Thread(target=self.rebuild, args=(version,), daemon=True)
+                    self.rebuild_thread.start()
+
+    def load_in_background(self) -> None:
+        """
+        Carrega o catálogo em uma thread separada, para que ele esteja pronto quando for acessado pela primeira vez.
+        :return: Nada.
+        """
+        threading.Thread(target=self.load, daemon=True).start()
+
+    def rebuild(self, version: str) -> None:
+        """
+        Monta um novo catálogo a partir da base de dados do PROJ, substitui o catálogo em uso e o salva em disco.
+        :param version: A string de versão da base de dados (ver get_database_version).
+        :return: Nada.
+        """
+        data = build_crs_catalog()
+        self._data = data
+        self.write_cache(version, data)
+
+    def read_cache(self) -> (str | None, dict | None):
+        """
+        Lê o catálogo salvo em disco. As linhas são salvas como listas [chave, name, auth_name, code, type, deprecated,
+        area_of_use] para deixar o arquivo mais compacto.
+        :return: A versão da base de dados e o catálogo salvos no arquivo, ou (None, None) se o arquivo não puder ser lido.
+        """
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            data = {
+                key: {"name": name, "auth_name": auth_name, "code": code, "type": crs_type, "deprecated": deprecated,
+                      "area_of_use": tuple(area_of_use) if area_of_use is not None else None}
+                for key, name, auth_name, code, crs_type, deprecated, area_of_use in cache["rows"]
+            }
+            return cache["version"], data
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def write_cache(self, version: str, data: dict[str, dict]) -> None:
+        """
+        Salva o catálogo em disco. O arquivo é escrito com outro nome e depois renomeado, para que uma leitura
+        simultânea nunca encontre um arquivo pela metade. Erros de escrita (ex: pasta sem permissão) são ignorados.
+        :param version: A string de versão da base de dados (ver get_database_version).
+        :param data: O catálogo de SRCs.
+        :return: Nada.
+        """
+        rows = [[key, v["name"], v["auth_name"], v["code"], v["type"], v["deprecated"], v["area_of_use"]]
+                for key, v in data.items()]
+        temp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "rows": rows}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+
+def get_native_bounds(crs_entry: dict) -> tuple[float, float, float, float] | None:
+    """
+    Calcula os limites da área de uso de um SRC nas unidades do próprio SRC. Para SRCs projetados, a área de uso
+    (em graus) é projetada com Transformer.transform_bounds.
+    :param crs_entry: Um item do catálogo de SRCs (ver build_crs_catalog).
+    :return: Os limites no formato (x_min, y_min, x_max, y_max) ou None, se o SRC não tiver área de uso ou não puder ser projetado.
+    """
+    if crs_entry["area_of_use"] is None:
+        return None
+
+    west, south, east, north = crs_entry["area_of_use"]
+
+    if crs_entry["type"] != "Projected CRS":
+        # Áreas que cruzam o antimeridiano (west > east) são tratadas como se cobrissem todas as longitudes
+        return (-180.0, south, 180.0, north) if west > east else (west, south, east, north)
+
+    try:
+        crs = pyproj.CRS.from_authority(crs_entry["auth_name"], crs_entry["code"])
+        transformer = pyproj.Transformer.from_crs(crs.geodetic_crs, crs, always_xy=True)
+        x_min, y_min, x_max, y_max = transformer.transform_bounds(west, south, east, north)
+    except (pyproj.exceptions.ProjError, AttributeError):
+        return None
+
+    if not all(math.isfinite(v) for v in (x_min, y_min, x_max, y_max)):
+        return None
+    if x_min > x_max:
+        x_min, x_max = -math.inf, math.inf
+
+    return x_min, y_min, x_max, y_max
+
+
+class CRSIndex:
+    """
+    Índice dos limites das áreas de uso de todos os SRCs do catálogo, usado para sugerir SRCs compatíveis com as
+    coordenadas de uma tabela. Os limites (já projetados, no caso de SRCs projetados) são calculados uma única vez e
+    salvos em disco com a mesma chave de versão do catálogo. Em memória, ficam em arrays ordenados pelo x mínimo, de
+    forma que uma consulta seja um corte por busca binária seguido de comparações vetorizadas.
+    """
+    def __init__(self, catalog: CRSCatalog, cache_dir: str = CACHE_DIR):
+        self.catalog = catalog
+        self.cache_path = os.path.join(cache_dir, "crs_index.json")
+        self.keys = None
+        self.bounds = None
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        """
+        Monta o índice a partir do arquivo em disco ou, caso ele não exista ou esteja desatualizado, calculando os
+        limites de todos os SRCs do catálogo (o que leva alguns segundos).
+        :return: Nada.
+        """
+        with self._lock:
+            if self.keys is not None:
+                return
+
+            version = get_database_version()
+            bounds = self.read_cache(version)
+            if bounds is None:
+                bounds = {key: get_native_bounds(entry) for key, entry in self.catalog.items()}
+                self.write_cache(version, bounds)
+
+            keys = [key for key, b in bounds.items() if b is not None and key in self.catalog]
+            bounds_array = numpy.array([bounds[key] for key in keys], dtype="float64").reshape(-1, 4)
+            order = numpy.argsort(bounds_array[:, 0], kind="stable")
+
+            self.bounds = bounds_array[order]
+            self.keys = numpy.array(keys, dtype=object)[order]
+
+    def build_in_background(self) -> None:
+        """
+        Monta o índice em uma thread separada.
+        :return: Nada.
+        """
+        threading.Thread(target=self.build, daemon=True).start()
+
+    def suggest(self, x_min: float, y_min: float, x_max: float, y_max: float, limit: int = 10,
+                preferred_names: tuple[str] = PREFERRED_CRS_NAMES, max_checks: int = 200) -> list[str]:
+        """
+        Sugere SRCs cuja área de uso contém o retângulo formado pelos limites das coordenadas. Os candidatos são
+        ordenados dando prioridade 1) ao tipo de SRC compatível com as coordenadas (geográfico ou projetado), 2) aos
+        nomes iniciados por preferred_names, 3) aos SRCs não obsoletos e 4) às menores áreas de uso. Para os SRCs
+        projetados, as coordenadas são convertidas para o SRC geográfico de base e comparadas com a área de uso real,
+        o que descarta, por exemplo, zonas UTM em que os pontos cairiam fora da área de uso.
+        :param x_min: Menor coordenada x (longitude/easting).
+        :param y_min: Menor coordenada y (latitude/northing).
+        :param x_max: Maior coordenada x (longitude/easting).
+        :param y_max: Maior coordenada y (latitude/northing).
+        :param limit: Número máximo de sugestões.
+        :param preferred_names: Prefixos de nomes de SRCs a serem priorizados.
+        :param max_checks: Número máximo de SRCs projetados verificados na área de uso real.
+        :return: Lista de chaves do catálogo de SRCs (CRS_DICT), da mais para a menos provável.
+        """
+        self.build()
+
+        # Apenas os SRCs com x mínimo menor ou igual ao x mínimo das coordenadas podem contê-las
+        end = numpy.searchsorted(self.bounds[:, 0], x_min, side="right")
+        bounds = self.bounds[:end]
+        candidates = numpy.nonzero((bounds[:, 2] >= x_max) & (bounds[:, 1] <= y_min) & (bounds[:, 3] >= y_max))[0]
+
+        looks_geographic = -180 <= x_min and x_max <= 180 and -90 <= y_min and y_max <= 90
+        areas = (bounds[candidates, 2] - bounds[candidates, 0]) * (bounds[candidates, 3] - bounds[candidates, 1])
+
+        ranking = []
+        for i, area in zip(candidates, areas):
+            entry = self.catalog[self.keys[i]]
+            ranking.append((
+                (entry["type"] != "Projected CRS") != looks_geographic,
+                not entry["name"].startswith(preferred_names),
+                entry["deprecated"],
+                area,
+                i
+            ))
+        ranking.sort()
+
+        suggestions, checks = [], 0
+        for *_, i in ranking:
+            key = self.keys[i]
+            entry = self.catalog[key]
+            if entry["type"] == "Projected CRS":
+                if checks >= max_checks:
+                    continue
+                checks += 1
+                if not self.area_of_use_contains(entry, x_min, y_min, x_max, y_max):
+                    continue
+            suggestions.append(key)
+            if len(suggestions) >= limit:
+                break
+
+        return suggestions
+
+    @staticmethod
+    def area_of_use_contains(crs_entry: dict, x_min: float, y_min: float, x_max: float, y_max: float) -> bool:
+        """
+        Verifica se os limites de coordenadas em um SRC projetado, convertidos para o SRC geográfico de base, estão
+        dentro da área de uso do SRC.
+        :param crs_entry: Um item do catálogo de SRCs (ver build_crs_catalog).
+        :return: True se a área de uso contém as coordenadas. Do contrário, False.
+        """
+        west, south, east, north = crs_entry["area_of_use"]
+        try:
+            crs = CRS_POOL.get_crs(crs_entry["auth_name"], crs_entry["code"])
+            transformer = CRS_POOL.get_transformer(crs, crs.geodetic_crs)
+            lon_min, lat_min, lon_max, lat_max = transformer.transform_bounds(x_min, y_min, x_max, y_max)
+        except (pyproj.exceptions.ProjError, AttributeError):
+            return False
+
+        if not south <= lat_min <= lat_max <= north:
+            return False
+        if west <= east:
+            return west <= lon_min <= lon_max <= east
+        # Área de uso que cruza o antimeridiano
+        return lon_min >= west or lon_max <= east
+
+    def read_cache(self, version: str) -> dict | None:
+        """
+        Lê os limites dos SRCs salvos em disco.
+        :param version: A string de versão da base de dados (ver get_database_version).
+        :return: Dicionário no formato {chave: (x_min, y_min, x_max, y_max)} ou None, se o arquivo não puder ser lido ou estiver desatualizado.
+        """
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache["version"] != version:
+                return None
+            return {key: tuple(b) if b is not None else None for key, b in cache["bounds"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write_cache(self, version: str, bounds: dict) -> None:
+        """
+        Salva os limites dos SRCs em disco. Erros de escrita são ignorados.
+        :param version: A string de versão da base de dados (ver get_database_version).
+        :param bounds: Dicionário no formato {chave: (x_min, y_min, x_max, y_max)}.
+        :return: Nada.
+        """
+        temp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "bounds": bounds}, f, separators=(",", ":"))
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
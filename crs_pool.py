@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import threading
+import pyproj
+from collections import OrderedDict
+
+
+class CRSPool:
+    """
+    Cache LRU de objetos pyproj.CRS e pyproj.Transformer compartilhado por todo o processo, para que validações,
+    construção de geometrias e reprojeções repetidas não paguem de novo o custo de inicialização do PROJ. Desde a
+    versão 3.1 do pyproj, CRSs e Transformers podem ser usados por várias threads ao mesmo tempo (cada thread recebe seu
+    próprio contexto do PROJ internamente), e o acesso ao cache é protegido por um lock.
+    """
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = {"crs": 0, "transformer": 0}
+        self.misses = {"crs": 0, "transformer": 0}
+        self._crs = OrderedDict()
+        self._transformers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_crs(self, auth_name: str, code: str) -> pyproj.CRS:
+        """
+        Retorna o SRC de uma autoridade e código, criando-o apenas se ainda não estiver no cache.
+        :param auth_name: O nome da autoridade. Ex: "EPSG".
+        :param code: O código do SRC na autoridade. Ex: "4674".
+        :return: O objeto pyproj.CRS.
+        """
+        key = (auth_name, str(code))
+        with self._lock:
+            crs = self._get(self._crs, key, "crs")
+        if crs is None:
+            crs = pyproj.CRS.from_authority(auth_name, code)
+            with self._lock:
+                self._put(self._crs, key, crs)
+        return crs
+
+    def get_transformer(self, source: pyproj.CRS, target: pyproj.CRS, always_xy: bool = True) -> pyproj.Transformer:
+        """
+        Retorna o Transformer entre dois SRCs, criando-o apenas se ainda não estiver no cache.
+        :param source: O SRC de origem.
+        :param target: O SRC de destino.
+        :param always_xy: Se True, as coordenadas são sempre lidas e escritas na ordem x (longitude/easting), y (latitude/northing).
+        :return: O objeto pyproj.Transformer.
+        """
+        key = (source.srs, target.srs, always_xy)
+        with self._lock:
+            transformer = self._get(self._transformers, key, "transformer")
+        if transformer is None:
+            transformer = pyproj.Transformer.from_crs(source, target, always_xy=always_xy)
+            with self._lock:
+                self._put(self._transformers, key, transformer)
+        return transformer
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Retorna os contadores de acertos e falhas do cache, para CRSs e Transformers.
+        :return: Dicionário no formato {"crs": {"hits": ..., "misses": ..., "size": ...}, "transformer": {...}}.
+        """
+        with self._lock:
+            return {
+                "crs": {"hits": self.hits["crs"], "misses": self.misses["crs"], "size": len(self._crs)},
+                "transformer": {"hits": self.hits["transformer"], "misses": self.misses["transformer"],
+                                "size": len(self._transformers)},
+            }
+
+    def clear(self) -> None:
+        """
+        Esvazia o cache e zera os contadores.
+        :return: Nada.
+        """
+        with self._lock:
+            self._crs.clear()
+            self._transformers.clear()
+            self.hits = {"crs": 0, "transformer": 0}
+            self.misses = {"crs": 0, "transformer": 0}
+
+    def _get(self, cache: OrderedDict, key: tuple, counter: str):
+        value = cache.get(key)
+        if value is None:
+            self.misses[counter] += 1
+        else:
+            self.hits[counter] += 1
+            cache.move_to_end(key)
+        return value
+
+    def _put(self, cache: OrderedDict, key: tuple, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+
+# Cache usado por todo o aplicativo
+CRS_POOL = CRSPool()
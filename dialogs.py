@@ -3,7 +3,7 @@
 @author: Gabriel Maccari
 """
 
-from PyQt6 import QtWidgets, QtGui
+from PyQt6 import QtCore, QtWidgets, QtGui
 
 
 def show_popup(message: str, msg_type: str = "notification", details: str | None = None, parent: QtWidgets.QMainWindow = None):
@@ -35,12 +35,15 @@ def show_file_dialog(caption: str, extension_filter: str|None = None, mode: str
     Exibe um diálogo de abertura/salvamento de arquivo.
     :param caption: Título do diálogo.
     :param extension_filter: Filtro de extensões de arquivo.
-    :param mode: "open", "save" ou "directory".
+    :param mode: "open", "open_multiple", "save" ou "directory".
     :param parent: Janela pai.
-    :return: Caminho completo do arquivo (str).
+    :return: Caminho completo do arquivo (str), ou lista de caminhos no modo "open_multiple".
     """
     if mode == "open":
         file_name, file_type = QtWidgets.QFileDialog.getOpenFileName(parent, caption=caption, filter=extension_filter)
+    elif mode == "open_multiple":
+        file_names, file_type = QtWidgets.QFileDialog.getOpenFileNames(parent, caption=caption, filter=extension_filter)
+        return file_names
     elif mode == "save":
         file_name, file_type = QtWidgets.QFileDialog.getSaveFileName(parent, caption=caption, filter=extension_filter)
     else:
@@ -103,3 +106,56 @@ def show_question_dialog(message: str, parent: QtWidgets.QMainWindow = None):
     no_button.setText('Não')
 
     return dialog.exec()
+
+
+def show_checklist_dialog(message: str, items: list[str], checked: list[str] | None = None,
+                          title: str = "Selecionar opções", parent: QtWidgets.QMainWindow = None) -> (list[str], bool):
+    """
+    Exibe um diálogo com uma lista de opções marcáveis.
+    :param message: Mensagem ao usuário.
+    :param items: Opções da lista.
+    :param checked: Opções marcadas por padrão. Se None, todas as opções são marcadas.
+    :param title: Título da janela.
+    :param parent: Janela pai.
+    :return: As opções marcadas e se o botão de OK foi clicado (list[str], bool).
+    """
+    dialog = QtWidgets.QDialog(parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowIcon(QtGui.QIcon("icons/list.png"))
+    layout = QtWidgets.QVBoxLayout(dialog)
+
+    layout.addWidget(QtWidgets.QLabel(message, dialog))
+
+    list_widget = QtWidgets.QListWidget(dialog)
+    for item in items:
+        list_item = QtWidgets.QListWidgetItem(str(item), list_widget)
+        is_checked = checked is None or item in checked
+        list_item.setCheckState(QtCore.Qt.CheckState.Checked if is_checked else QtCore.Qt.CheckState.Unchecked)
+    layout.addWidget(list_widget)
+
+    def set_all(state):
+        for i in range(list_widget.count()):
+            list_widget.item(i).setCheckState(state)
+
+    select_buttons = QtWidgets.QHBoxLayout()
+    select_all_btn = QtWidgets.QPushButton("Marcar todas", dialog)
+    select_all_btn.clicked.connect(lambda: set_all(QtCore.Qt.CheckState.Checked))
+    select_none_btn = QtWidgets.QPushButton("Desmarcar todas", dialog)
+    select_none_btn.clicked.connect(lambda: set_all(QtCore.Qt.CheckState.Unchecked))
+    select_buttons.addWidget(select_all_btn)
+    select_buttons.addWidget(select_none_btn)
+    layout.addLayout(select_buttons)
+
+    buttons = QtWidgets.QDialogButtonBox(
+        QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel, dialog
+    )
+    buttons.button(QtWidgets.QDialogButtonBox.StandardButton.Cancel).setText("Cancelar")
+    buttons.accepted.connect(dialog.accept)
+    buttons.rejected.connect(dialog.reject)
+    layout.addWidget(buttons)
+
+    ok = dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted
+    selection = [list_widget.item(i).text() for i in range(list_widget.count())
+                 if list_widget.item(i).checkState() == QtCore.Qt.CheckState.Checked]
+
+    return selection, ok
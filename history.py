@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import geopandas
+import pandas
+
+# Limites padrão do histórico de edições (desfazer/refazer)
+HISTORY_MAX_BYTES = 512 * 1024 ** 2
+HISTORY_MAX_SIZE = 50
+
+
+class Snapshot:
+    """
+    Estado de um DataHandler antes de uma operação, guardando apenas o que a operação altera: as colunas substituídas
+    ou excluídas, a ordem e os nomes das colunas e, se necessário, os pontos ou a tabela inteira. Nada é copiado: as
+    operações do DataHandler sempre substituem colunas e arrays de coordenadas inteiros em vez de alterar seus valores,
+    então os dados que não mudaram são compartilhados entre a tabela atual e os estados do histórico.
+    """
+    def __init__(self, handler, description: str, columns: list[str] = (), renames: dict[str, str] | None = None,
+                 points: bool = False, table: bool = False):
+        """
+        :param handler: O DataHandler.
+        :param description: Descrição da operação. Ex: "Excluir a coluna X".
+        :param columns: As colunas que a operação substitui ou exclui. Colunas criadas pela operação não precisam ser informadas.
+        :param renames: Dicionário {nome atual: novo nome} das colunas que a operação renomeia.
+        :param points: Se True, guarda os pontos e o SRC (operações que alteram as coordenadas).
+        :param table: Se True, guarda a tabela inteira e os pontos (operações que alteram as linhas).
+        """
+        self.description = description
+        self.table = table
+        self.order = list(handler.gdf.columns)
+        self.gdf = handler.gdf if table else None
+        self.columns = {} if table else {c: handler.gdf[c] for c in columns if c in handler.gdf.columns}
+        self.renames = dict(renames or {})
+        self.has_points = points or table
+        self.points = handler.points.copy() if self.has_points and handler.points is not None else None
+        self.crs_key = handler.crs_key
+
+        # Memória mantida pelo estado, usando os valores em cache do DataHandler (ver get_column_memory)
+        if table:
+            self.size = handler.get_memory_usage()
+        else:
+            self.size = sum(handler.get_column_memory(c) for c in self.columns)
+            if self.points is not None:
+                self.size += self.points.memory_usage()
+
+    def restore(self, handler) -> "Snapshot":
+        """
+        Devolve o DataHandler a este estado.
+        :param handler: O DataHandler.
+        :return: O estado anterior à restauração, que a desfaz (usado para refazer a operação).
+        """
+        if self.table:
+            inverse = Snapshot(handler, self.description, table=True)
+            handler.gdf = self.gdf
+            handler.invalidate_column_profiles()
+        else:
+            # Colunas atuais que serão substituídas ou removidas: as guardadas e as criadas pela operação
+            renamed = set(self.renames.values())
+            changed = [c for c in handler.gdf.columns
+                       if c in self.columns or (c not in self.order and c not in renamed)]
+            inverse = Snapshot(handler, self.description, changed, {new: old for old, new in self.renames.items()},
+                               self.has_points)
+
+            data = {c: self.columns[c] if c in self.columns else handler.gdf[self.renames.get(c, c)]
+                    for c in self.order}
+            df = pandas.DataFrame(data, index=handler.gdf.index, copy=False)
+            handler.gdf = geopandas.GeoDataFrame(df, copy=False)
+            handler.invalidate_column_profiles(*changed, *self.columns, *self.renames, *renamed)
+
+        if self.has_points:
+            handler.points = self.points
+            handler.crs_key = self.crs_key
+        return inverse
+
+
+class EditHistory:
+    """
+    Histórico de desfazer/refazer das edições de um DataHandler, limitado pelo número de estados e pela memória que
+    eles mantêm ocupada. Quando um dos limites é ultrapassado, os estados mais antigos são descartados. Cada estado
+    guarda apenas as colunas alteradas pela operação (ver Snapshot).
+    """
+    def __init__(self, max_bytes: int = HISTORY_MAX_BYTES, max_size: int = HISTORY_MAX_SIZE):
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self._undo = deque()
+        self._redo = []
+        self._lock = threading.Lock()
+
+    @property
+    def can_undo(self) -> bool:
+        with self._lock:
+            return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        with self._lock:
+            return len(self._redo) > 0
+
+    @property
+    def undo_description(self) -> str | None:
+        with self._lock:
+            return self._undo[-1].description if self._undo else None
+
+    @property
+    def redo_description(self) -> str | None:
+        with self._lock:
+            return self._redo[-1].description if self._redo else None
+
+    @property
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(s.size for s in self._undo) + sum(s.size for s in self._redo)
+
+    @contextmanager
+    def record(self, handler, description: str, columns: list[str] = (), renames: dict[str, str] | None = None,
+               points: bool = False, table: bool = False):
+        """
+        Registra uma operação no histórico. O estado é guardado antes da operação e só entra no histórico se ela
+        terminar sem erros. Uso: with history.record(handler, "Excluir a coluna X", ["X"]): handler.drop_column("X")
+        :param handler: O DataHandler.
+        :param description: Descrição da operação.
+        :param columns: As colunas que a operação substitui ou exclui (ver Snapshot).
+        :param renames: Dicionário {nome atual: novo nome} das colunas que a operação renomeia.
+        :param points: Se True, a operação altera os pontos.
+        :param table: Se True, a operação altera as linhas da tabela.
+        :return: Gerenciador de contexto.
+        """
+        snapshot = Snapshot(handler, description, columns, renames, points, table)
+        yield
+        self.push(snapshot)
+
+    def push(self, snapshot: Snapshot) -> None:
+        """
+        Acrescenta um estado ao histórico e descarta as operações desfeitas, que não podem mais ser refeitas.
+        Se o estado sozinho for maior que o limite de memória, o histórico é esvaziado, já que os estados anteriores
+        não poderiam mais ser alcançados.
+        :param snapshot: O estado anterior à operação.
+        :return: Nada.
+        """
+        with self._lock:
+            self._redo.clear()
+            if snapshot.size > self.max_bytes:
+                self._undo.clear()
+                return
+            self._undo.append(snapshot)
+            self._evict()
+
+    def undo(self, handler) -> str | None:
+        """
+        Desfaz a última operação registrada.
+        :param handler: O DataHandler.
+        :return: A descrição da operação desfeita, ou None se não havia o que desfazer.
+        """
+        with self._lock:
+            if not self._undo:
+                return None
+            snapshot = self._undo.pop()
+            self._redo.append(snapshot.restore(handler))
+            self._evict()
+            return snapshot.description
+
+    def redo(self, handler) -> str | None:
+        """
+        Refaz a última operação desfeita.
+        :param handler: O DataHandler.
+        :return: A descrição da operação refeita, ou None se não havia o que refazer.
+        """
+        with self._lock:
+            if not self._redo:
+                return None
+            snapshot = self._redo.pop()
+            self._undo.append(snapshot.restore(handler))
+            self._evict()
+            return snapshot.description
+
+    def _evict(self) -> None:
+        # Descarta primeiro os estados mais antigos do desfazer e, se ainda preciso, as operações desfeitas mais antigas
+        while (len(self._undo) + len(self._redo) > self.max_size
+               or sum(s.size for s in self._undo) + sum(s.size for s in self._redo) > self.max_bytes):
+            if self._undo:
+                self._undo.popleft()
+            else:
+                self._redo.pop(0)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Retorna o número de estados que podem ser desfeitos e refeitos e a memória que eles mantêm ocupada.
+        :return: Dicionário no formato {"undo": ..., "redo": ..., "bytes": ...}.
+        """
+        with self._lock:
+            return {"undo": len(self._undo), "redo": len(self._redo),
+                    "bytes": sum(s.size for s in self._undo) + sum(s.size for s in self._redo)}
+
+    def clear(self) -> None:
+        """
+        Esvazia o histórico.
+        :return: Nada.
+        """
+        with self._lock:
+            self._undo.clear()
+            self._redo.clear()
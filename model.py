@@ -2,57 +2,107 @@
 """ @author: Gabriel Maccari """
 
 import csv
+import functools
+import importlib.util
+import io
+import multiprocessing
+import numpy
+import os
 import pandas
 import geopandas
 import pyproj
 import re
+import shutil
+import threading
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from icecream import ic
 
+from crs_catalog import CRSCatalog, CRSIndex
+from crs_pool import CRS_POOL
+from history import EditHistory
+from sheet_cache import SheetCache
+
 # geopandas.options.io_engine = "pyogrio" #  pyogrio é melhor que fiona, mas não funciona com o pyinstaller
 
-crs_types = {
-    "PJType.GEOGRAPHIC_2D_CRS": "Geographic 2D CRS",
-    "PJType.GEOGRAPHIC_3D_CRS": "Geographic 3D CRS",
-    "PJType.PROJECTED_CRS": "Projected CRS",
-}
+# O leitor calamine (python-calamine, escrito em Rust) é opcional, e muito mais rápido que o openpyxl e o odfpy
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+# Tamanho a partir do qual o calamine é usado automaticamente, quando disponível. Abaixo disso a diferença de tempo é
+# desprezível e os leitores padrão do pandas são mantidos
+CALAMINE_MIN_FILE_SIZE = 1024 ** 2
+EXCEL_ENGINES = ("auto", "openpyxl", "odf", "calamine")
+# O modo Arrow (colunas com tipos do pyarrow) e a gravação via Arrow do pyogrio são opcionais (ver DataHandler)
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+PYOGRIO_AVAILABLE = importlib.util.find_spec("pyogrio") is not None
 
-crs_db = pyproj.database.query_crs_info(pj_types=("GEOGRAPHIC_2D_CRS", "PROJECTED_CRS", "GEOGRAPHIC_3D_CRS"))
-CRS_DICT = {
-    f"{crs_info.name} {'(3D) ' if crs_types[str(crs_info.type)] == 'Geographic 3D CRS' else ''}({crs_info.auth_name}:{crs_info.code})":
-    {
-        "name": crs_info.name,
-        "auth_name": crs_info.auth_name,
-        "code": crs_info.code,
-        "type": crs_types[str(crs_info.type)]
-    }
-    for crs_info in crs_db if not crs_info.auth_name.startswith("IAU")  # Os SRCs da IAU são para outros planetas
-}
-del crs_db
+# Catálogo de SRCs, carregado apenas no primeiro acesso e salvo em disco entre execuções (ver crs_catalog.py)
+CRS_DICT = CRSCatalog()
+# Índice das áreas de uso dos SRCs, usado para sugerir SRCs a partir das coordenadas (ver DataHandler.suggest_crs)
+CRS_INDEX = CRSIndex(CRS_DICT)
 
 DTYPES_DICT = {
     "String": {
-        "pandas_dtypes": ("string", "object", "category"),
+        "pandas_dtypes": ("string", "object", "category", "string[pyarrow]", "large_string[pyarrow]"),
         "icon": "icons/string.png"
     },
     "Integer": {
-        "pandas_dtypes": ('int64', 'uint64', 'int32', 'uint32', 'int16', 'uint16', 'int8', 'uint8'),
+        "pandas_dtypes": ('int64', 'uint64', 'int32', 'uint32', 'int16', 'uint16', 'int8', 'uint8', 'Int64',
+                          'int64[pyarrow]', 'uint64[pyarrow]', 'int32[pyarrow]', 'uint32[pyarrow]', 'int16[pyarrow]',
+                          'uint16[pyarrow]', 'int8[pyarrow]', 'uint8[pyarrow]'),
         "icon": "icons/integer.png"
     },
     "Float": {
-        "pandas_dtypes": ("float64", "float32", "float16"),
+        "pandas_dtypes": ("float64", "float32", "float16", "double[pyarrow]", "float[pyarrow]", "halffloat[pyarrow]"),
         "icon": "icons/float.png"
     },
     "Boolean": {
-        "pandas_dtypes": ("bool"),
+        "pandas_dtypes": ("bool", "boolean", "bool[pyarrow]"),
         "icon": "icons/boolean.png"
     },
     "Datetime": {
-        "pandas_dtypes": ("datetime64[ns]", "<M8[ns]", ">M8[ns]"),
+        "pandas_dtypes": ("datetime64[ns]", "<M8[ns]", ">M8[ns]", "timestamp[ns][pyarrow]", "timestamp[us][pyarrow]",
+                          "timestamp[ms][pyarrow]", "timestamp[s][pyarrow]", "date32[day][pyarrow]"),
         "icon": "icons/datetime.png"
     }
 }
 
+# Número de pontos por bloco na reprojeção em paralelo (ver transform_coordinates)
+REPROJECTION_CHUNK_SIZE = 250_000
+# Número de linhas lidas por vez na leitura e conversão de CSVs em blocos (ver iter_csv_chunks)
+CSV_CHUNK_SIZE = 500_000
+# Número de linhas processadas por vez quando o progresso é acompanhado (leitura de CSVs, reprojeção e exportação)
+PROGRESS_CHUNK_SIZE = 100_000
+# Extensões de tabelas aceitas na mescla de arquivos (ver DataHandler.read_files)
+TABLE_EXTENSIONS = (".xlsx", ".xlsm", ".ods", ".csv")
+# Coluna com o nome do arquivo de origem de cada linha na mescla de arquivos empilhados
+SOURCE_FILE_COLUMN = "arquivo_origem"
+# Tamanho a partir do qual as planilhas de um arquivo são lidas em paralelo, em processos separados. Abaixo disso, o
+# tempo de iniciar os processos supera o ganho (ver DataHandler.parse_sheets)
+PARALLEL_SHEETS_MIN_FILE_SIZE = 5 * 1024 ** 2
+# Colunas de texto com até essa proporção de valores únicos são convertidas para category (ver optimize_dtypes)
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+# Número de linhas lidas para a pré-visualização na tela de importação (ver DataHandler.load_full_table)
+PREVIEW_ROWS = 1000
+
+# Extensões dos arquivos que compõem um shapefile (ver get_output_files)
+SHAPEFILE_EXTENSIONS = (".shp", ".shx", ".dbf", ".prj", ".cpg", ".qix", ".sbn", ".sbx", ".shp.xml")
+
+# Símbolos aceitos para graus, minutos e segundos em coordenadas GMS (GG°MM'SS,ssss"D)
+DMS_DEGREE_SYMBOLS = "°º"
+DMS_MINUTE_SYMBOLS = "'’′"
+DMS_SECOND_SYMBOLS = "\"”″"
+DMS_HEMISPHERES = {
+    "x": {"positive": "ELel", "negative": "WOwo", "max_degrees": 180},
+    "y": {"positive": "Nn", "negative": "Ss", "max_degrees": 90},
+}
+DMS_REGEX = (
+    rf"(\d{{1,3}})[{DMS_DEGREE_SYMBOLS}](\d{{1,2}})[{DMS_MINUTE_SYMBOLS}](\d{{1,2}}(?:[.,]\d+)?)"
+    rf"(?:[{DMS_SECOND_SYMBOLS}]|'')([NSEWOLnsewol])"
+)
+DMS_PATTERN = re.compile(rf"^{DMS_REGEX}$")
+# Versão para textos com um valor por linha. Linhas inválidas casam com ".*" e resultam em grupos vazios
+DMS_LINES_PATTERN = re.compile(rf"^(?:{DMS_REGEX}|.*)$", re.MULTILINE)
+
 DATETIME_FORMATS = {
     "DD/MM/YYYY": "%d/%m/%Y",
     "YYYY/MM/DD": "%Y/%m/%d",
@@ -70,60 +120,280 @@ DATETIME_FORMATS = {
 
 
 class DataHandler:
-    def __init__(self):
+    def __init__(self, arrow: bool = False):
+        """
+        :param arrow: Se True, as tabelas são lidas com colunas baseadas no pyarrow (ArrowDtype), que ocupam bem menos memória que o dtype object do pandas em colunas de texto. Requer o pyarrow.
+        """
+        if arrow and not ARROW_AVAILABLE:
+            raise ImportError("O modo Arrow requer o pyarrow (pip install pyarrow).")
+        self.arrow = arrow
         self.excel_file = None
         self.gdf = None
         self.x_column = None
         self.y_column = None
         self.z_column = None
         self.crs_key = None
+        self.points = None
+        self.column_profiles = {}
+        # Memória ocupada por cada coluna, em bytes, guardada junto com os perfis (ver get_column_memory)
+        self.column_memory = {}
+        # Índice dos valores de cada coluna (códigos, valores únicos e contagens), também guardado junto com os perfis
+        # (ver get_column_values)
+        self.column_values = {}
+        # Origem dos dados do atributo "gdf" e se ele contém apenas as primeiras linhas da tabela (pré-visualização)
+        self.sheet = None
+        self.csv_path = None
+        self.csv_decimal = ','
+        self.preview = False
+        # Colunas a serem lidas das tabelas (None para todas). Ver make_column_filter
+        self.usecols = None
+        self.sheet_cache = SheetCache()
+        # Histórico de desfazer/refazer das edições feitas na tabela (ver history.EditHistory)
+        self.history = EditHistory()
+        self.preload_thread = None
+        self._excel_lock = threading.Lock()
 
-    def read_excel_file(self, path: str) -> None:
+    def read_excel_file(self, path: str, engine: str = "auto") -> None:
         """
         Função que lê uma pasta de trabalho do Excel/OpenDocument e a armazena como um objeto pandas.ExcelFile no
         atributo "excel_file" da classe.
         :param path: Caminho do arquivo a ser lido.
+        :param engine: O leitor a ser usado (ver EXCEL_ENGINES e get_excel_engine). O padrão é "auto".
+        :return: Nada.
+        """
+        with self._excel_lock:
+            self.excel_file = pandas.ExcelFile(path, engine=get_excel_engine(path, engine))
+            self.sheet_cache.clear()
+        self.csv_path = None
+
+    def parse_sheet(self, sheet: str | int, nrows: int | None = None, usecols: list[str] | None = None) -> pandas.DataFrame:
+        """
+        Lê uma planilha contida no arquivo do atributo "excel_file", sem tratamento (exceto pelas colunas sem rótulo,
+        que nunca são lidas). As planilhas lidas são guardadas no cache do atributo "sheet_cache", de modo que trocar de
+        planilha ou mesclar planilhas não precisa ler o arquivo novamente.
+        :param sheet: O nome (str) ou índice (int) da planilha a ser lida.
+        :param nrows: Se informado, lê apenas as primeiras linhas da planilha (que não são guardadas no cache).
+        :param usecols: Se informado, lê apenas as colunas com esses rótulos (que não são guardadas no cache).
+        :return: O DataFrame da planilha (uma cópia, que pode ser alterada livremente).
+        """
+        if isinstance(sheet, int):
+            sheet = self.excel_file.sheet_names[sheet]
+
+        column_filter = make_column_filter(usecols)
+
+        df = self.sheet_cache.get(sheet, nrows)
+        if df is not None:
+            return df if usecols is None else df[[c for c in df.columns if column_filter(c)]]
+
+        # O ExcelFile não pode ser lido por duas threads ao mesmo tempo (ver preload_sheets)
+        with self._excel_lock:
+            if nrows is not None or usecols is not None:
+                return self.excel_file.parse(sheet_name=sheet, nrows=nrows, usecols=column_filter,
+                                             **self.read_options())
+            df = self.sheet_cache.get(sheet)
+            if df is None:
+                df = self.excel_file.parse(sheet_name=sheet, usecols=column_filter, **self.read_options())
+                self.sheet_cache.put(sheet, df)
+        return df
+
+    def preload_sheets(self) -> None:
+        """
+        Lê antecipadamente as planilhas do arquivo do atributo "excel_file" que ainda não estão no cache, enquanto
+        houver espaço nele. A leitura é interrompida caso o arquivo seja trocado ou o cache fique cheio.
+        :return: Nada.
+        """
+        excel_file = self.excel_file
+        for sheet in excel_file.sheet_names:
+            with self._excel_lock:
+                if self.excel_file is not excel_file:
+                    return
+                if sheet in self.sheet_cache:
+                    continue
+                df = excel_file.parse(sheet_name=sheet, usecols=make_column_filter(), **self.read_options())
+                # Não descarta planilhas já usadas para abrir espaço para as lidas antecipadamente
+                if not self.sheet_cache.has_room_for(int(df.memory_usage(index=True, deep=True).sum())):
+                    return
+                self.sheet_cache.put(sheet, df)
+
+    def preload_sheets_in_background(self) -> None:
+        """
+        Chama preload_sheets em uma thread separada.
         :return: Nada.
         """
-        self.excel_file = pandas.ExcelFile(path)
+        self.preload_thread = threading.Thread(target=self.preload_sheets, daemon=True)
+        self.preload_thread.start()
 
-    def read_excel_sheet(self, sheet: str | int) -> None:
+    def read_excel_sheet(self, sheet: str | int, nrows: int | None = None, usecols: list[str] | None = None) -> None:
         """
         Função que lê uma planilha contida no arquivo do atributo "excel_file" e armazena os dados como um
         geopandas.GeoDataFrame no atributo "gdf" da classe. Automaticamente chama a função process_data para tratar os
         dados.
         :param sheet: O nome (str) ou índice (int) da planilha a ser lida.
+        :param nrows: Se informado, lê apenas as primeiras linhas da planilha, como pré-visualização (ver load_full_table).
+        :param usecols: Se informado, lê apenas as colunas com esses rótulos. As demais não chegam a ser convertidas.
         :return: Nada.
         """
-        df = self.process_data(self.excel_file.parse(sheet_name=sheet))
+        df = self.parse_sheet(sheet, nrows, usecols)
+        preview = nrows is not None and len(df.index) >= nrows
+        df = self.process_data(df)
+        # A origem da tabela só é registrada após a leitura, para que um erro não marque a tabela atual como outra
+        self.sheet, self.usecols, self.preview = sheet, usecols, preview
         self.gdf = geopandas.GeoDataFrame(df)
+        self.points = None
+        self.invalidate_column_profiles()
+        self.history.clear()
 
-    def read_csv_file(self, path: str, decimal: str = ',') -> None:
+    def read_csv_file(self, path: str, decimal: str = ',', chunksize: int | None = None,
+                      nrows: int | None = None, usecols: list[str] | None = None, progress=None) -> None:
         """
         Função que lê um arquivo CSV, identifica o delimitador de células e armazena os dados como um
         geopandas.GeoDataFrame no atributo "gdf" da classe. Automaticamente chama a função process_data para tratar os
         dados.
         :param path:  Caminho do arquivo a ser lido.
         :param decimal: O separador decimal usado no arquivo. O padrão é ',' (vírgula).
+        :param chunksize: Se informado, o arquivo é lido e tratado em blocos com esse número de linhas (ver iter_csv_chunks), que são concatenados ao final. A tabela inteira continua sendo carregada, então o pico de memória não diminui: os blocos servem para acompanhar o progresso e interromper a leitura. Para converter um arquivo sem carregá-lo inteiro, use convert_csv_file.
+        :param nrows: Se informado, lê apenas as primeiras linhas do arquivo, como pré-visualização (ver load_full_table).
+        :param usecols: Se informado, lê apenas as colunas com esses rótulos. As demais não chegam a ser convertidas.
+        :param progress: Função chamada com (bytes lidos, tamanho do arquivo) após cada bloco. Se informada, o arquivo é lido em blocos de PROGRESS_CHUNK_SIZE linhas (ver iter_csv_chunks).
         :return: Nada.
         """
-        sniffer = csv.Sniffer()
-        data = open(path, "r").read(4096)
-        sep = str(sniffer.sniff(data).delimiter)
-
-        # Retirar isso caso seja implementada alguma seleção manual de separador decimal
-        if sep == ',':
-            decimal = '.'
+        preview = False
+        if nrows is not None:
+            sep, file_decimal = sniff_csv_format(path, decimal)
+            # O leitor do pyarrow não suporta nrows
+            df = pandas.read_csv(path, delimiter=sep, decimal=file_decimal, nrows=nrows,
+                                 usecols=make_column_filter(usecols), **self.read_options())
+            preview = len(df.index) >= nrows
+            df = self.process_data(df)
+        elif chunksize is None and progress is None:
+            sep, file_decimal = sniff_csv_format(path, decimal)
+            if self.arrow:
+                # O leitor multithread do pyarrow só aceita uma lista de colunas, tirada do cabeçalho do arquivo
+                header = pandas.read_csv(path, delimiter=sep, nrows=0).columns
+                df = pandas.read_csv(path, delimiter=sep, decimal=file_decimal, engine="pyarrow",
+                                     usecols=[c for c in header if make_column_filter(usecols)(c)],
+                                     **self.read_options())
+            else:
+                df = pandas.read_csv(path, delimiter=sep, decimal=file_decimal, usecols=make_column_filter(usecols))
+            df = self.process_data(df)
+        else:
+            chunks = list(iter_csv_chunks(path, decimal, chunksize or PROGRESS_CHUNK_SIZE, self.arrow, usecols, progress))
+            df = self.process_data(pandas.concat(chunks) if chunks else pandas.DataFrame())
 
-        df = self.process_data(pandas.read_csv(path, delimiter=sep, decimal=decimal))
+        # A origem da tabela só é registrada após a leitura, para que uma leitura cancelada ou com erro não marque a
+        # pré-visualização atual como a tabela inteira (ver load_full_table)
+        self.csv_path, self.csv_decimal, self.usecols, self.preview = path, decimal, usecols, preview
         self.gdf = geopandas.GeoDataFrame(df)
+        self.points = None
+        self.invalidate_column_profiles()
+        self.history.clear()
+
+    def load_full_table(self, progress=None) -> None:
+        """
+        Lê a tabela inteira caso o atributo "gdf" contenha apenas a pré-visualização lida com o argumento nrows de
+        read_csv_file ou read_excel_sheet, mantendo a seleção de colunas da pré-visualização (atributo "usecols"). Caso
+        a tabela já esteja completa, não faz nada.
+        :param progress: Função de acompanhamento do progresso da leitura (apenas para arquivos CSV, ver read_csv_file).
+        :return: Nada.
+        """
+        if not self.preview:
+            return
+        if self.csv_path is not None:
+            self.read_csv_file(self.csv_path, self.csv_decimal, usecols=self.usecols, progress=progress)
+        else:
+            self.read_excel_sheet(self.sheet, usecols=self.usecols)
+
+    def read_preview(self, usecols: list[str] | None = None) -> None:
+        """
+        Lê novamente a pré-visualização (primeiras PREVIEW_ROWS linhas) da tabela atual, com uma nova seleção de colunas.
+        :param usecols: Os rótulos das colunas a serem lidas. Se None, lê todas as colunas com rótulo.
+        :return: Nada.
+        """
+        if self.csv_path is not None:
+            self.read_csv_file(self.csv_path, self.csv_decimal, nrows=PREVIEW_ROWS, usecols=usecols)
+        else:
+            self.read_excel_sheet(self.sheet, nrows=PREVIEW_ROWS, usecols=usecols)
+
+    def convert_csv_file(self, path: str, output_path: str, crs_key: str, x_column: str, y_column: str,
+                         z_column: str = None, dms: bool = False, target_crs_key: str | None = None,
+                         layer_name: str = "pontos", decimal: str = ',', chunksize: int = CSV_CHUNK_SIZE,
+                         usecols: list[str] | None = None) -> int:
+        """
+        Converte um arquivo CSV de pontos em um arquivo vetorial ou tabela sem carregá-lo inteiro na memória. Cada bloco
+        de linhas é lido e tratado (ver iter_csv_chunks), tem a geometria definida e opcionalmente reprojetada, e é
+        acrescentado ao arquivo de saída, de modo que o pico de memória depende do tamanho dos blocos e não do arquivo.
+        Ao final, o atributo "gdf" contém apenas o último bloco.
+        :param path: Caminho do arquivo CSV.
+        :param output_path: Caminho do arquivo de saída (gpkg, shp ou csv).
+        :param crs_key: A chave para o dicionário de SRCs (CRS_DICT) do SRC das coordenadas.
+        :param x_column: O rótulo da coluna das coordenadas x.
+        :param y_column: O rótulo da coluna das coordenadas y.
+        :param z_column: O rótulo da coluna das coordenadas z (opcional).
+        :param dms: True se as coordenadas estiverem em graus, minutos e segundos.
+        :param target_crs_key: A chave para o dicionário de SRCs do SRC de destino, caso os pontos devam ser reprojetados.
+        :param layer_name: Nome da camada (para arquivos geopackage).
+        :param decimal: O separador decimal usado no arquivo. O padrão é ',' (vírgula).
+        :param chunksize: O número de linhas de cada bloco.
+        :param usecols: Se informado, lê e grava apenas as colunas com esses rótulos (as colunas de coordenadas devem estar entre elas).
+        :return: O número de pontos convertidos.
+        """
+        if output_path.endswith(".xlsx") or output_path.endswith(".geojson"):
+            raise ValueError("A conversão em blocos só é suportada para arquivos gpkg, shp e csv.")
+
+        coordinates_columns = [c for c in (x_column, y_column, z_column) if c is not None]
+        # Tipos de dado alargados ao longo do arquivo (ver widen_dtypes). O esquema de um arquivo vetorial não muda
+        # depois que o primeiro bloco é gravado, então, se uma coluna precisar de um tipo mais amplo depois disso, a
+        # conversão recomeça do início com o novo tipo. Isso só ocorre uma vez para cada coluna que muda de tipo
+        widened = {}
+        restart = True
+        while restart:
+            restart, dtypes, total = False, None, 0
+
+            for chunk in iter_csv_chunks(path, decimal, chunksize, self.arrow, usecols):
+                # Os tipos de dado das colunas do primeiro bloco definem o esquema do arquivo de saída
+                if dtypes is None:
+                    missing = [c for c in coordinates_columns if c not in chunk.columns]
+                    if missing:
+                        raise ValueError(f"Coluna(s) não encontrada(s) no arquivo: {', '.join(missing)}.")
+                    dtypes = chunk.dtypes.copy()
+                    for c, dtype in widened.items():
+                        dtypes[c] = dtype
+
+                new_dtypes = widen_dtypes(chunk, dtypes, ignore=coordinates_columns)
+                if new_dtypes is not dtypes:
+                    if total > 0 and not output_path.endswith(".csv"):
+                        widened.update({c: new_dtypes[c] for c in new_dtypes.index if new_dtypes[c] != dtypes[c]})
+                        restart = True
+                        break
+                    dtypes = new_dtypes
+                chunk = match_dtypes(chunk, dtypes, ignore=coordinates_columns)
+
+                self.gdf = geopandas.GeoDataFrame(chunk)
+                self.points = None
+                self.invalidate_column_profiles()
+
+                self.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms)
+                if target_crs_key is not None:
+                    self.reproject_geodataframe(target_crs_key)
+
+                self.export_geodataframe(output_path, layer_name, append=total > 0)
+                total += len(chunk.index)
+
+        if total <= 0:
+            raise IndexError('A tabela selecionada está vazia ou contém apenas cabeçalhos.')
+        return total
+
+    def read_options(self) -> dict:
+        """
+        :return: Os argumentos extras passados aos leitores do pandas (read_csv e ExcelFile.parse) no modo atual.
+        """
+        return {"dtype_backend": "pyarrow"} if self.arrow else {}
 
     @staticmethod
-    def process_data(df: pandas.DataFrame) -> pandas.DataFrame:
+    def clean_data(df: pandas.DataFrame) -> pandas.DataFrame:
         """
         Função que recebe um pandas.DataFrame e 1) Converte todos os rótulos de colunas para strings, 2) Descarta
-        colunas sem rótulo/cabeçalho e 3) Descarta linhas completamente vazias. Também levanta um erro caso não haja
-        nenhuma linha preenchida na planilha (com exceção dos cabeçalhos).
+        colunas sem rótulo/cabeçalho e 3) Descarta linhas completamente vazias.
         :param df: O DataFrame a ser tratado.
         :return: O DataFrame após o tratamento.
         """
@@ -133,92 +403,271 @@ class DataHandler:
         df = df.drop([col for col in df.columns if 'Unnamed' in col], axis='columns')
         # Descarta linhas vazias
         df = df.dropna(how='all', axis='index')
+        return df
+
+    @staticmethod
+    def process_data(df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Função que trata um pandas.DataFrame com a função clean_data e levanta um erro caso não haja nenhuma linha
+        preenchida na planilha (com exceção dos cabeçalhos).
+        :param df: O DataFrame a ser tratado.
+        :return: O DataFrame após o tratamento.
+        """
+        df = DataHandler.clean_data(df)
         # Verifica se existem linhas preenchidas no arquivo
         if len(df.index) <= 0:
             raise IndexError('A tabela selecionada está vazia ou contém apenas cabeçalhos.')
         return df
 
-    def filter_coordinates_columns(self, crs_key: str, dms_format: bool = False) -> (list[str], list[str], list[str]):
+    def get_column_profile(self, column: str) -> dict:
+        """
+        Retorna o perfil de uma coluna do GeoDataFrame (ver profile_column). O perfil é calculado apenas na primeira
+        consulta e guardado no atributo "column_profiles" até que a coluna seja alterada, renomeada ou excluída.
+        :param column: O rótulo da coluna.
+        :return: Dicionário com o perfil da coluna.
+        """
+        if column not in self.column_profiles:
+            self.column_profiles[column] = self.profile_column(self.gdf[column])
+        return self.column_profiles[column]
+
+    def invalidate_column_profiles(self, *columns: str) -> None:
+        """
+        Descarta os perfis de colunas guardados em cache. Deve ser chamada sempre que uma coluna for alterada,
+        renomeada ou excluída, ou quando o GeoDataFrame inteiro for substituído.
+        :param columns: Os rótulos das colunas a descartar. Se nenhum for informado, descarta todos os perfis.
+        :return: Nada.
+        """
+        if not columns:
+            self.column_profiles.clear()
+            self.column_memory.clear()
+            self.column_values.clear()
+        for c in columns:
+            self.column_profiles.pop(c, None)
+            self.column_memory.pop(c, None)
+            self.column_values.pop(c, None)
+
+    def get_column_memory(self, column: str) -> int:
+        """
+        Retorna a memória ocupada por uma coluna do GeoDataFrame, incluindo o conteúdo das strings. O valor é calculado
+        apenas na primeira consulta e descartado junto com o perfil da coluna (ver invalidate_column_profiles).
+        :param column: O rótulo da coluna.
+        :return: A memória ocupada, em bytes.
+        """
+        if column not in self.column_memory:
+            self.column_memory[column] = int(self.gdf[column].memory_usage(index=False, deep=True))
+        return self.column_memory[column]
+
+    def get_column_values(self, column: str) -> dict:
+        """
+        Retorna o índice dos valores de uma coluna (ver count_column_values), usado nas listas de valores únicos e na
+        conversão para booleano. O índice é calculado apenas na primeira consulta e descartado junto com o perfil da
+        coluna (ver invalidate_column_profiles).
+        :param column: O rótulo da coluna.
+        :return: Dicionário com as chaves "codes", "uniques", "counts" e "nan_count".
+        """
+        if column not in self.column_values:
+            self.column_values[column] = count_column_values(self.gdf[column])
+        return self.column_values[column]
+
+    def get_memory_usage(self) -> int:
+        """
+        Retorna a memória ocupada pelo GeoDataFrame (colunas, índice e coordenadas dos pontos), usando os valores em
+        cache de get_column_memory.
+        :return: A memória ocupada, em bytes.
+        """
+        memory = int(self.gdf.index.memory_usage(deep=True))
+        memory += sum(self.get_column_memory(c) for c in self.gdf.columns)
+        if self.points is not None:
+            memory += self.points.memory_usage()
+        return memory
+
+    @staticmethod
+    def profile_column(column: pandas.Series) -> dict:
+        """
+        Calcula o perfil de uma coluna: se pode ser convertida para float (aceitando vírgula como separador decimal),
+        seus valores mínimo e máximo, o número de células vazias e se contém coordenadas em formato GMS.
+        :param column: A coluna a ser analisada.
+        :return: Dicionário com as chaves "numeric", "min", "max", "nan_count", "dms_x" e "dms_y".
+        """
+        profile = {"numeric": False, "min": None, "max": None, "nan_count": int(column.isna().sum()),
+                   "dms_x": False, "dms_y": False}
+
+        if str(column.dtype) == "geometry":
+            return profile
+
+        try:
+            values = column.replace(",", ".", regex=True).astype(float)
+            profile["numeric"] = True
+            profile["min"], profile["max"] = values.min(), values.max()
+        except (ValueError, TypeError):
+            profile["dms_x"], profile["dms_y"] = DataHandler.detect_dms_column(column)
+
+        return profile
+
+    def get_numeric_column(self, column: str) -> pandas.Series:
+        """
+        Retorna os valores de uma coluna convertidos para float, aceitando vírgula como separador decimal.
+        :param column: O rótulo da coluna.
+        :return: A coluna convertida (pandas.Series).
+        """
+        if pandas.api.types.is_float_dtype(self.gdf[column]):
+            return self.gdf[column]
+        return self.gdf[column].replace(",", ".", regex=True).astype(float)
+
+    def filter_coordinates_columns(self, crs_key: str, dms_format: bool = False,
+                                   columns: list[str] | None = None) -> (list[str], list[str], list[str]):
         """
         Encontra as colunas válidas para coordenadas no GeoDataFrame e retorna uma lista de colunas válidas para x
         (longitude/easting), y (latitude/northing) e z (altitude). São consideradas colunas válidas aquelas que podem
-        ser convertidas para float e cujos valores estão dentro dos limites esperados para as coordenadas do SRC.
+        ser convertidas para float e cujos valores estão dentro dos limites esperados para as coordenadas do SRC. Usa
+        os perfis de colunas em cache (ver get_column_profile), então só compara os limites de cada coluna com a área
+        de uso do SRC.
         :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
         :param dms_format: Booleano indicando se as coordenadas estão em formato GMS (GG°MM'SS.ssss"H) ou não.
+        :param columns: Os rótulos das colunas a verificar. Se None, verifica todas as colunas do GeoDataFrame.
         :return: Listas contendo os rótulos das colunas válidas para x, y e z, respectivamente.
         """
         x_columns, y_columns = [], []
 
-        z_columns = self.gdf.select_dtypes(include='number').columns.tolist()
+        profiles = {col: self.get_column_profile(col) for col in (self.gdf.columns if columns is None else columns)}
+
+        z_columns = [col for col, profile in profiles.items() if profile["numeric"]]
 
         if dms_format:
-            x_columns, y_columns = self.filter_dms_coordinates_columns()
+            x_columns, y_columns = self.filter_dms_coordinates_columns(columns)
             return x_columns, y_columns, z_columns
 
-        crs = pyproj.CRS.from_authority(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
+        x_min, y_min, x_max, y_max = get_crs_bounds(crs_key)
 
-        if CRS_DICT[crs_key]["type"] in ["Geographic 2D CRS", "Geographic 3D CRS"]:
-            x_min, y_min, x_max, y_max = crs.area_of_use.bounds
-        else:
-            transformer = pyproj.Transformer.from_crs(crs.geodetic_crs, crs, always_xy=True)
-            x_min, y_min, x_max, y_max = transformer.transform_bounds(*crs.area_of_use.bounds)
-
-        for col in self.gdf.columns:
-            try:
-                self.gdf[col] = self.gdf[col].replace(",", ".", regex=True).astype(float)
-                if self.gdf[col].dropna().between(y_min, y_max).all():
-                    y_columns.append(col)
-                if self.gdf[col].dropna().between(x_min, x_max).all():
-                    x_columns.append(col)
-            except (ValueError, TypeError):
+        for col, profile in profiles.items():
+            if not profile["numeric"]:
                 continue
+            # Colunas completamente vazias não têm mínimo/máximo e são aceitas, como em Series.between().all()
+            if profile["min"] is None or pandas.isna(profile["min"]):
+                x_columns.append(col)
+                y_columns.append(col)
+                continue
+            if y_min <= profile["min"] and profile["max"] <= y_max:
+                y_columns.append(col)
+            if x_min <= profile["min"] and profile["max"] <= x_max:
+                x_columns.append(col)
 
         return x_columns, y_columns, z_columns
 
-    def filter_dms_coordinates_columns(self):
+    def filter_dms_coordinates_columns(self, columns: list[str] | None = None) -> (list[str], list[str]):
         """
         Encontra as colunas válidas para coordenadas em formato GMS (GG°MM'SS,sss"D) no GeoDataFrame e retorna uma lista
-        de colunas válidas para x (longitude) e y (latitude).
+        de colunas válidas para x (longitude) e y (latitude). Usa os perfis de colunas em cache (ver
+        get_column_profile), calculados com a função detect_dms_column.
+        :param columns: Os rótulos das colunas a verificar. Se None, verifica todas as colunas do GeoDataFrame.
         :return: Listas contendo os rótulos das colunas válidas para x e y, respectivamente.
         """
-        y_pattern = re.compile(r"^(\d{1,2})([°º])(\d{1,2})(['’′])(\d{1,2}([.,]\d+)?)([\"”″])([NSns])$")
-        x_pattern = re.compile(r"^(\d{1,3})([°º])(\d{1,2})(['’′])(\d{1,2}([.,]\d+)?)([\"”″])([EWOLewol])$")
         x_columns, y_columns = [], []
 
-        for c in self.gdf.columns:
-            rows = self.gdf[c].values
-            x_ok, y_ok = True, True
+        for c in (self.gdf.columns if columns is None else columns):
+            profile = self.get_column_profile(c)
+            if profile["dms_x"]:
+                x_columns.append(c)
+            if profile["dms_y"]:
+                y_columns.append(c)
+
+        return x_columns, y_columns
 
-            for value in rows:
-                value = str(value).replace(" ", "")
-                if x_pattern.match(value) is None:
-                    x_ok = False
-                if y_pattern.match(value) is None:
-                    y_ok = False
+    def validate_coordinates_columns(self, crs_key: str, x_column: str, y_column: str, z_column: str = None,
+                                     dms: bool = False) -> None:
+        """
+        Verifica se as colunas selecionadas para as coordenadas são válidas para o SRC (ver filter_coordinates_columns).
+        Usada para validar a tabela inteira depois da validação feita apenas na pré-visualização.
+        :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
+        :param x_column: O rótulo da coluna das coordenadas x.
+        :param y_column: O rótulo da coluna das coordenadas y.
+        :param z_column: O rótulo da coluna das coordenadas z (opcional).
+        :param dms: True se as coordenadas estiverem em graus, minutos e segundos.
+        :return: Nada.
+        """
+        columns = [c for c in (x_column, y_column, z_column) if c is not None]
+        valid_x, valid_y, valid_z = self.filter_coordinates_columns(crs_key, dms, columns)
 
-                if not x_ok and not y_ok:
-                    continue
+        invalid_columns = [
+            column for column, valid_columns in ((x_column, valid_x), (y_column, valid_y), (z_column, valid_z))
+            if column is not None and column not in valid_columns
+        ]
+        if invalid_columns:
+            raise ValueError(f"Coluna(s) com valores inválidos para coordenadas no SRC selecionado (considerando todas "
+                             f"as linhas da tabela, e não apenas as {PREVIEW_ROWS} primeiras): "
+                             f"{', '.join(invalid_columns)}.")
 
-                parts = re.split(r'[^\d\w]+', value)
-                degrees = int(parts[0])
-                minutes = int(parts[1])
-                seconds = float(f"{parts[2]}.{parts[3]}" if parts[3].isdigit() else parts[2])
+    @staticmethod
+    def detect_dms_column(column: pandas.Series, sample_size: int = 100) -> (bool, bool):
+        """
+        Verifica se uma coluna contém apenas coordenadas em formato GMS válidas para x (longitude) e/ou y (latitude).
+        Colunas numéricas, de data, etc. são descartadas pelo dtype. As demais são testadas em uma amostra estratificada
+        (linhas igualmente espaçadas ao longo da coluna), parando no primeiro valor inválido. Apenas colunas que passam
+        na amostra são verificadas por completo, com a função vetorizada parse_dms_coordinates.
+        :param column: A coluna a ser verificada.
+        :param sample_size: Número de linhas da amostra.
+        :return: Dois booleanos indicando se a coluna é válida para x e para y, respectivamente.
+        """
+        if not (column.dtype == object or isinstance(column.dtype, (pandas.StringDtype, pandas.CategoricalDtype))):
+            return False, False
 
-                if degrees > 180:
-                    x_ok = False
-                    y_ok = False
-                elif degrees > 90:
-                    y_ok = False
+        n_rows = len(column.index)
+        if n_rows == 0:
+            return False, False
 
-                if minutes > 60 or seconds > 60:
-                    x_ok, y_ok = False, False
+        # Amostra estratificada: linhas igualmente espaçadas do início ao fim da coluna
+        positions = numpy.unique(numpy.linspace(0, n_rows - 1, min(n_rows, sample_size)).astype(int))
 
-            if x_ok:
-                x_columns.append(c)
-            if y_ok:
-                y_columns.append(c)
+        x_ok, y_ok = True, True
+        for value in column.iloc[positions]:
+            match = DMS_PATTERN.match(re.sub(r"\s+", "", str(value)))
+            if match is None:
+                return False, False
 
-        return x_columns, y_columns
+            degrees, minutes, seconds = int(match[1]), int(match[2]), float(match[3].replace(",", "."))
+            hemisphere = match[4]
+
+            if minutes > 60 or seconds > 60:
+                return False, False
+
+            x_hemispheres, y_hemispheres = DMS_HEMISPHERES["x"], DMS_HEMISPHERES["y"]
+            x_ok = x_ok and degrees <= x_hemispheres["max_degrees"] and hemisphere in x_hemispheres["positive"] + x_hemispheres["negative"]
+            y_ok = y_ok and degrees <= y_hemispheres["max_degrees"] and hemisphere in y_hemispheres["positive"] + y_hemispheres["negative"]
+
+            if not x_ok and not y_ok:
+                return False, False
+
+        # Verificação completa apenas dos eixos que passaram na amostra
+        if x_ok:
+            x_ok = not parse_dms_coordinates(column, "x")[1].any()
+        if y_ok:
+            y_ok = not parse_dms_coordinates(column, "y")[1].any()
+
+        return x_ok, y_ok
+
+    def suggest_crs(self, x_column: str, y_column: str, dms: bool = False, limit: int = 10) -> list[str]:
+        """
+        Sugere SRCs compatíveis com as coordenadas de duas colunas, com base nos limites (mínimo e máximo) de cada
+        coluna e no índice de áreas de uso dos SRCs (CRS_INDEX).
+        :param x_column: O rótulo da coluna que contém as coordenadas do eixo X.
+        :param y_column: O rótulo da coluna que contém as coordenadas do eixo Y.
+        :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
+        :param limit: Número máximo de sugestões.
+        :return: Lista de chaves do dicionário de SRCs (CRS_DICT), da mais para a menos provável.
+        """
+        if dms:
+            x, y = self.convert_dms_to_decimal(x_column, y_column)
+            x_min, x_max, y_min, y_max = numpy.nanmin(x), numpy.nanmax(x), numpy.nanmin(y), numpy.nanmax(y)
+        else:
+            x_profile, y_profile = self.get_column_profile(x_column), self.get_column_profile(y_column)
+            if not (x_profile["numeric"] and y_profile["numeric"]):
+                raise ValueError("As colunas selecionadas não contêm coordenadas numéricas.")
+            x_min, x_max, y_min, y_max = x_profile["min"], x_profile["max"], y_profile["min"], y_profile["max"]
+
+        if any(pandas.isna(v) for v in (x_min, x_max, y_min, y_max)):
+            raise ValueError("As colunas selecionadas estão vazias.")
+
+        return CRS_INDEX.suggest(x_min, y_min, x_max, y_max, limit=limit)
 
     @staticmethod
     def search_coordinates_column_by_name(axis: str, crs_type: str, column_names: list[str]) -> str | None:
@@ -245,111 +694,283 @@ class DataHandler:
 
     def set_geodataframe_geometry(self, crs_key: str, x_column: str, y_column: str, z_column: str = None, dms: bool = False) -> None:
         """
-        Define a geometria e o crs do GeoDataFrame contido no adributo "gdf" da classe. Também define os atributos
-        "crs_key", "x_column", "y_column" e "z_column" da classe com base nos parâmetros dados.
+        Define a geometria e o crs do GeoDataFrame contido no adributo "gdf" da classe. A geometria não é construída
+        de imediato: as coordenadas são guardadas como arrays no atributo "points" (ver LazyPoints), e os pontos só são
+        criados quando necessário (ver get_geodataframe). Também define os atributos "crs_key", "x_column", "y_column"
+        e "z_column" da classe com base nos parâmetros dados.
         :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
         :param x_column: O rótulo da coluna que contém as coordenadas do eixo X.
         :param y_column: O rótulo da coluna que contém as coordenadas do eixo Y.
         :param z_column: O rótulo da coluna que contém as coordenadas do eixo Z.
         :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
         """
-        crs = pyproj.CRS.from_authority(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
+        crs = get_crs(crs_key)
 
         if dms:
             x, y = self.convert_dms_to_decimal(x_column, y_column)
         else:
-            x, y = self.gdf[x_column], self.gdf[y_column]
+            self.gdf[x_column] = x = self.get_numeric_column(x_column)
+            self.gdf[y_column] = y = self.get_numeric_column(y_column)
+            self.invalidate_column_profiles(x_column, y_column)
 
-        z = self.gdf[z_column] if z_column is not None else None
+        z = None
+        if z_column is not None:
+            self.gdf[z_column] = z = self.get_numeric_column(z_column)
+            self.invalidate_column_profiles(z_column)
 
-        geometry = geopandas.points_from_xy(x, y, z, crs=crs)
-
-        self.gdf = geopandas.GeoDataFrame(self.gdf, geometry=geometry, crs=crs)
+        self.points = LazyPoints(x, y, z, crs)
 
         self.x_column, self.y_column, self.z_column = x_column, y_column, z_column
         self.crs_key = crs_key
 
-    def convert_dms_to_decimal(self, x_column: str, y_column: str):
+    def convert_dms_to_decimal(self, x_column: str, y_column: str) -> (numpy.ndarray, numpy.ndarray):
         """
         Converte coordenadas em formato GMS contidas em duas colunas distintas do GeoDataFrame para formato decimal.
+        A conversão é feita coluna a coluna pela função parse_dms_coordinates, e todas as linhas inválidas são
+        reportadas em um único erro.
         :param x_column: A coluna contendo as longitudes em GMS.
         :param y_column: A coluna contendo as latitudes em GMS.
-        :return: Duas listas contendo longitudes e latitudes, respectivamente, em formato decimal.
-        """
-        x, y = [], []
-        for i, c in enumerate((x_column, y_column)):
-            rows = self.gdf[c].values
-            for value in rows:
-                value = str(value).strip()
-                parts = re.split(r"°|º|'|’|′|\"|”|″|''", value)
-                d, m, s = int(parts[0]), int(parts[1]), float(parts[2].replace(",", "."))
-                direction = parts[3]
-
-                dd = d + (m / 60) + (s / 3600)
-
-                if direction in "SWOswo":
-                    dd *= -1
-
-                if i == 0:
-                    x.append(dd)
-                else:
-                    y.append(dd)
+        :return: Dois arrays contendo longitudes e latitudes, respectivamente, em formato decimal.
+        """
+        x, x_errors = parse_dms_coordinates(self.gdf[x_column], "x")
+        y, y_errors = parse_dms_coordinates(self.gdf[y_column], "y")
+
+        errors = x_errors | y_errors
+        if errors.any():
+            invalid_rows = self.gdf.index[errors].tolist()
+            sample = ", ".join(str(r) for r in invalid_rows[:10]) + (", ..." if len(invalid_rows) > 10 else "")
+            raise ValueError(f"{len(invalid_rows)} linha(s) com coordenadas GMS inválidas (linhas {sample}).")
+
         return x, y
 
-    def merge_sheets(self, merge_column: str) -> (list[str], list[str]):
+    def parse_sheets(self, sheets: list[str], workers: int | None = None, progress=None) -> dict[str, pandas.DataFrame]:
+        """
+        Lê várias planilhas do arquivo do atributo "excel_file" (ver parse_sheet). As planilhas que ainda não estão no
+        cache são lidas em paralelo, em processos separados (os leitores de Excel/ODS são escritos em Python e não
+        rodam em paralelo em threads), e guardadas no cache.
+        :param sheets: Os nomes das planilhas.
+        :param workers: Número máximo de processos. Se None, usa o número de CPUs, e apenas para arquivos a partir de PARALLEL_SHEETS_MIN_FILE_SIZE. Com 1, as planilhas são lidas em sequência.
+        :param progress: Função chamada com (planilhas lidas, planilhas a serem lidas) após a leitura de cada planilha que não estava no cache.
+        :return: Dicionário {nome da planilha: DataFrame}.
+        """
+        dfs = {s: self.sheet_cache.get(s) for s in sheets}
+        missing = [s for s, df in dfs.items() if df is None]
+
+        path, engine = self.excel_file.io, self.excel_file.engine
+        if workers is None:
+            is_large = isinstance(path, str) and os.path.getsize(path) >= PARALLEL_SHEETS_MIN_FILE_SIZE
+            workers = (os.cpu_count() or 1) if is_large else 1
+        workers = min(workers, len(missing))
+
+        if workers > 1:
+            # "spawn" em todos os sistemas: criar processos com fork a partir de um programa com threads (Qt, leitura
+            # antecipada de planilhas) não é seguro
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = {s: executor.submit(read_sheet, path, s, engine, self.arrow) for s in missing}
+                try:
+                    for i, (s, future) in enumerate(futures.items(), 1):
+                        dfs[s] = future.result()
+                        self.sheet_cache.put(s, dfs[s])
+                        if progress is not None:
+                            progress(i, len(missing))
+                except BaseException:
+                    # Em caso de erro ou cancelamento, as planilhas que ainda não começaram a ser lidas são descartadas
+                    executor.shutdown(cancel_futures=True)
+                    raise
+        else:
+            for i, s in enumerate(missing, 1):
+                dfs[s] = self.parse_sheet(s)
+                if progress is not None:
+                    progress(i, len(missing))
+
+        return dfs
+
+    def merge_sheets(self, merge_column: str, workers: int | None = None, progress=None) -> (list[str], list[str]):
         """
         Mescla múltiplas abas de uma pasta de trabalho do Excel/OpenDocument armazenado no atributo "excel_file" da
-        classe, com base em uma coluna de ID. Armazena os novos dados no atributo "gdf", usando os atributos
-        "x_column", "y_column" e "crs" para construir a geometria e definir o SRC. Planilhas que não contenham a coluna
-        merge_column são ignoradas.
+        classe, com base em uma coluna de ID (ver join_tables). Armazena os novos dados no atributo "gdf" e
+        reordena as coordenadas do atributo "points" de acordo com as linhas mescladas. Planilhas que não contenham a
+        coluna merge_column são ignoradas.
         :param merge_column: A coluna identificadora.
+        :param workers: Número máximo de processos usados para ler as demais planilhas (ver parse_sheets).
+        :param progress: Função de acompanhamento da leitura das demais planilhas (ver parse_sheets). Os dados só são alterados depois da leitura.
         :return: Listas contendo os rótulos das colunas que foram e não foram incluídas na mesclagem, respectivamente.
         """
         sheets_to_merge, sheets_to_skip = [], []
-        sheet_dfs, merge_column_dtypes = [], []
+        sheet_dfs = {}
 
-        no_coordinates_mode = True
+        # Coluna temporária com a posição original de cada linha da planilha atual, usada para reordenar os pontos
+        row_column = "__table2spatial_row__"
 
-        # Itera pelo ExcelFile, convertendo as planilhas para DFs, e verifica se cada uma contém a coluna de mescla
-        for s in self.excel_file.sheet_names:
-            if s == self.excel_file.sheet_names[0]:
-                sheet_df = pandas.DataFrame(self.gdf)
-                if "geometry" in sheet_df.columns:
-                    sheet_df = sheet_df.drop(columns=["geometry"])
-                    no_coordinates_mode = False
-            else:
-                sheet_df = self.excel_file.parse(sheet_name=s)
+        # A planilha atual (já carregada no atributo "gdf") é a primeira, seguida das demais na ordem do arquivo
+        current_sheet = self.excel_file.sheet_names[self.sheet] if isinstance(self.sheet, int) else self.sheet
+        current_df = pandas.DataFrame(self.gdf)
+        if self.points is not None:
+            current_df[row_column] = numpy.arange(len(current_df.index))
+
+        other_sheets = [s for s in self.excel_file.sheet_names if s != current_sheet]
+        parsed_sheets = self.parse_sheets(other_sheets, workers, progress)
+
+        # Verifica se cada planilha contém a coluna de mescla
+        for s in [current_sheet] + other_sheets:
+            sheet_df = current_df if s == current_sheet else parsed_sheets[s]
 
             if merge_column in sheet_df.columns:
                 if sheet_df[merge_column].duplicated().any():
                     raise Exception(f"A coluna {merge_column} possui valores duplicados na planilha {s}.")
                 sheets_to_merge.append(s)
-                sheet_dfs.append(self.process_data(sheet_df))
-                merge_column_dtypes.append(sheet_df[merge_column].dtype)
+                sheet_dfs[s] = self.process_data(sheet_df)
             else:
                 sheets_to_skip.append(s)
 
-        # Verifica se a coluna de mescla tem o mesmo dtype em todas as abas. Se não tiver, converte todas para string
-        if len(set(merge_column_dtypes)) > 1:
-            for s in sheet_dfs:
-                s[merge_column] = s[merge_column].astype(str)
-
-        # Mescla as abas com base na coluna de mescla selecionada pelo usuário
-        df = sheet_dfs[0]
-        for i in range(1, len(sheet_dfs)):
-            df = pandas.merge(df, sheet_dfs[i], how='outer', on=merge_column)
+        df = join_tables(sheet_dfs, merge_column)
 
-        # Restaura a ordem correta das colunas
-        cols = df.columns.to_list()
-        cols.remove(merge_column)
-        columns = [merge_column] + cols
-        df = df[columns]
+        if self.points is not None:
+            self.points = self.points.take(df[row_column].fillna(-1).astype(int).to_numpy())
+            df = df.drop(columns=[row_column])
 
-        self.gdf = geopandas.GeoDataFrame(df, geometry=None if no_coordinates_mode else self.gdf.geometry,
-                                          crs=None if no_coordinates_mode else self.gdf.crs)
+        self.gdf = geopandas.GeoDataFrame(df)
+        self.invalidate_column_profiles()
 
         return sheets_to_merge, sheets_to_skip
 
+    def read_files(self, paths: list[str], sheet: str | int = 0, workers: int | None = None,
+                   progress=None) -> (dict[str, pandas.DataFrame], list[dict]):
+        """
+        Lê várias tabelas (xlsx, xlsm, ods ou csv) em paralelo, em processos separados (ver read_table). Arquivos que não
+        puderem ser lidos são ignorados e registrados no relatório.
+        :param paths: Os caminhos dos arquivos, ou o caminho de uma pasta (são lidos todos os arquivos suportados nela).
+        :param sheet: O nome ou índice da planilha a ser lida dos arquivos do Excel/OpenDocument.
+        :param workers: Número máximo de processos. Se None, usa o número de CPUs, e apenas se os arquivos somarem a partir de PARALLEL_SHEETS_MIN_FILE_SIZE. Com 1, os arquivos são lidos em sequência.
+        :param progress: Função chamada com (arquivos lidos, total de arquivos) após a leitura de cada arquivo.
+        :return: Dicionário {nome do arquivo: DataFrame} e o relatório, com um dicionário por arquivo (ver combine_tables).
+        """
+        if isinstance(paths, str):
+            paths = sorted(os.path.join(paths, f) for f in os.listdir(paths)
+                           if os.path.splitext(f)[1].lower() in TABLE_EXTENSIONS)
+        if not paths:
+            raise ValueError("Nenhuma tabela encontrada para mesclar.")
+
+        # Nomes únicos para cada arquivo (usados como sufixo de colunas repetidas e na coluna de origem)
+        names = []
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            names.append(name if name not in names else f"{name}_{len(names)}")
+
+        tables, report = {}, []
+        if workers is None:
+            is_large = sum(os.path.getsize(path) for path in paths) >= PARALLEL_SHEETS_MIN_FILE_SIZE
+            workers = (os.cpu_count() or 1) if is_large else 1
+        workers = min(workers, len(paths))
+
+        if workers > 1:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(read_table, path, sheet, self.arrow) for path in paths]
+                results = []
+                try:
+                    for future in futures:
+                        try:
+                            results.append(future.result())
+                        except Exception as error:
+                            results.append(error)
+                        if progress is not None:
+                            progress(len(results), len(paths))
+                except BaseException:
+                    # Em caso de cancelamento, os arquivos que ainda não começaram a ser lidos são descartados
+                    executor.shutdown(cancel_futures=True)
+                    raise
+        else:
+            results = []
+            for path in paths:
+                try:
+                    results.append(read_table(path, sheet, self.arrow))
+                except Exception as error:
+                    results.append(error)
+                if progress is not None:
+                    progress(len(results), len(paths))
+
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                report.append({"file": name, "rows": 0, "skipped_rows": 0, "conflicting_rows": 0, "error": str(result)})
+                continue
+            df, skipped_rows = result
+            tables[name] = df
+            report.append({"file": name, "rows": len(df.index), "skipped_rows": skipped_rows, "conflicting_rows": 0,
+                           "error": None})
+
+        return tables, report
+
+    def combine_tables(self, tables: dict[str, pandas.DataFrame], report: list[dict], mode: str = "stack",
+                       merge_column: str | None = None) -> list[dict]:
+        """
+        Combina várias tabelas (ver read_files) em uma só, armazenada no atributo "gdf" da classe. No modo "stack", as
+        linhas das tabelas são empilhadas, alinhando as colunas pelo rótulo, e a coluna SOURCE_FILE_COLUMN indica o
+        arquivo de origem de cada linha. No modo "join", as tabelas são unidas pela coluna merge_column (ver
+        join_tables). Linhas com um ID já encontrado (em um arquivo anterior no modo "stack", ou no mesmo arquivo no
+        modo "join") são descartadas e contadas como conflitos no relatório. Arquivos sem a coluna de ID são ignorados.
+        :param tables: Dicionário {nome do arquivo: DataFrame}.
+        :param report: O relatório gerado por read_files, atualizado com os conflitos e arquivos ignorados.
+        :param mode: "stack" (empilhar) ou "join" (mesclar pela coluna de ID).
+        :param merge_column: A coluna de ID. Obrigatória no modo "join" e opcional no modo "stack".
+        :return: O relatório, com um dicionário por arquivo com as chaves "file", "rows", "skipped_rows", "conflicting_rows" e "error".
+        """
+        if mode not in ("stack", "join"):
+            raise ValueError(f"Modo de mescla inválido: {mode}. Opções: stack, join.")
+        if mode == "join" and merge_column is None:
+            raise ValueError("Informe a coluna identificadora para mesclar os arquivos.")
+
+        entries = {entry["file"]: entry for entry in report}
+        combined, seen_ids = {}, None
+
+        for name, df in tables.items():
+            entry = entries[name]
+            if merge_column is not None:
+                if merge_column not in df.columns:
+                    entry["error"] = f"O arquivo não possui a coluna {merge_column}."
+                    continue
+                ids = df[merge_column]
+                conflicts = ids.duplicated()
+                if mode == "stack":
+                    seen_ids = ids.iloc[:0] if seen_ids is None else seen_ids
+                    conflicts |= ids.isin(seen_ids)
+                    seen_ids = pandas.concat([seen_ids, ids[~conflicts]])
+                entry["conflicting_rows"] = int(conflicts.sum())
+                df = df[~conflicts.to_numpy()]
+            combined[name] = df
+
+        if not combined:
+            raise ValueError("Nenhum dos arquivos pôde ser mesclado.")
+
+        if mode == "stack":
+            df = pandas.concat([df.assign(**{SOURCE_FILE_COLUMN: name}) for name, df in combined.items()],
+                               ignore_index=True)
+        else:
+            df = join_tables(combined, merge_column)
+
+        self.gdf = geopandas.GeoDataFrame(df)
+        self.points = None
+        self.excel_file, self.csv_path, self.sheet, self.preview, self.usecols = None, None, None, False, None
+        self.invalidate_column_profiles()
+        self.history.clear()
+
+        return report
+
+    def merge_files(self, paths: list[str] | str, mode: str = "stack", merge_column: str | None = None,
+                    sheet: str | int = 0, workers: int | None = None) -> list[dict]:
+        """
+        Lê várias tabelas em paralelo e as combina em uma só (ver read_files e combine_tables).
+        :param paths: Os caminhos dos arquivos, ou o caminho de uma pasta.
+        :param mode: "stack" (empilhar) ou "join" (mesclar pela coluna de ID).
+        :param merge_column: A coluna de ID. Obrigatória no modo "join" e opcional no modo "stack".
+        :param sheet: O nome ou índice da planilha a ser lida dos arquivos do Excel/OpenDocument.
+        :param workers: Número máximo de processos.
+        :return: O relatório por arquivo (ver combine_tables).
+        """
+        tables, report = self.read_files(paths, sheet, workers)
+        return self.combine_tables(tables, report, mode, merge_column)
+
     def change_column_dtype(self, column: str, target_dtype_key: str, **kwargs) -> None:
         """
         Muda o tipo de dado de uma coluna.
@@ -363,14 +984,20 @@ class DataHandler:
         def switch_to_boolean(c, t, f):
             t = pandas.NA if t == "<Células vazias>" else t
             f = pandas.NA if f == "<Células vazias>" else f
-            if not self.gdf[c].astype("string").isin((t, f)).all():
+            # Compara apenas os valores únicos da coluna e converte os códigos de cada linha com uma tabela de consulta.
+            # Com "<Nenhum>" em um dos lados, todos os valores são do outro lado
+            values = self.get_column_values(c)
+            keys = {k for k in (t, f) if k is not pandas.NA}
+            if (not all(u in keys for u in values["uniques"])
+                    or (values["nan_count"] > 0 and t is not pandas.NA and f is not pandas.NA)):
                 raise ValueError(f"A coluna deve conter apenas os valores indicados para verdadeiro e falso ({t} e {f}).")
-            if str(t) == "<Nenhum>":
-                self.gdf[c] = self.gdf[c].astype("string").map({t: False, f: False}).astype(bool)
-            elif str(f) == "<Nenhum>":
-                self.gdf[c] = self.gdf[c].astype("string").map({t: True, f: True}).astype(bool)
+            # A última posição da tabela corresponde às células vazias (código -1)
+            lookup = numpy.zeros(len(values["uniques"]) + 1, dtype=bool)
+            if t is pandas.NA:
+                lookup[-1] = True
             else:
-                self.gdf[c] = self.gdf[c].astype("string").map({t: True, f: False}).astype(bool)
+                lookup[:-1] = values["uniques"] == t
+            self.gdf[c] = pandas.Series(lookup[values["codes"]], index=self.gdf.index)
 
         if target_dtype_key == "Boolean":
             true, false = kwargs.get("true_key", "Sim"), kwargs.get("false_key", "Não")
@@ -382,42 +1009,850 @@ class DataHandler:
             target_dtype = DTYPES_DICT[target_dtype_key]["pandas_dtypes"][0]
             self.gdf[column] = self.gdf[column].astype(target_dtype, errors="raise")
 
+        self.invalidate_column_profiles(column)
+
+    def optimize_dtypes(self) -> (int, int):
+        """
+        Reduz a memória ocupada pelo GeoDataFrame convertendo as colunas para tipos de dado mais compactos, sem perda de
+        informação (ver optimize_column_dtype).
+        :return: A memória ocupada pelo GeoDataFrame antes e depois da otimização, em bytes.
+        """
+        memory_before = int(self.gdf.memory_usage(index=True, deep=True).sum())
+
+        for column in self.gdf.columns:
+            optimized = optimize_column_dtype(self.gdf[column])
+            if optimized is not self.gdf[column]:
+                self.gdf[column] = optimized
+                self.invalidate_column_profiles(column)
+
+        memory_after = int(self.gdf.memory_usage(index=True, deep=True).sum())
+        return memory_before, memory_after
+
+    def rename_column(self, column: str, new_name: str) -> None:
+        """
+        Renomeia uma coluna do GeoDataFrame.
+        :param column: O nome atual da coluna.
+        :param new_name: O novo nome da coluna.
+        :return: Nada.
+        """
+        if new_name in self.gdf.columns:
+            raise ValueError("O nome inserido já está sendo utilizado por outra coluna do GeoDataFrame.")
+        self.gdf.rename(columns={column: new_name}, inplace=True)
+        self.invalidate_column_profiles(column)
+
+    def drop_column(self, column: str) -> None:
+        """
+        Exclui uma coluna do GeoDataFrame.
+        :param column: O nome da coluna.
+        :return: Nada.
+        """
+        self.gdf.drop(columns=[column], inplace=True)
+        self.invalidate_column_profiles(column)
+
     def reproject_geodataframe(self, target_crs_key: str) -> None:
         """
-        Reprojeta o GeoDataFrame para um SRC de destino.
+        Reprojeta o GeoDataFrame para um SRC de destino. A reprojeção é apenas registrada nos pontos (ver
+        LazyPoints.reproject) e só é calculada quando as coordenadas ou a geometria forem necessárias.
         :param target_crs_key: A chave para o dicionário de SRCs (CRS_DICT) do SRC de destino, no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
         :return: Nada
         """
-        target_crs = pyproj.CRS.from_authority(CRS_DICT[target_crs_key]["auth_name"], CRS_DICT[target_crs_key]["code"])
-        self.gdf = self.gdf.to_crs(crs=target_crs)
+        self.points.reproject(get_crs(target_crs_key))
         self.crs_key = target_crs_key
 
-    def export_geodataframe(self, path: str, layer_name: str = "pontos"):
+    def reproject_and_save_coordinates(self, target_crs_key: str, x_column: str, y_column: str,
+                                       z_column: str | None = None, progress=None) -> None:
+        """
+        Reprojeta os pontos (ver reproject_geodataframe) e salva as novas coordenadas em colunas (ver
+        save_coordinates_as_columns). Se o cálculo for interrompido (ex: cancelado pela função de progresso), a
+        reprojeção é desfeita: os pontos e o SRC voltam a ser os de antes.
+        :param target_crs_key: A chave para o dicionário de SRCs (CRS_DICT) do SRC de destino.
+        :param x_column: O rótulo da coluna para as coordenadas x.
+        :param y_column: O rótulo da coluna para as coordenadas y.
+        :param z_column: O rótulo da coluna para as coordenadas z (apenas para pontos 3D).
+        :param progress: Função de acompanhamento do progresso da reprojeção (ver transform_coordinates).
+        :return: Nada
+        """
+        points, crs_key = self.points.copy(), self.crs_key
+        self.reproject_geodataframe(target_crs_key)
+        try:
+            self.save_coordinates_as_columns(x_column, y_column, z_column, progress=progress)
+        except BaseException:
+            self.points, self.crs_key = points, crs_key
+            raise
+
+    def save_coordinates_as_columns(self, x_column: str, y_column: str, z_column: str | None = None,
+                                    progress=None) -> None:
         """
-        Exporta o GeoDataFrame armazenado no atributo "gdf" da classe para um arquivo vetorial ou tabela.
+        Salva as coordenadas atuais dos pontos (já reprojetadas) em colunas do GeoDataFrame. Colunas já existentes
+        são substituídas.
+        :param x_column: O rótulo da coluna para as coordenadas x.
+        :param y_column: O rótulo da coluna para as coordenadas y.
+        :param z_column: O rótulo da coluna para as coordenadas z (apenas para pontos 3D).
+        :param progress: Função de acompanhamento do progresso da reprojeção pendente (ver transform_coordinates).
+        :return: Nada
+        """
+        x, y, z = self.points.coordinates(progress=progress)
+
+        self.gdf[x_column] = x
+        self.gdf[y_column] = y
+        self.invalidate_column_profiles(x_column, y_column)
+
+        if z_column is not None and z is not None:
+            self.gdf[z_column] = z
+            self.invalidate_column_profiles(z_column)
+
+    def get_geodataframe(self) -> geopandas.GeoDataFrame:
+        """
+        Retorna o GeoDataFrame com a geometria dos pontos, construindo-a caso ainda não tenha sido construída. As
+        colunas do atributo "gdf" não são copiadas.
+        :return: O GeoDataFrame com a coluna "geometry" (ou apenas os atributos, caso não haja coordenadas).
+        """
+        if self.points is None:
+            return self.gdf
+        return geopandas.GeoDataFrame(self.gdf, geometry=self.points.geometry(self.gdf.index), crs=self.points.crs)
+
+    def get_columns_dtypes(self) -> list[tuple[str, str]]:
+        """
+        Retorna os rótulos e os dtypes das colunas do GeoDataFrame, incluindo a coluna "geometry" dos pontos.
+        :return: Lista de tuplas (rótulo, dtype).
+        """
+        columns = [(str(c), str(dtype)) for c, dtype in self.gdf.dtypes.items()]
+        if self.points is not None:
+            columns.append(("geometry", "geometry"))
+        return columns
+
+    def export_geodataframe(self, path: str, layer_name: str = "pontos", append: bool = False, progress=None):
+        """
+        Exporta o GeoDataFrame armazenado no atributo "gdf" da classe para um arquivo vetorial ou tabela. A geometria
+        dos pontos só é construída para os formatos vetoriais.
         :param path: Caminho do arquivo de saída.
         :param layer_name: Nome da camada (para arquivos geopackage).
+        :param append: Se True, acrescenta as linhas a um arquivo existente em vez de sobrescrevê-lo (não suportado para xlsx).
+        :param progress: Função chamada com (linhas gravadas, total de linhas). Se informada, as linhas são gravadas em blocos de PROGRESS_CHUNK_SIZE (exceto em xlsx e GeoJSON, gravados de uma vez).
         :return: Nada
         """
-        if path.endswith(".shp"):
-            unsupported_dtypes = ("category", "timedelta64[ns]", "datetime64[ns]", "<M8[ns]", ">M8[ns]")
-        else:
-            unsupported_dtypes = ("category", "timedelta64[ns]")
+        if append and path.endswith(".xlsx"):
+            raise ValueError("Não é possível acrescentar linhas a um arquivo xlsx.")
+        mode = "a" if append else "w"
 
-        for c in self.gdf.columns:
-            if self.gdf[c].dtype in unsupported_dtypes:
-                self.gdf[c] = self.gdf[c].astype(str)
+        n_rows = len(self.gdf.index)
+        if progress is not None and not (path.endswith(".xlsx") or path.endswith(".geojson")):
+            chunk_size = PROGRESS_CHUNK_SIZE
+        else:
+            chunk_size = max(n_rows, 1)
 
-        if path.endswith(".gpkg"):
-            self.gdf.to_file(filename=path, layer=layer_name, driver="GPKG", encoding="utf-8")
-        elif path.endswith(".csv"):
+        # Tabelas recebem a geometria em WKT, gerada direto das coordenadas, sem construir os pontos
+        if path.endswith(".csv") or path.endswith(".xlsx"):
             df = pandas.DataFrame(self.gdf)
-            df.to_csv(path, sep=";", decimal=".", index=False, encoding="utf-8")
-        elif path.endswith(".xlsx"):
-            df = pandas.DataFrame(self.gdf)
-            df.to_excel(path, index=False)
-        else:  # GeoJSON e Shapefile
-            self.gdf.to_file(filename=path, encoding="utf-8")
+            if self.points is not None:
+                df["geometry"] = self.points.to_wkt()
+            df = to_writable_dtypes(df, path)
+            options = {}
+        else:
+            df = to_writable_dtypes(self.get_geodataframe(), path)
+            if self.arrow and PYOGRIO_AVAILABLE:
+                # As colunas Arrow são entregues ao GDAL sem cópia pela interface Arrow do pyogrio
+                options = {"engine": "pyogrio", "use_arrow": True}
+            else:
+                df = to_numpy_dtypes(df)
+                options = {}
+
+        # Arquivos novos ou sobrescritos são gravados com um nome temporário e só recebem o nome final ao fim da
+        # gravação, para que uma exportação cancelada ou com erro não deixe um arquivo incompleto nem apague o anterior.
+        # Um geopackage com outras camadas é copiado para o arquivo temporário antes da gravação, mantendo as camadas
+        write_path = path if append else get_temporary_path(path)
+        if not append and path.endswith(".gpkg") and any(layer != layer_name for layer in get_gpkg_layers(path)):
+            shutil.copy2(path, write_path)
+        if path.endswith(".geojson"):
+            # O GeoJSON guarda o nome da camada, que seria o nome temporário
+            options["layer"] = os.path.splitext(os.path.basename(path))[0]
+
+        try:
+            for start in range(0, max(n_rows, 1), chunk_size):
+                part = df.iloc[start:start + chunk_size] if chunk_size < n_rows else df
+                if path.endswith(".csv"):
+                    part.to_csv(write_path, sep=";", decimal=".", index=False, encoding="utf-8", mode=mode,
+                                header=not append and start == 0)
+                elif path.endswith(".xlsx"):
+                    part.to_excel(write_path, index=False)
+                elif path.endswith(".gpkg"):
+                    part.to_file(filename=write_path, layer=layer_name, driver="GPKG", encoding="utf-8", mode=mode,
+                                 **options)
+                else:  # GeoJSON e Shapefile
+                    part.to_file(filename=write_path, encoding="utf-8", mode=mode, **options)
+                # Os blocos seguintes são acrescentados ao arquivo
+                mode = "a"
+                if progress is not None:
+                    progress(min(start + chunk_size, n_rows), n_rows)
+        except BaseException:
+            if not append:
+                remove_output_files(write_path)
+            raise
+
+        if not append:
+            replace_output_files(write_path, path)
+
+
+class LazyPoints:
+    """
+    Pontos guardados como arrays de coordenadas (float64) e um SRC, sem objetos de geometria do Shapely. Reprojeções
+    são registradas como etapas e só são calculadas quando as coordenadas são pedidas (ver coordinates), e a geometria
+    só é construída quando uma exportação vetorial ou operação espacial precisa dela (ver geometry). Pontos com x ou y
+    vazio (NaN) são tratados como geometrias nulas.
+    """
+    def __init__(self, x, y, z, crs: pyproj.CRS):
+        self.x = numpy.asarray(x, dtype="float64")
+        self.y = numpy.asarray(y, dtype="float64")
+        self.z = numpy.asarray(z, dtype="float64") if z is not None else None
+        self.source_crs = crs
+        self.steps = []
+        self._geometry = None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    @property
+    def crs(self) -> pyproj.CRS:
+        return self.steps[-1] if self.steps else self.source_crs
+
+    @property
+    def has_z(self) -> bool:
+        return self.z is not None
+
+    @property
+    def missing(self) -> numpy.ndarray:
+        return numpy.isnan(self.x) | numpy.isnan(self.y)
+
+    def reproject(self, target_crs: pyproj.CRS) -> None:
+        """
+        Registra uma reprojeção para outro SRC. Nada é calculado até que as coordenadas sejam pedidas.
+        :param target_crs: O SRC de destino.
+        :return: Nada.
+        """
+        self.steps.append(target_crs)
+        self._geometry = None
+
+    def coordinates(self, workers: int | None = None,
+                    progress=None) -> (numpy.ndarray, numpy.ndarray, numpy.ndarray | None):
+        """
+        Aplica as reprojeções pendentes (ver transform_coordinates) e retorna as coordenadas. As reprojeções pendentes
+        são compostas em uma só, direto do SRC atual para o último SRC de destino, em uma única passada pelos dados.
+        :param workers: Número de threads usadas na reprojeção. Se None, usa o número de CPUs.
+        :param progress: Função de acompanhamento do progresso da reprojeção (ver transform_coordinates).
+        :return: Os arrays x, y e z (z é None para pontos 2D).
+        """
+        if self.steps:
+            target_crs = self.steps[-1]
+            if target_crs != self.source_crs:
+                missing = self.missing
+                transformer = CRS_POOL.get_transformer(self.source_crs, target_crs)
+                self.x, self.y, self.z = transform_coordinates(transformer, self.x, self.y, self.z, workers=workers,
+                                                               progress=progress)
+                # Mantém vazias as coordenadas que eram vazias (o PROJ retorna inf para elas)
+                self.x[missing], self.y[missing] = numpy.nan, numpy.nan
+                if self.z is not None:
+                    self.z[missing] = numpy.nan
+            self.source_crs = target_crs
+            self.steps = []
+        return self.x, self.y, self.z
+
+    def geometry(self, index: pandas.Index | None = None) -> geopandas.GeoSeries:
+        """
+        Constrói (ou retorna, se já construídos) os pontos como uma GeoSeries.
+        :param index: O índice da GeoSeries (normalmente o índice do GeoDataFrame).
+        :return: A GeoSeries de pontos.
+        """
+        if self._geometry is None:
+            x, y, z = self.coordinates()
+            points = geopandas.points_from_xy(x, y, z, crs=self.crs)
+            points[self.missing] = None
+            self._geometry = points
+        return geopandas.GeoSeries(self._geometry, index=index, crs=self.crs)
+
+    def to_wkt(self) -> numpy.ndarray:
+        """
+        Gera a representação WKT dos pontos direto das coordenadas, sem construir as geometrias, no mesmo formato
+        usado pelo Shapely. Ex: "POINT (-48.79127 -27.19899)" ou "POINT Z (-48.79127 -27.19899 10)".
+        :return: Array de strings (None para pontos vazios).
+        """
+        def format_axis(values):
+            text = pandas.Series(values).astype(str).str.replace(r"\.0$", "", regex=True)
+            # Valores muito grandes ou pequenos saem em notação científica, que o WKT do Shapely não usa
+            scientific = text.str.contains("e", regex=False).to_numpy()
+            if scientific.any():
+                text[scientific] = [numpy.format_float_positional(v, trim="-") for v in values[scientific]]
+            return text
+
+        x, y, z = self.coordinates()
+        if z is None:
+            wkt = "POINT (" + format_axis(x) + " " + format_axis(y) + ")"
+        else:
+            wkt = "POINT Z (" + format_axis(x) + " " + format_axis(y) + " " + format_axis(z) + ")"
+
+        wkt = wkt.to_numpy(dtype=object)
+        wkt[self.missing] = None
+        return wkt
+
+    def take(self, positions: numpy.ndarray) -> "LazyPoints":
+        """
+        Cria um novo conjunto de pontos com as linhas nas posições indicadas. Posições -1 resultam em pontos vazios.
+        :param positions: Array de posições (inteiros).
+        :return: Os novos pontos (LazyPoints).
+        """
+        x, y, z = self.coordinates()
+        new_rows = positions < 0
+
+        def take_axis(values):
+            result = values[positions]
+            result[new_rows] = numpy.nan
+            return result
+
+        return LazyPoints(take_axis(x), take_axis(y), take_axis(z) if z is not None else None, self.crs)
+
+    def copy(self) -> "LazyPoints":
+        """
+        Cria uma cópia dos pontos que compartilha os arrays de coordenadas, que nunca são alterados, apenas
+        substituídos (ver coordinates). Apenas a lista de reprojeções pendentes é copiada.
+        :return: Os novos pontos (LazyPoints).
+        """
+        points = LazyPoints.__new__(LazyPoints)
+        points.x, points.y, points.z = self.x, self.y, self.z
+        points.source_crs = self.source_crs
+        points.steps = list(self.steps)
+        points._geometry = self._geometry
+        return points
+
+    def memory_usage(self) -> int:
+        """
+        :return: O total de bytes ocupados pelos arrays de coordenadas.
+        """
+        return sum(a.nbytes for a in (self.x, self.y, self.z) if a is not None)
+
+
+def sniff_csv_format(path: str, decimal: str = ',') -> (str, str):
+    """
+    Identifica o delimitador de células de um arquivo CSV a partir das primeiras linhas do arquivo. São usadas linhas
+    inteiras, já que em tabelas largas o cabeçalho sozinho pode ter vários KB.
+    :param path: Caminho do arquivo.
+    :param decimal: O separador decimal usado no arquivo.
+    :return: O delimitador de células e o separador decimal (sempre '.' quando o delimitador é ',').
+    """
+    with open(path, "r") as file:
+        data = "".join(file.readline() for _ in range(10))
+    sep = str(csv.Sniffer().sniff(data).delimiter)
+
+    # Retirar isso caso seja implementada alguma seleção manual de separador decimal
+    if sep == ',':
+        decimal = '.'
+
+    return sep, decimal
+
+
+def iter_csv_chunks(path: str, decimal: str = ',', chunksize: int = CSV_CHUNK_SIZE, arrow: bool = False,
+                    usecols: list[str] | None = None, progress=None):
+    """
+    Lê um arquivo CSV em blocos de linhas, tratando cada bloco com DataHandler.clean_data. Blocos que ficarem vazios
+    após o tratamento são descartados. Os índices das linhas seguem a numeração do arquivo.
+    :param path: Caminho do arquivo.
+    :param decimal: O separador decimal usado no arquivo. O padrão é ',' (vírgula).
+    :param chunksize: O número de linhas de cada bloco.
+    :param arrow: Se True, as colunas são baseadas no pyarrow (o leitor do pyarrow não lê em blocos, então é usado o leitor em C do pandas).
+    :param usecols: Se informado, lê apenas as colunas com esses rótulos.
+    :param progress: Função chamada com (bytes lidos, tamanho do arquivo) após cada bloco. Pode levantar uma exceção para interromper a leitura.
+    :return: Gerador de DataFrames.
+    """
+    sep, decimal = sniff_csv_format(path, decimal)
+    options = {"dtype_backend": "pyarrow"} if arrow else {}
+    size = os.path.getsize(path)
+    with open(path, "rb") as file, pandas.read_csv(file, delimiter=sep, decimal=decimal, chunksize=chunksize,
+                                                   usecols=make_column_filter(usecols), **options) as reader:
+        for chunk in reader:
+            if progress is not None:
+                progress(file.tell(), size)
+            chunk = DataHandler.clean_data(chunk)
+            if len(chunk.index) > 0:
+                yield chunk
+
+
+def count_column_values(column: pandas.Series) -> dict:
+    """
+    Indexa os valores de uma coluna pela sua representação em texto (a mesma de astype("string")). A coluna é
+    fatorada (pandas.factorize) nos seus tipos originais e apenas os valores únicos são convertidos para texto e
+    ordenados, então cada linha vira um código inteiro, e comparações e conversões podem ser feitas nos valores únicos.
+    :param column: A coluna.
+    :return: Dicionário com os códigos de cada linha ("codes", -1 para células vazias, no menor tipo inteiro possível), os valores únicos em texto ("uniques", em ordem alfabética), o número de linhas com cada valor ("counts") e o número de células vazias ("nan_count").
+    """
+    codes, uniques = pandas.factorize(column)
+    if len(uniques) > 0 and pandas.api.types.infer_dtype(uniques, skipna=True) != "string":
+        # Valores diferentes podem ter o mesmo texto (ex: 1 e "1" em uma coluna object), e são unidos em um só código
+        text_codes, uniques = pandas.factorize(pandas.Index(uniques).astype("string"))
+        codes = numpy.where(codes >= 0, text_codes[codes], -1)
+    uniques = numpy.asarray(uniques, dtype=object)
+
+    # Ordena os valores únicos e renumera os códigos. O sorted do Python é mais rápido que a ordenação de arrays de
+    # objetos do numpy e do pandas
+    if len(uniques) > 0:
+        order = numpy.array(sorted(range(len(uniques)), key=uniques.__getitem__), dtype=numpy.intp)
+        ranks = numpy.empty(len(uniques), dtype=numpy.intp)
+        ranks[order] = numpy.arange(len(uniques))
+        codes = numpy.where(codes >= 0, ranks[codes], -1)
+        uniques = uniques[order]
+
+    codes = codes.astype(numpy.min_scalar_type(-len(uniques) - 1))
+    counts = numpy.bincount(codes[codes >= 0], minlength=len(uniques))
+    return {"codes": codes, "uniques": uniques, "counts": counts, "nan_count": int(len(codes) - counts.sum())}
+
+
+def optimize_column_dtype(column: pandas.Series) -> pandas.Series:
+    """
+    Converte uma coluna para um tipo de dado mais compacto, quando possível sem perda de informação: colunas de texto
+    com poucos valores distintos (até CATEGORY_MAX_UNIQUE_RATIO) viram category, inteiros são reduzidos ao menor tipo
+    inteiro que comporta seus valores e floats viram float32 apenas se todos os valores forem representados exatamente.
+    Colunas booleanas, de data, de geometria e baseadas no pyarrow não são alteradas.
+    :param column: A coluna.
+    :return: A coluna convertida, ou a própria coluna caso não haja conversão vantajosa.
+    """
+    dtype = column.dtype
+
+    if isinstance(dtype, pandas.ArrowDtype) or getattr(dtype, "storage", None) == "pyarrow":
+        return column
+
+    if dtype == "object" or isinstance(dtype, pandas.StringDtype):
+        count = len(column.index) - int(column.isna().sum())
+        if count > 0 and column.nunique(dropna=True) <= count * CATEGORY_MAX_UNIQUE_RATIO:
+            return column.astype("category")
+    elif pandas.api.types.is_bool_dtype(dtype):
+        return column
+    elif pandas.api.types.is_integer_dtype(dtype) and isinstance(dtype, numpy.dtype):
+        downcast = pandas.to_numeric(column, downcast="integer")
+        if downcast.dtype.itemsize < dtype.itemsize:
+            return downcast
+    elif pandas.api.types.is_float_dtype(dtype) and isinstance(dtype, numpy.dtype) and dtype.itemsize > 4:
+        values = column.to_numpy()
+        downcast = values.astype("float32")
+        if numpy.array_equal(downcast.astype(dtype), values, equal_nan=True):
+            return pandas.Series(downcast, index=column.index, name=column.name)
+
+    return column
+
+
+def format_bytes(size: int | float) -> str:
+    """
+    Formata um tamanho em bytes com a unidade mais adequada. Ex: 1536 --> "1.5 KB".
+    :param size: O tamanho, em bytes.
+    :return: O tamanho formatado.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def read_table(path: str, sheet: str | int = 0, arrow: bool = False) -> (pandas.DataFrame, int):
+    """
+    Lê uma tabela (xlsx, xlsm, ods ou csv) e a trata com DataHandler.clean_data. Função de módulo para poder ser
+    executada em outro processo (ver DataHandler.read_files).
+    :param path: Caminho do arquivo.
+    :param sheet: O nome ou índice da planilha a ser lida dos arquivos do Excel/OpenDocument.
+    :param arrow: Se True, as colunas são baseadas no pyarrow.
+    :return: O DataFrame da tabela e o número de linhas vazias descartadas.
+    """
+    if path.lower().endswith(".csv"):
+        sep, decimal = sniff_csv_format(path)
+        options = {"dtype_backend": "pyarrow"} if arrow else {}
+        df = pandas.read_csv(path, delimiter=sep, decimal=decimal, usecols=make_column_filter(), **options)
+    else:
+        df = read_sheet(path, sheet, get_excel_engine(path), arrow)
+
+    rows = len(df.index)
+    df = DataHandler.clean_data(df)
+    return df, rows - len(df.index)
+
+
+def join_tables(tables: dict[str, pandas.DataFrame], merge_column: str) -> pandas.DataFrame:
+    """
+    Une várias tabelas pela coluna de ID. Cada tabela é indexada pela coluna de ID e todas são unidas de uma só vez
+    (pandas.concat ao longo das colunas), em vez de mescladas duas a duas. Colunas com o mesmo rótulo em mais de uma
+    tabela recebem o nome da tabela como sufixo (exceto na primeira). Caso a coluna de ID tenha tipos de dado
+    diferentes entre as tabelas, IDs numéricos sem parte fracionária são convertidos para inteiros anuláveis (Int64),
+    e, se ainda houver tipos diferentes, a coluna é convertida para float (se for numérica em todas) ou para texto.
+    :param tables: Dicionário {nome da tabela: DataFrame}. Os valores da coluna de ID não podem se repetir em uma mesma tabela.
+    :param merge_column: A coluna de ID.
+    :return: A tabela unida, com a coluna de ID como primeira coluna.
+    """
+    tables = dict(tables)
+    first_table = next(iter(tables))
+
+    def is_integral(column: pandas.Series) -> bool:
+        if pandas.api.types.is_bool_dtype(column) or not pandas.api.types.is_numeric_dtype(column):
+            return False
+        return pandas.api.types.is_integer_dtype(column) or bool((column.dropna() % 1 == 0).all())
+
+    if len({str(df[merge_column].dtype) for df in tables.values()}) > 1:
+        # IDs inteiros (inclusive os lidos como float por causa de células vazias) viram Int64, que não perde precisão
+        # acima de 2^53 como o float e não mostra os IDs como "1.0"
+        ids = {name: df[merge_column].astype("Int64") if is_integral(df[merge_column]) else df[merge_column]
+               for name, df in tables.items()}
+        if len({str(column.dtype) for column in ids.values()}) > 1:
+            if all(pandas.api.types.is_numeric_dtype(column) for column in ids.values()):
+                ids = {name: column.astype("float64") for name, column in ids.items()}
+            else:
+                ids = {name: column.astype(str).where(column.notna(), None) for name, column in ids.items()}
+        tables = {name: df.assign(**{merge_column: ids[name]}) for name, df in tables.items()}
+
+    column_counts = pandas.Series([c for df in tables.values() for c in df.columns]).value_counts()
+    repeated_columns = set(column_counts[column_counts > 1].index) - {merge_column}
+    for name, df in tables.items():
+        if name != first_table:
+            tables[name] = df.rename(columns={c: f"{c}_{name}" for c in df.columns if c in repeated_columns})
+
+    df = pandas.concat([df.set_index(merge_column) for df in tables.values()], axis=1, join="outer", sort=True)
+
+    # Coloca a coluna de ID de volta como a primeira coluna
+    df.index.name = merge_column
+    return df.reset_index()
+
+
+def read_sheet(path: str, sheet: str, engine: str | None = None, arrow: bool = False) -> pandas.DataFrame:
+    """
+    Lê uma planilha de uma pasta de trabalho do Excel/OpenDocument, sem as colunas sem rótulo. Função de módulo para
+    poder ser executada em outro processo (ver DataHandler.parse_sheets).
+    :param path: Caminho do arquivo.
+    :param sheet: O nome da planilha.
+    :param engine: O leitor a ser usado (ver get_excel_engine).
+    :param arrow: Se True, as colunas são baseadas no pyarrow.
+    :return: O DataFrame da planilha.
+    """
+    options = {"dtype_backend": "pyarrow"} if arrow else {}
+    return pandas.read_excel(path, sheet_name=sheet, engine=engine, usecols=make_column_filter(), **options)
+
+
+def make_column_filter(usecols: list[str] | None = None):
+    """
+    Cria a função usada no argumento usecols dos leitores do pandas (read_csv e ExcelFile.parse), para que colunas
+    descartadas nunca cheguem a ser convertidas. Colunas sem rótulo (que o pandas chama de "Unnamed: n") são sempre
+    descartadas, como em DataHandler.clean_data.
+    :param usecols: Os rótulos das colunas a serem lidas. Se None, lê todas as colunas com rótulo.
+    :return: Função que recebe o rótulo de uma coluna e retorna True se ela deve ser lida.
+    """
+    keep = None if usecols is None else {str(c) for c in usecols}
+
+    def column_filter(column) -> bool:
+        column = str(column)
+        return 'Unnamed' not in column and (keep is None or column in keep)
+
+    return column_filter
+
+
+def widen_dtypes(df: pandas.DataFrame, dtypes: pandas.Series, ignore: list[str] = ()) -> pandas.Series:
+    """
+    Alarga os tipos de dado de referência para que também comportem os valores de um DataFrame, para que blocos de um
+    mesmo arquivo possam ser gravados com o mesmo esquema. Colunas inteiras passam a float quando recebem valores
+    fracionários, e colunas numéricas ou booleanas passam a texto (object) quando recebem valores de outro tipo. Colunas
+    vazias no DataFrame cabem em qualquer tipo, e colunas de texto aceitam qualquer valor.
+    :param df: O DataFrame.
+    :param dtypes: Os tipos de dado de referência, indexados pelos rótulos das colunas.
+    :param ignore: Rótulos das colunas que não devem ser verificadas.
+    :return: Os novos tipos de dado, ou a própria Series dtypes caso nenhum tipo precise mudar.
+    """
+    def is_number(dtype) -> bool:
+        return pandas.api.types.is_numeric_dtype(dtype) and not pandas.api.types.is_bool_dtype(dtype)
+
+    widened = {}
+    for c in df.columns:
+        if c in ignore or c not in dtypes.index:
+            continue
+        reference, column = dtypes[c], df[c]
+        if column.dtype == reference or pandas.api.types.is_string_dtype(reference) or column.isna().all():
+            continue
+
+        if is_number(reference) and is_number(column.dtype):
+            # Inteiros cabem em float, e floats sem parte fracionária (células vazias em uma coluna inteira) em inteiros
+            if pandas.api.types.is_integer_dtype(reference) and pandas.api.types.is_float_dtype(column.dtype):
+                if (column.dropna() % 1 != 0).any():
+                    widened[c] = "double[pyarrow]" if isinstance(reference, pandas.ArrowDtype) else "float64"
+        elif not (pandas.api.types.is_bool_dtype(reference) and
+                  pandas.api.types.infer_dtype(column, skipna=True) == "boolean"):
+            widened[c] = object
+
+    if not widened:
+        return dtypes
+    dtypes = dtypes.copy()
+    for c, dtype in widened.items():
+        dtypes[c] = pandas.api.types.pandas_dtype(dtype)
+    return dtypes
+
+
+def match_dtypes(df: pandas.DataFrame, dtypes: pandas.Series, ignore: list[str] = ()) -> pandas.DataFrame:
+    """
+    Converte as colunas de um DataFrame para os tipos de dado informados (ver widen_dtypes), para que blocos de um
+    mesmo arquivo sejam gravados com o mesmo esquema. Colunas inteiras ou booleanas que passam a ter células vazias em
+    um bloco são mantidas como estão, e as células vazias são gravadas como nulas.
+    :param df: O DataFrame.
+    :param dtypes: Os tipos de dado de referência, indexados pelos rótulos das colunas.
+    :param ignore: Rótulos das colunas que não devem ser convertidas.
+    :return: O DataFrame com as colunas convertidas.
+    """
+    for c in df.columns:
+        if c in ignore or c not in dtypes.index or df[c].dtype == dtypes[c]:
+            continue
+        if (df[c].hasnans and not isinstance(dtypes[c], pandas.ArrowDtype) and
+                (pandas.api.types.is_integer_dtype(dtypes[c]) or pandas.api.types.is_bool_dtype(dtypes[c]))):
+            continue
+        df[c] = df[c].astype(dtypes[c])
+    return df
+
+
+def get_temporary_path(path: str) -> str:
+    """
+    Monta um caminho temporário para gravar um arquivo de saída, na mesma pasta e com a mesma extensão do arquivo
+    final, de modo que ele possa ser renomeado para o nome final ao fim da gravação (ver export_geodataframe).
+    :param path: Caminho do arquivo de saída.
+    :return: O caminho temporário. Ex: "pontos.tmp1234.gpkg" para "pontos.gpkg".
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.tmp{os.getpid()}{extension}"
+
+
+def get_output_files(path: str) -> list[str]:
+    """
+    Lista os arquivos existentes que compõem um arquivo de saída: o próprio arquivo e, em shapefiles, os arquivos
+    auxiliares com o mesmo nome e uma das extensões de SHAPEFILE_EXTENSIONS. Outros arquivos com o mesmo nome (ex:
+    pontos.csv ao lado de pontos.shp) não fazem parte do shapefile.
+    :param path: Caminho do arquivo de saída.
+    :return: Os caminhos dos arquivos.
+    """
+    if not path.lower().endswith(".shp"):
+        return [path] if os.path.exists(path) else []
+    folder, name = os.path.split(path)
+    stem = name[:-len(".shp")]
+    return [os.path.join(folder, f) for f in os.listdir(folder or ".")
+            if f[:len(stem)] == stem and f[len(stem):].lower() in SHAPEFILE_EXTENSIONS]
+
+
+def remove_output_files(path: str) -> None:
+    """
+    Exclui um arquivo de saída e, em shapefiles, seus arquivos auxiliares (ver get_output_files).
+    :param path: Caminho do arquivo de saída.
+    :return: Nada.
+    """
+    for file in get_output_files(path):
+        os.remove(file)
+
+
+def replace_output_files(source: str, target: str) -> None:
+    """
+    Renomeia um arquivo de saída (e, em shapefiles, seus arquivos auxiliares), substituindo o arquivo de destino.
+    Arquivos auxiliares do shapefile de destino que o novo shapefile não tem (ex: um índice .qix antigo) são excluídos.
+    :param source: Caminho do arquivo gravado.
+    :param target: Caminho final do arquivo.
+    :return: Nada.
+    """
+    source_stem, target_stem = source[:-len(os.path.splitext(source)[1])], target[:-len(os.path.splitext(target)[1])]
+    new_files = {file[len(source_stem):].lower(): file for file in get_output_files(source)}
+    for file in get_output_files(target):
+        if file[len(target_stem):].lower() not in new_files:
+            os.remove(file)
+    for file in new_files.values():
+        os.replace(file, target_stem + file[len(source_stem):])
+
+
+def get_gpkg_layers(path: str) -> list[str]:
+    """
+    Lista as camadas de um geopackage. Arquivos inexistentes ou que não puderem ser lidos são tratados como vazios.
+    :param path: Caminho do arquivo geopackage.
+    :return: Os nomes das camadas.
+    """
+    import fiona
+    if not os.path.exists(path):
+        return []
+    try:
+        return fiona.listlayers(path)
+    except fiona.errors.FionaError:
+        return []
+
+
+def to_writable_dtypes(df: pandas.DataFrame, path: str) -> pandas.DataFrame:
+    """
+    Converte as colunas com tipos de dado que o formato de saída não suporta: colunas categóricas (ver
+    optimize_column_dtype) voltam aos valores das categorias, e colunas de duração (e de data, em shapefiles) são
+    convertidas para texto. As células vazias continuam nulas, e as demais colunas não são copiadas.
+    :param df: O DataFrame a ser gravado.
+    :param path: Caminho do arquivo de saída.
+    :return: Um novo DataFrame com as colunas convertidas, ou o próprio DataFrame caso não haja o que converter.
+    """
+    if path.endswith(".shp"):
+        unsupported_dtypes = ("category", "timedelta64[ns]", "datetime64[ns]", "<M8[ns]", ">M8[ns]")
+    else:
+        unsupported_dtypes = ("category", "timedelta64[ns]")
+
+    columns = [c for c in df.columns if df[c].dtype in unsupported_dtypes]
+    if not columns:
+        return df
+
+    df = df.copy(deep=False)
+    for c in columns:
+        column = df[c]
+        if isinstance(column.dtype, pandas.CategoricalDtype):
+            df[c] = numpy.asarray(column)
+        else:
+            df[c] = column.astype(str).where(column.notna(), None)
+    return df
+
+
+def to_numpy_dtypes(df: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Converte as colunas baseadas no pyarrow (ver DataHandler) para dtypes do numpy, que o fiona consegue gravar.
+    Colunas inteiras ou booleanas com células vazias são convertidas para float e object, respectivamente. As demais
+    colunas não são copiadas.
+    :param df: O DataFrame.
+    :return: Um novo DataFrame com as colunas convertidas, ou o próprio DataFrame caso não haja colunas Arrow.
+    """
+    arrow_columns = [c for c in df.columns
+                     if isinstance(df[c].dtype, pandas.ArrowDtype) or getattr(df[c].dtype, "storage", None) == "pyarrow"]
+    if not arrow_columns:
+        return df
+
+    df = df.copy(deep=False)
+    for c in arrow_columns:
+        column = df[c]
+        has_nans = column.isna().any()
+        if pandas.api.types.is_bool_dtype(column.dtype):
+            df[c] = column.to_numpy(dtype=object if has_nans else bool, na_value=None)
+        elif pandas.api.types.is_integer_dtype(column.dtype):
+            df[c] = column.to_numpy(dtype="float64" if has_nans else "int64", na_value=numpy.nan)
+        elif pandas.api.types.is_float_dtype(column.dtype):
+            df[c] = column.to_numpy(dtype="float64", na_value=numpy.nan)
+        elif pandas.api.types.is_datetime64_any_dtype(column.dtype):
+            df[c] = column.to_numpy(dtype="datetime64[ns]", na_value=numpy.datetime64("NaT"))
+        else:
+            df[c] = column.to_numpy(dtype=object, na_value=None)
+    return df
+
+
+def get_excel_engine(path: str, engine: str = "auto") -> str | None:
+    """
+    Escolhe o leitor usado para abrir uma pasta de trabalho do Excel/OpenDocument. No modo "auto", usa o calamine para
+    arquivos a partir de CALAMINE_MIN_FILE_SIZE, caso esteja instalado, e os leitores padrão do pandas nos demais casos
+    (openpyxl, que o pandas já abre em modo somente leitura, para xlsx/xlsm, e odfpy para ods).
+    :param path: Caminho do arquivo.
+    :param engine: "auto", "openpyxl", "odf" ou "calamine".
+    :return: O nome do leitor, ou None para deixar o pandas escolher pela extensão do arquivo.
+    """
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Leitor inválido: {engine}. Opções: {', '.join(EXCEL_ENGINES)}.")
+    if engine == "calamine" and not CALAMINE_AVAILABLE:
+        raise ImportError("O leitor calamine não está instalado (pip install python-calamine).")
+    if engine != "auto":
+        return engine
+    if CALAMINE_AVAILABLE and os.path.getsize(path) >= CALAMINE_MIN_FILE_SIZE:
+        return "calamine"
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_crs_bounds(crs_key: str) -> (float, float, float, float):
+    """
+    Retorna os limites da área de uso de um SRC, nas unidades do próprio SRC (graus para SRCs geográficos e,
+    geralmente, metros para SRCs projetados). O resultado fica em cache para cada SRC.
+    :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
+    :return: Os limites no formato (x_min, y_min, x_max, y_max).
+    """
+    crs = get_crs(crs_key)
+
+    if CRS_DICT[crs_key]["type"] in ["Geographic 2D CRS", "Geographic 3D CRS"]:
+        return crs.area_of_use.bounds
+
+    transformer = CRS_POOL.get_transformer(crs.geodetic_crs, crs)
+    return transformer.transform_bounds(*crs.area_of_use.bounds)
+
+
+def get_crs(crs_key: str) -> pyproj.CRS:
+    """
+    Retorna o objeto pyproj.CRS de um SRC do catálogo, reaproveitando os objetos já criados (ver crs_pool.py).
+    :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
+    :return: O objeto pyproj.CRS.
+    """
+    return CRS_POOL.get_crs(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
+
+
+def resolve_crs_key(spec: str) -> str:
+    """
+    Encontra a chave do dicionário de SRCs (CRS_DICT) a partir de uma chave, de um código no formato "autoridade:código"
+    ou apenas do código EPSG.
+    :param spec: A especificação do SRC. Ex: "SIRGAS 2000 (EPSG:4674)", "EPSG:4674" ou "4674".
+    :return: A chave para o dicionário de SRCs.
+    """
+    spec = spec.strip()
+    if spec in CRS_DICT:
+        return spec
+
+    auth_name, _, code = spec.rpartition(":")
+    auth_name = auth_name.upper() or "EPSG"
+    for key, entry in CRS_DICT.items():
+        if entry["auth_name"] == auth_name and entry["code"] == code:
+            return key
+
+    raise ValueError(f"SRC não encontrado no catálogo: {spec}.")
+
+
+def transform_coordinates(transformer: pyproj.Transformer, x: numpy.ndarray, y: numpy.ndarray,
+                          z: numpy.ndarray | None = None, chunk_size: int = REPROJECTION_CHUNK_SIZE,
+                          workers: int | None = None,
+                          progress=None) -> (numpy.ndarray, numpy.ndarray, numpy.ndarray | None):
+    """
+    Reprojeta arrays de coordenadas em blocos, usando várias threads. O PROJ libera o GIL durante a transformação, e
+    cada thread usa seu próprio objeto de transformação do PROJ (o pyproj.Transformer cria um por thread internamente),
+    então os blocos são processados em paralelo de fato. Arrays menores que um bloco são reprojetados diretamente.
+    :param transformer: O Transformer entre os SRCs de origem e destino (ver CRS_POOL.get_transformer).
+    :param x: As coordenadas x (longitude/easting).
+    :param y: As coordenadas y (latitude/northing).
+    :param z: As coordenadas z (altitude) ou None, para coordenadas 2D.
+    :param chunk_size: Número de pontos por bloco.
+    :param workers: Número de threads. Se None, usa o número de CPUs.
+    :param progress: Função chamada com (pontos reprojetados, total de pontos) após cada bloco. Pode levantar uma exceção para interromper a reprojeção. Se informada, os blocos têm no máximo PROGRESS_CHUNK_SIZE pontos, mesmo com uma só thread.
+    :return: Os arrays x, y e z reprojetados (z é None para coordenadas 2D).
+    """
+    x, y = numpy.asarray(x, dtype="float64"), numpy.asarray(y, dtype="float64")
+    z = numpy.asarray(z, dtype="float64") if z is not None else None
+    axes = (x, y) if z is None else (x, y, z)
+    n_points = len(x)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if progress is not None:
+        chunk_size = min(chunk_size, PROGRESS_CHUNK_SIZE)
+
+    if n_points <= chunk_size or (workers <= 1 and progress is None):
+        result = transformer.transform(*axes)
+        if progress is not None:
+            progress(n_points, n_points)
+        return result[0], result[1], (result[2] if z is not None else None)
+
+    output = [numpy.empty(n_points, dtype="float64") for _ in axes]
+    done = 0
+    lock = threading.Lock()
+
+    def transform_chunk(start: int) -> None:
+        nonlocal done
+        stop = start + chunk_size
+        chunk_result = transformer.transform(*(axis[start:stop] for axis in axes))
+        for out, values in zip(output, chunk_result):
+            out[start:stop] = values
+        if progress is not None:
+            with lock:
+                done += len(chunk_result[0])
+                progress(done, n_points)
+
+    if workers <= 1:
+        for start in range(0, n_points, chunk_size):
+            transform_chunk(start)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(transform_chunk, range(0, n_points, chunk_size)))
+
+    return output[0], output[1], (output[2] if z is not None else None)
 
 
 def get_dtype_key(value: str) -> str | None:
@@ -432,3 +1867,53 @@ def get_dtype_key(value: str) -> str | None:
             return dt_key
     return None
 
+
+def parse_dms_coordinates(values: pandas.Series | list, axis: str) -> (numpy.ndarray, numpy.ndarray):
+    """
+    Converte uma coluna inteira de coordenadas em formato GMS (GG°MM'SS,ssss"D) para graus decimais de forma
+    vetorizada. Os valores são unidos em um único texto (um por linha) e extraídos com uma única passada de expressão
+    regular, e os números resultantes são convertidos pelo leitor de CSV em C do pandas, sem laços em Python. Aceita
+    todas as variantes de símbolos definidas em DMS_REGEX e espaços em qualquer posição.
+    :param values: Os valores a serem convertidos (pandas.Series ou lista).
+    :param axis: O eixo das coordenadas ("x": longitude, "y": latitude). Define os hemisférios e o limite de graus aceitos.
+    :return: Um array float64 com as coordenadas em graus decimais (NaN nas linhas inválidas) e um array booleano indicando as linhas inválidas.
+    """
+    hemispheres = DMS_HEMISPHERES[axis]
+    values = pandas.Series(values, dtype="object").astype(str)
+
+    if len(values.index) == 0:
+        return numpy.empty(0, dtype="float64"), numpy.empty(0, dtype=bool)
+
+    text = "\n".join(values.tolist())
+    # Valores com quebras de linha desalinhariam o texto, então os espaços são removidos célula a célula nesse caso
+    if text.count("\n") != len(values.index) - 1:
+        text = "\n".join(values.str.replace(r"\s+", "", regex=True).tolist())
+    text = re.sub(r"[^\S\n]+", "", text).replace(",", ".")
+
+    parts = pandas.read_csv(
+        io.StringIO("\n".join(map(";".join, DMS_LINES_PATTERN.findall(text)))),
+        sep=";", header=None, names=["degrees", "minutes", "seconds", "hemisphere"],
+        dtype={"degrees": "float64", "minutes": "float64", "seconds": "float64", "hemisphere": "object"},
+        keep_default_na=False, na_values=[""]
+    )
+    degrees = parts["degrees"].to_numpy()
+    minutes = parts["minutes"].to_numpy()
+    seconds = parts["seconds"].to_numpy()
+
+    positive = parts["hemisphere"].isin(list(hemispheres["positive"])).to_numpy()
+    negative = parts["hemisphere"].isin(list(hemispheres["negative"])).to_numpy()
+
+    with numpy.errstate(invalid="ignore"):
+        errors = (
+            numpy.isnan(degrees)
+            | ~(positive | negative)
+            | (degrees > hemispheres["max_degrees"])
+            | (minutes > 60)
+            | (seconds > 60)
+        )
+
+    decimal = degrees + (minutes / 60) + (seconds / 3600)
+    decimal[negative] *= -1
+    decimal[errors] = numpy.nan
+
+    return decimal, errors
@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import json
+import os
+
+from model import DataHandler, resolve_crs_key
+
+# Formatos de saída suportados pela conversão em blocos de arquivos CSV (ver DataHandler.convert_csv_file)
+CHUNKED_OUTPUT_FORMATS = ("gpkg", "shp", "csv")
+# Etapas que podem ser executadas em blocos, na conversão de arquivos CSV sem carregá-los inteiros na memória
+STREAMABLE_STEPS = ("set_geometry", "reproject", "export")
+# Etapas aceitas nas receitas (ver Pipeline.to_recipe) e versão do formato das receitas
+RECIPE_STEPS = ("select", "drop", "rename", "cast", "optimize_dtypes", "merge_sheets", "set_geometry", "reproject",
+                "save_coordinates", "export")
+RECIPE_VERSION = 1
+
+
+class Pipeline:
+    """
+    Sequência de etapas de conversão (leitura → seleção/renomeação/exclusão de colunas → conversão de tipos de dado →
+    definição da geometria → reprojeção → exportação) sobre um DataHandler, para uso em scripts e notebooks sem a
+    interface gráfica. Os métodos apenas registram as etapas e retornam o próprio objeto, para que possam ser
+    encadeados, e nada é lido ou calculado até que run seja chamado. Ex:
+
+        Pipeline.read("pontos.xlsx").cast("Amostras", "Integer").set_geometry("Longitude", "Latitude", "EPSG:4674")
+            .reproject("EPSG:31982").export("pontos.gpkg").run()
+
+    Antes da execução, as etapas são fundidas quando possível (ver plan): seleções de colunas são feitas já na leitura,
+    conversões de tipo de colunas diferentes viram uma só quando separadas apenas por etapas que não envolvem as colunas
+    convertidas (conversões sucessivas de uma mesma coluna são mantidas em sequência), conversões de colunas excluídas
+    logo em seguida são descartadas, exclusões consecutivas viram uma só e reprojeções consecutivas são compostas em
+    uma única transformação. Os dados são tratados (DataHandler.process_data) na leitura.
+
+    Um pipeline pode ser salvo como uma receita em JSON (ver to_recipe), sem os caminhos dos arquivos, e repetido sobre
+    outros arquivos (ver from_recipe). A interface grava as ações do usuário como uma receita.
+    """
+    def __init__(self, path: str, sheet: str | int = 0, decimal: str = ',', usecols: list[str] | None = None,
+                 arrow: bool = False, engine: str = "auto", chunksize: int | None = None):
+        self.source = {"path": path, "sheet": sheet, "decimal": decimal, "usecols": usecols, "engine": engine,
+                       "chunksize": chunksize}
+        self.arrow = arrow
+        self.steps = []
+        self.exported = {}
+
+    @classmethod
+    def read(cls, path: str, sheet: str | int = 0, decimal: str = ',', usecols: list[str] | None = None,
+             arrow: bool = False, engine: str = "auto", chunksize: int | None = None) -> "Pipeline":
+        """
+        Cria um pipeline a partir de uma tabela (xlsx, xlsm, ods ou csv).
+        :param path: Caminho do arquivo.
+        :param sheet: O nome ou índice da planilha (para arquivos do Excel/OpenDocument).
+        :param decimal: O separador decimal (para arquivos CSV).
+        :param usecols: Se informado, lê apenas as colunas com esses rótulos.
+        :param arrow: Se True, as colunas são baseadas no pyarrow (ver DataHandler).
+        :param engine: O motor de leitura de planilhas (ver get_excel_engine).
+        :param chunksize: Se informado, arquivos CSV são convertidos em blocos com esse número de linhas, sem carregá-los inteiros na memória (ver DataHandler.convert_csv_file). Só é suportado para pipelines com as etapas set_geometry, reproject e uma única export para gpkg, shp ou csv.
+        :return: O pipeline.
+        """
+        return cls(path, sheet, decimal, usecols, arrow, engine, chunksize)
+
+    def select(self, columns: list[str]) -> "Pipeline":
+        """
+        Mantém apenas as colunas informadas. Seleções feitas antes de qualquer outra etapa são aplicadas já na leitura.
+        :param columns: Os rótulos das colunas.
+        :return: O pipeline.
+        """
+        self.steps.append(("select", {"columns": list(columns)}))
+        return self
+
+    def drop(self, *columns: str) -> "Pipeline":
+        """
+        Exclui colunas.
+        :param columns: Os rótulos das colunas.
+        :return: O pipeline.
+        """
+        self.steps.append(("drop", {"columns": list(columns)}))
+        return self
+
+    def rename(self, mapping: dict[str, str]) -> "Pipeline":
+        """
+        Renomeia colunas.
+        :param mapping: Dicionário {nome atual: novo nome}.
+        :return: O pipeline.
+        """
+        self.steps.append(("rename", {"mapping": dict(mapping)}))
+        return self
+
+    def cast(self, column: str, dtype_key: str, **kwargs) -> "Pipeline":
+        """
+        Muda o tipo de dado de uma coluna (ver DataHandler.change_column_dtype).
+        :param column: O nome da coluna.
+        :param dtype_key: O tipo de dado de destino (String, Integer, Float, Boolean ou Datetime).
+        :param kwargs: true_key e false_key (para Boolean) ou datetime_format (para Datetime).
+        :return: O pipeline.
+        """
+        self.steps.append(("cast", {"columns": {column: (dtype_key, kwargs)}}))
+        return self
+
+    def optimize_dtypes(self) -> "Pipeline":
+        """
+        Converte as colunas para tipos de dado mais compactos (ver DataHandler.optimize_dtypes).
+        :return: O pipeline.
+        """
+        self.steps.append(("optimize_dtypes", {}))
+        return self
+
+    def merge_sheets(self, merge_column: str) -> "Pipeline":
+        """
+        Mescla as demais planilhas do arquivo à planilha lida, por uma coluna de ID (ver DataHandler.merge_sheets).
+        :param merge_column: A coluna identificadora.
+        :return: O pipeline.
+        """
+        self.steps.append(("merge_sheets", {"column": merge_column}))
+        return self
+
+    def set_geometry(self, x_column: str, y_column: str, crs: str = "EPSG:4674", z_column: str | None = None,
+                     dms: bool = False, validate: bool = True) -> "Pipeline":
+        """
+        Define as colunas de coordenadas e o SRC dos pontos (ver DataHandler.set_geodataframe_geometry).
+        :param x_column: O rótulo da coluna das coordenadas x.
+        :param y_column: O rótulo da coluna das coordenadas y.
+        :param crs: O SRC das coordenadas. Ex: "EPSG:4674", "4674" ou "SIRGAS 2000 (EPSG:4674)" (ver resolve_crs_key).
+        :param z_column: O rótulo da coluna das coordenadas z (opcional).
+        :param dms: True se as coordenadas estiverem em graus, minutos e segundos.
+        :param validate: Se True, verifica se as coordenadas são válidas para o SRC (ver DataHandler.validate_coordinates_columns).
+        :return: O pipeline.
+        """
+        self.steps.append(("set_geometry", {"x": x_column, "y": y_column, "z": z_column,
+                                            "crs_key": resolve_crs_key(crs), "dms": dms, "validate": validate}))
+        return self
+
+    def reproject(self, crs: str) -> "Pipeline":
+        """
+        Reprojeta os pontos para outro SRC (ver DataHandler.reproject_geodataframe).
+        :param crs: O SRC de destino. Ex: "EPSG:31982" (ver resolve_crs_key).
+        :return: O pipeline.
+        """
+        self.steps.append(("reproject", {"crs_key": resolve_crs_key(crs)}))
+        return self
+
+    def save_coordinates(self, x_column: str, y_column: str, z_column: str | None = None) -> "Pipeline":
+        """
+        Salva as coordenadas atuais dos pontos em colunas (ver DataHandler.save_coordinates_as_columns).
+        :param x_column: O rótulo da coluna para as coordenadas x.
+        :param y_column: O rótulo da coluna para as coordenadas y.
+        :param z_column: O rótulo da coluna para as coordenadas z (apenas para pontos 3D).
+        :return: O pipeline.
+        """
+        self.steps.append(("save_coordinates", {"x": x_column, "y": y_column, "z": z_column}))
+        return self
+
+    def export(self, path: str, layer_name: str = "pontos") -> "Pipeline":
+        """
+        Exporta os dados para um arquivo vetorial ou tabela (ver DataHandler.export_geodataframe).
+        :param path: Caminho do arquivo de saída.
+        :param layer_name: Nome da camada (para arquivos geopackage).
+        :return: O pipeline.
+        """
+        self.steps.append(("export", {"path": path, "layer_name": layer_name}))
+        return self
+
+    def plan(self) -> (dict, list[tuple[str, dict]]):
+        """
+        Funde as etapas registradas, sem executá-las.
+        :return: Os parâmetros de leitura e a lista de etapas fundidas, no formato (nome da etapa, parâmetros).
+        """
+        source = dict(self.source)
+        steps = []
+
+        for name, params in self.steps:
+            previous = steps[-1] if steps else (None, {})
+
+            if name == "select" and not steps:
+                # Seleções antes de qualquer outra etapa são feitas na leitura
+                usecols = source["usecols"]
+                source["usecols"] = [c for c in params["columns"] if usecols is None or c in usecols]
+            elif name == "cast":
+                # Procura uma conversão anterior, de outras colunas, separada desta apenas por etapas que não envolvem
+                # as colunas. Conversões sucessivas de uma mesma coluna são mantidas em sequência, já que converter
+                # direto para o último tipo não dá o mesmo resultado (ex: Boolean com true_key e depois Integer)
+                position, columns = self._find_previous_cast(steps, params["columns"])
+                if position is None:
+                    steps.append((name, params))
+                else:
+                    steps[position] = ("cast", {"columns": {**steps[position][1]["columns"], **columns}})
+            elif name == "drop" and previous[0] in ("drop", "cast"):
+                if previous[0] == "drop":
+                    steps[-1] = ("drop", {"columns": previous[1]["columns"] + params["columns"]})
+                    continue
+                # Não converte colunas que serão excluídas em seguida
+                casts = {c: v for c, v in previous[1]["columns"].items() if c not in params["columns"]}
+                if casts:
+                    steps[-1] = ("cast", {"columns": casts})
+                else:
+                    steps.pop()
+                steps.append((name, params))
+            elif name == "reproject" and previous[0] == "reproject":
+                steps[-1] = (name, params)
+            else:
+                steps.append((name, params))
+
+        return source, steps
+
+    @staticmethod
+    def _find_previous_cast(steps: list[tuple[str, dict]], columns: dict) -> (int | None, dict):
+        # Volta pelas etapas enquanto a conversão puder ser feita antes delas: renomeações (usando os nomes anteriores
+        # das colunas), exclusões e etapas de coordenadas que não envolvem as colunas convertidas e reprojeções. A
+        # conversão só é fundida a uma conversão anterior que não envolva nenhuma das mesmas colunas
+        for position in range(len(steps) - 1, -1, -1):
+            name, params = steps[position]
+            if name == "cast":
+                if any(c in params["columns"] for c in columns):
+                    break
+                return position, columns
+            elif name == "rename":
+                inverse = {new: old for old, new in params["mapping"].items()}
+                if any(c in params["mapping"] and c not in inverse for c in columns):
+                    break
+                columns = {inverse.get(c, c): v for c, v in columns.items()}
+            elif name in ("drop", "set_geometry", "save_coordinates"):
+                used = params["columns"] if name == "drop" else (params["x"], params["y"], params["z"])
+                if any(c in used for c in columns):
+                    break
+            elif name != "reproject":
+                break
+        return None, columns
+
+    def explain(self) -> str:
+        """
+        :return: Texto com as etapas fundidas que serão executadas, uma por linha.
+        """
+        source, steps = self.plan()
+        lines = [f"read({source['path']}" + (f", usecols={source['usecols']}" if source["usecols"] else "") + ")"]
+        for name, params in steps:
+            if name == "cast":
+                lines.append(f"cast({', '.join(f'{c} → {key}' for c, (key, _) in params['columns'].items())})")
+            else:
+                lines.append(f"{name}({', '.join(f'{k}={v}' for k, v in params.items())})")
+        return "\n".join(lines)
+
+    def run(self) -> DataHandler:
+        """
+        Executa o pipeline em um novo DataHandler. O número de linhas gravadas em cada arquivo de saída fica no
+        atributo "exported" ({caminho: linhas}).
+        :return: O DataHandler com os dados resultantes. Na conversão em blocos, contém apenas o último bloco.
+        """
+        source, steps = self.plan()
+        handler = DataHandler(arrow=self.arrow)
+        self.exported = {}
+
+        if source["chunksize"] is not None and source["path"].lower().endswith(".csv"):
+            self._run_chunked(handler, source, steps)
+            return handler
+
+        if source["path"].lower().endswith(".csv"):
+            handler.read_csv_file(source["path"], source["decimal"], usecols=source["usecols"])
+        else:
+            handler.read_excel_file(source["path"], source["engine"])
+            handler.read_excel_sheet(source["sheet"], usecols=source["usecols"])
+
+        for name, params in steps:
+            if name == "select":
+                self._drop(handler, [c for c in handler.gdf.columns if c not in params["columns"]])
+            elif name == "drop":
+                self._drop(handler, params["columns"])
+            elif name == "rename":
+                for column, new_name in params["mapping"].items():
+                    handler.rename_column(column, new_name)
+            elif name == "cast":
+                for column, (dtype_key, kwargs) in params["columns"].items():
+                    handler.change_column_dtype(column, dtype_key, **kwargs)
+            elif name == "optimize_dtypes":
+                handler.optimize_dtypes()
+            elif name == "merge_sheets":
+                if handler.excel_file is None:
+                    raise ValueError("A mesclagem de planilhas só é possível em arquivos xlsx, xlsm e ods.")
+                handler.merge_sheets(params["column"])
+            elif name == "set_geometry":
+                coordinates_columns = [c for c in (params["x"], params["y"], params["z"]) if c is not None]
+                missing = [c for c in coordinates_columns if c not in handler.gdf.columns]
+                if missing:
+                    raise ValueError(f"Coluna(s) não encontrada(s) no arquivo: {', '.join(missing)}.")
+                if params["validate"]:
+                    handler.validate_coordinates_columns(params["crs_key"], params["x"], params["y"], params["z"],
+                                                         params["dms"])
+                handler.set_geodataframe_geometry(params["crs_key"], params["x"], params["y"], params["z"],
+                                                  params["dms"])
+            elif name == "reproject":
+                if handler.points is None:
+                    raise ValueError("Defina a geometria (set_geometry) antes de reprojetar os pontos.")
+                handler.reproject_geodataframe(params["crs_key"])
+            elif name == "save_coordinates":
+                if handler.points is None:
+                    raise ValueError("Defina a geometria (set_geometry) antes de salvar as coordenadas.")
+                handler.save_coordinates_as_columns(params["x"], params["y"], params["z"])
+            elif name == "export":
+                handler.export_geodataframe(params["path"], params["layer_name"])
+                self.exported[params["path"]] = len(handler.gdf.index)
+
+        return handler
+
+    def is_streamable(self) -> bool:
+        """
+        Verifica se o pipeline pode ser executado em blocos (ver o argumento chunksize de read): a fonte deve ser um
+        arquivo CSV e as etapas devem ser apenas set_geometry, reproject e uma única export, para gpkg, shp ou csv.
+        :return: True ou False.
+        """
+        source, steps = self.plan()
+        names = [name for name, _ in steps]
+        exports = [params for name, params in steps if name == "export"]
+        return (source["path"].lower().endswith(".csv") and all(name in STREAMABLE_STEPS for name in names)
+                and "set_geometry" in names and len(exports) == 1 and names[-1] == "export"
+                and exports[0]["path"].rsplit(".", 1)[-1] in CHUNKED_OUTPUT_FORMATS)
+
+    def _run_chunked(self, handler: DataHandler, source: dict, steps: list[tuple[str, dict]]) -> None:
+        exports = [params for name, params in steps if name == "export"]
+        if not self.is_streamable():
+            raise ValueError(f"A conversão em blocos só é suportada com as etapas {', '.join(STREAMABLE_STEPS)} e uma "
+                             f"única exportação para {', '.join(CHUNKED_OUTPUT_FORMATS)}.")
+
+        geometry = next(params for name, params in steps if name == "set_geometry")
+        reprojections = [params for name, params in steps if name == "reproject"]
+        output_path = exports[0]["path"]
+        self.exported[output_path] = handler.convert_csv_file(
+            source["path"], output_path, geometry["crs_key"], geometry["x"], geometry["y"], geometry["z"],
+            geometry["dms"], reprojections[-1]["crs_key"] if reprojections else None, exports[0]["layer_name"],
+            source["decimal"], source["chunksize"], source["usecols"])
+
+    @staticmethod
+    def _drop(handler: DataHandler, columns: list[str]) -> None:
+        handler.gdf.drop(columns=columns, inplace=True)
+        handler.invalidate_column_profiles(*columns)
+
+    def to_recipe(self) -> dict:
+        """
+        Converte o pipeline em uma receita: um dicionário serializável em JSON com as opções de leitura e as etapas,
+        sem os caminhos dos arquivos, para ser repetido sobre outros arquivos (ver from_recipe). Das exportações, são
+        guardados apenas o formato e o nome da camada.
+        :return: A receita.
+        """
+        source = {k: v for k, v in self.source.items() if k not in ("path", "chunksize")}
+        steps = []
+        for name, params in self.steps:
+            if name == "export":
+                params = {"format": os.path.splitext(params["path"])[1][1:].lower(), "layer_name": params["layer_name"]}
+            elif name == "cast":
+                params = {"columns": {c: [key, kwargs] for c, (key, kwargs) in params["columns"].items()}}
+            steps.append([name, params])
+        return {"table2spatial_recipe": RECIPE_VERSION, "source": source, "arrow": self.arrow, "steps": steps}
+
+    def save_recipe(self, path: str) -> None:
+        """
+        Salva o pipeline como uma receita em um arquivo JSON (ver to_recipe).
+        :param path: Caminho do arquivo.
+        :return: Nada.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_recipe(), file, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def load_recipe(path: str) -> dict:
+        """
+        Lê uma receita salva com save_recipe.
+        :param path: Caminho do arquivo JSON.
+        :return: A receita.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            recipe = json.load(file)
+        if not isinstance(recipe, dict) or recipe.get("table2spatial_recipe") != RECIPE_VERSION:
+            raise ValueError(f"O arquivo {path} não é uma receita do table2spatial (versão {RECIPE_VERSION}).")
+        unknown = [name for name, _ in recipe["steps"] if name not in RECIPE_STEPS]
+        if unknown:
+            raise ValueError(f"Etapa(s) desconhecida(s) na receita: {', '.join(unknown)}.")
+        return recipe
+
+    @classmethod
+    def from_recipe(cls, recipe: dict, path: str, output_path: str | None = None, output_format: str | None = None,
+                    layer_name: str | None = None, arrow: bool | None = None) -> "Pipeline":
+        """
+        Cria um pipeline que repete uma receita (ver to_recipe) sobre um arquivo.
+        :param recipe: A receita.
+        :param path: Caminho do arquivo de entrada.
+        :param output_path: Caminho do arquivo de saída. Se a receita exportar para mais de um formato, cada exportação usa esse caminho com a extensão do seu formato. Se None, os arquivos de saída ficam ao lado do arquivo de entrada (ver get_output_path).
+        :param output_format: Se informado, substitui o formato de todas as exportações da receita.
+        :param layer_name: Se informado, substitui o nome da camada de todas as exportações da receita.
+        :param arrow: Se informado, substitui a opção arrow da receita.
+        :return: O pipeline.
+        """
+        source = recipe["source"]
+        pipeline = cls(path, source.get("sheet", 0), source.get("decimal", ","), source.get("usecols"),
+                       recipe.get("arrow", False) if arrow is None else arrow, source.get("engine", "auto"))
+
+        steps = [(name, dict(params)) for name, params in recipe["steps"]]
+        if not any(name == "export" for name, _ in steps):
+            steps.append(("export", {"format": output_format or "gpkg", "layer_name": layer_name or "pontos"}))
+
+        for name, params in steps:
+            if name == "export":
+                export_format = output_format or params["format"]
+                if output_path is not None:
+                    export_path = f"{os.path.splitext(output_path)[0]}.{export_format}"
+                else:
+                    export_path = get_output_path(path, export_format)
+                params = {"path": export_path, "layer_name": layer_name or params["layer_name"]}
+            elif name == "cast":
+                params = {"columns": {c: (key, dict(kwargs)) for c, (key, kwargs) in params["columns"].items()}}
+            pipeline.steps.append((name, params))
+        return pipeline
+
+
+def get_recipe_output_format(recipe: dict) -> str:
+    """
+    Retorna o formato da primeira exportação de uma receita (ver Pipeline.to_recipe).
+    :param recipe: A receita.
+    :return: O formato (extensão, sem o ponto). Se a receita não exporta, "gpkg".
+    """
+    return next((params["format"] for name, params in recipe["steps"] if name == "export"), "gpkg")
+
+
+def get_output_path(path: str, output_format: str, output_dir: str | None = None) -> str:
+    """
+    Monta o caminho do arquivo de saída a partir do arquivo de entrada.
+    :param path: Caminho do arquivo de entrada.
+    :param output_format: O formato de saída (extensão, sem o ponto).
+    :param output_dir: Pasta dos arquivos de saída. Se None, usa a pasta do arquivo de entrada.
+    :return: O caminho do arquivo de saída.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(output_dir or os.path.dirname(path), f"{stem}.{output_format}")
+    if os.path.abspath(output_path) == os.path.abspath(path):
+        output_path = os.path.join(output_dir or os.path.dirname(path), f"{stem}_pontos.{output_format}")
+    return output_path
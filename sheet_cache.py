@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import threading
+import pandas
+from collections import OrderedDict
+
+# Limites padrão do cache de planilhas
+SHEET_CACHE_MAX_BYTES = 512 * 1024 ** 2
+SHEET_CACHE_MAX_SIZE = 32
+
+
+class SheetCache:
+    """
+    Cache LRU de planilhas já lidas (DataFrames), limitado pelo número de planilhas e pela memória ocupada. Quando um
+    dos limites é ultrapassado, as planilhas usadas há mais tempo são descartadas. O cache guarda e devolve cópias
+    rasas dos DataFrames, que compartilham os dados das colunas: o DataHandler sempre substitui colunas inteiras em vez
+    de alterar seus valores (ver history.Snapshot), então as edições feitas nos dados carregados não alteram a versão
+    guardada, e uma planilha nunca ocupa o dobro da memória por estar no cache.
+    """
+    def __init__(self, max_bytes: int = SHEET_CACHE_MAX_BYTES, max_size: int = SHEET_CACHE_MAX_SIZE):
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._sheets = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, sheet: str) -> bool:
+        with self._lock:
+            return sheet in self._sheets
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sheets)
+
+    @property
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, sheet: str, nrows: int | None = None) -> pandas.DataFrame | None:
+        """
+        Retorna uma cópia rasa da planilha guardada no cache.
+        :param sheet: O nome da planilha.
+        :param nrows: Se informado, retorna apenas as primeiras linhas da planilha.
+        :return: O DataFrame da planilha, ou None caso ela não esteja no cache.
+        """
+        with self._lock:
+            df = self._sheets.get(sheet)
+            if df is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._sheets.move_to_end(sheet)
+        if nrows is not None:
+            df = df.head(nrows)
+        return df.copy(deep=False)
+
+    def put(self, sheet: str, df: pandas.DataFrame) -> bool:
+        """
+        Guarda uma cópia rasa da planilha no cache, descartando as planilhas usadas há mais tempo caso necessário.
+        Planilhas maiores que o limite de memória do cache não são guardadas.
+        :param sheet: O nome da planilha.
+        :param df: O DataFrame da planilha.
+        :return: True se a planilha foi guardada, False caso contrário.
+        """
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return False
+
+        df = df.copy(deep=False)
+        with self._lock:
+            self._sheets[sheet] = df
+            self._sizes[sheet] = size
+            self._sheets.move_to_end(sheet)
+            while len(self._sheets) > self.max_size or sum(self._sizes.values()) > self.max_bytes:
+                evicted, _ = self._sheets.popitem(last=False)
+                del self._sizes[evicted]
+        return True
+
+    def has_room_for(self, size: int) -> bool:
+        """
+        Verifica se uma planilha de determinado tamanho cabe no cache sem descartar nenhuma outra.
+        :param size: O tamanho da planilha, em bytes.
+        :return: True ou False.
+        """
+        with self._lock:
+            return len(self._sheets) < self.max_size and sum(self._sizes.values()) + size <= self.max_bytes
+
+    def stats(self) -> dict[str, int]:
+        """
+        Retorna os contadores de acertos e falhas do cache, o número de planilhas e a memória ocupada.
+        :return: Dicionário no formato {"hits": ..., "misses": ..., "size": ..., "bytes": ...}.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._sheets),
+                    "bytes": sum(self._sizes.values())}
+
+    def clear(self) -> None:
+        """
+        Esvazia o cache e zera os contadores.
+        :return: Nada.
+        """
+        with self._lock:
+            self._sheets.clear()
+            self._sizes.clear()
+            self.hits = 0
+            self.misses = 0
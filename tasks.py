@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6 import QtCore, QtWidgets
+
+
+class TaskCancelled(Exception):
+    """
+    Levantada dentro da tarefa, na próxima chamada de progresso, depois que o usuário pede o cancelamento.
+    """
+
+
+class TaskSignals(QtCore.QObject):
+    """
+    Sinais emitidos pela tarefa (na thread de trabalho) e entregues na thread da interface.
+    """
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+
+
+class Task:
+    """
+    Executa uma função em uma thread de trabalho. A função recebe o argumento "progress", uma função a ser chamada com
+    (feito, total) a cada bloco processado, que também é o ponto de cancelamento: depois que cancel é chamado, a
+    próxima chamada de progresso levanta TaskCancelled, interrompendo a função. Se a função terminar sem passar por
+    outro ponto de progresso, a tarefa termina normalmente.
+    """
+    def __init__(self, function):
+        self.function = function
+        self.signals = TaskSignals()
+        self.is_cancelled = False
+
+    def cancel(self) -> None:
+        self.is_cancelled = True
+
+    def report_progress(self, done: int, total: int) -> None:
+        if self.is_cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(int(done), int(total))
+
+    def run(self) -> None:
+        try:
+            result = self.function(progress=self.report_progress)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:
+            self.signals.failed.emit(error)
+        else:
+            # Um cancelamento pedido depois do último ponto de progresso chega tarde demais: a função já terminou e
+            # alterou os dados, então o resultado é entregue normalmente
+            self.signals.finished.emit(result)
+
+
+class TaskRunner:
+    """
+    Executa as operações pesadas do DataHandler fora da thread da interface, uma de cada vez, mostrando um diálogo de
+    progresso com botão de cancelar. Enquanto uma tarefa está em andamento (atributo "busy"), novas tarefas são
+    recusadas, e o controlador também recusa edições dos dados. As tarefas rodam em uma thread do Python, e não do
+    QThreadPool: nas threads criadas pelo Qt, o estado por thread do Python (threading.local) é descartado ao fim de
+    cada execução, o que derruba o pyproj, que guarda assim os objetos do PROJ de cada thread.
+    """
+    def __init__(self, parent: QtWidgets.QMainWindow = None):
+        self.parent = parent
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="table2spatial-task")
+        self.future = None
+        self.task = None
+        self.dialog = None
+
+    @property
+    def busy(self) -> bool:
+        return self.task is not None
+
+    def start(self, function, message: str, on_finished=None, on_failed=None, on_cancelled=None) -> bool:
+        """
+        Inicia uma tarefa em segundo plano.
+        :param function: A função a ser executada. Deve aceitar o argumento "progress" (ver Task).
+        :param message: Mensagem exibida no diálogo de progresso.
+        :param on_finished: Função chamada na thread da interface com o retorno da função.
+        :param on_failed: Função chamada na thread da interface com a exceção levantada pela função.
+        :param on_cancelled: Função chamada na thread da interface caso a tarefa seja cancelada.
+        :return: True se a tarefa foi iniciada, False se já havia outra em andamento.
+        """
+        if self.busy:
+            return False
+
+        self.task = Task(function)
+
+        # O diálogo só aparece se a tarefa demorar mais que meio segundo. Até ter um progresso, fica indeterminado
+        self.dialog = QtWidgets.QProgressDialog(message, "Cancelar", 0, 0, self.parent)
+        self.dialog.setWindowTitle("Processando")
+        self.dialog.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
+        self.dialog.setMinimumDuration(500)
+        self.dialog.setAutoClose(False)
+        self.dialog.setAutoReset(False)
+        self.dialog.canceled.connect(self.cancel)
+
+        self.task.signals.progress.connect(self.update_progress)
+        self.task.signals.finished.connect(lambda result: self.finish(on_finished, result))
+        self.task.signals.failed.connect(lambda error: self.finish(on_failed, error))
+        self.task.signals.cancelled.connect(lambda: self.finish(on_cancelled))
+
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CursorShape.BusyCursor)
+        self.future = self.executor.submit(self.task.run)
+        return True
+
+    def update_progress(self, done: int, total: int) -> None:
+        if self.dialog is None:
+            return
+        self.dialog.setMaximum(max(total, 1))
+        self.dialog.setValue(min(done, max(total, 1)))
+
+    def cancel(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.dialog.setLabelText("Cancelando...")
+
+    def finish(self, callback, *args) -> None:
+        QtWidgets.QApplication.restoreOverrideCursor()
+        self.dialog.canceled.disconnect(self.cancel)
+        self.dialog.close()
+        self.dialog.deleteLater()
+        self.task, self.dialog = None, None
+        if callback is not None:
+            callback(*args)
+
+    def wait(self) -> None:
+        """
+        Espera a tarefa em andamento terminar e entrega seus sinais à interface.
+        :return: Nada.
+        """
+        if self.future is not None:
+            self.future.result()
+        QtCore.QCoreApplication.processEvents()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Uso (a partir da raiz do repositório): python -m pytest tests
+
+import os
+import numpy
+import pandas
+import geopandas
+import pytest
+
+import model
+from model import DataHandler, get_gpkg_layers
+
+N_ROWS = 1000
+
+
+class Cancelled(Exception):
+    pass
+
+
+def cancel_at(rows: int):
+    def progress(done, total):
+        if done >= rows:
+            raise Cancelled()
+    return progress
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "PROGRESS_CHUNK_SIZE", 100)
+    path = str(tmp_path / "pontos.csv")
+    pandas.DataFrame({"lon": numpy.linspace(-48, -49, N_ROWS), "lat": numpy.linspace(-27, -28, N_ROWS),
+                      "valor": range(N_ROWS)}).to_csv(path, sep=";", decimal=",", index=False)
+    handler = DataHandler()
+    handler.read_csv_file(path)
+    handler.set_geodataframe_geometry("SIRGAS 2000 (EPSG:4674)", "lon", "lat")
+    return handler
+
+
+def test_shapefile_export_keeps_files_with_same_name(handler, tmp_path):
+    (tmp_path / "pontos.gpkg").write_bytes(b"gpkg")
+    handler.export_geodataframe(str(tmp_path / "pontos.shp"))
+
+    assert len(geopandas.read_file(tmp_path / "pontos.shp")) == N_ROWS
+    assert (tmp_path / "pontos.csv").exists()
+    assert (tmp_path / "pontos.gpkg").read_bytes() == b"gpkg"
+
+
+def test_cancelled_shapefile_export_keeps_files_with_same_name(handler, tmp_path):
+    (tmp_path / "pontos.gpkg").write_bytes(b"gpkg")
+    with pytest.raises(Cancelled):
+        handler.export_geodataframe(str(tmp_path / "pontos.shp"), progress=cancel_at(300))
+
+    assert sorted(os.listdir(tmp_path)) == ["pontos.csv", "pontos.gpkg"]
+    assert (tmp_path / "pontos.gpkg").read_bytes() == b"gpkg"
+
+
+def test_cancelled_shapefile_overwrite_keeps_previous_file(handler, tmp_path):
+    path = str(tmp_path / "saida.shp")
+    handler.export_geodataframe(path)
+    with pytest.raises(Cancelled):
+        handler.export_geodataframe(path, progress=cancel_at(300))
+
+    assert len(geopandas.read_file(path)) == N_ROWS
+    assert not [f for f in os.listdir(tmp_path) if ".tmp" in f]
+
+
+def test_cancelled_gpkg_layer_overwrite_keeps_layers(handler, tmp_path):
+    path = str(tmp_path / "saida.gpkg")
+    handler.export_geodataframe(path, "a")
+    handler.export_geodataframe(path, "b")
+    with pytest.raises(Cancelled):
+        handler.export_geodataframe(path, "b", progress=cancel_at(300))
+
+    assert sorted(get_gpkg_layers(path)) == ["a", "b"]
+    assert len(geopandas.read_file(path, layer="a")) == N_ROWS
+    assert len(geopandas.read_file(path, layer="b")) == N_ROWS
+    assert not [f for f in os.listdir(tmp_path) if ".tmp" in f]
+
+
+def test_gpkg_layer_overwrite_keeps_other_layers(handler, tmp_path):
+    path = str(tmp_path / "saida.gpkg")
+    handler.export_geodataframe(path, "a")
+    handler.export_geodataframe(path, "b")
+    handler.export_geodataframe(path, "b", progress=lambda done, total: None)
+
+    assert sorted(get_gpkg_layers(path)) == ["a", "b"]
+    assert len(geopandas.read_file(path, layer="b")) == N_ROWS
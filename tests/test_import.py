@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Uso (a partir da raiz do repositório): python -m pytest tests
+
+import numpy
+import pandas
+import pytest
+
+import model
+from model import DataHandler, PREVIEW_ROWS
+
+N_ROWS = 5000
+
+
+class Cancelled(Exception):
+    pass
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "PROGRESS_CHUNK_SIZE", 500)
+    path = str(tmp_path / "pontos.csv")
+    pandas.DataFrame({"lon": numpy.linspace(-48, -49, N_ROWS), "lat": numpy.linspace(-27, -28, N_ROWS),
+                      "valor": range(N_ROWS)}).to_csv(path, sep=";", decimal=",", index=False)
+    return path
+
+
+def test_cancelled_load_full_table_keeps_preview(csv_path):
+    handler = DataHandler()
+    handler.read_csv_file(csv_path, nrows=PREVIEW_ROWS, usecols=["lon", "lat"])
+    assert handler.preview
+
+    def progress(done, total):
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        handler.load_full_table(progress)
+    assert handler.preview
+    assert len(handler.gdf.index) == PREVIEW_ROWS
+
+    handler.load_full_table(lambda done, total: None)
+    assert not handler.preview
+    assert len(handler.gdf.index) == N_ROWS
+    assert list(handler.gdf.columns) == ["lon", "lat"]
+
+
+def test_failed_csv_read_keeps_current_table(csv_path, tmp_path):
+    handler = DataHandler()
+    handler.read_csv_file(csv_path, nrows=PREVIEW_ROWS)
+
+    with pytest.raises(FileNotFoundError):
+        handler.read_csv_file(str(tmp_path / "inexistente.csv"), progress=lambda done, total: None)
+    assert handler.preview
+    assert handler.csv_path == csv_path
+
+    handler.load_full_table()
+    assert len(handler.gdf.index) == N_ROWS
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_read_files_reports_progress_and_stops_on_cancel(csv_path, tmp_path, workers):
+    paths = [csv_path, str(tmp_path / "inexistente.csv"), csv_path]
+    calls = []
+    tables, report = DataHandler().read_files(paths, workers=workers, progress=lambda done, total: calls.append(done))
+    assert calls == [1, 2, 3]
+    assert len(tables) == 2
+    assert [entry["error"] is None for entry in report] == [True, False, True]
+
+    def progress(done, total):
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        DataHandler().read_files(paths, workers=workers, progress=progress)
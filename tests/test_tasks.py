@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+# Uso (a partir da raiz do repositório): python -m pytest tests
+
+from tasks import Task
+
+
+def run(task: Task) -> list:
+    emitted = []
+    task.signals.finished.connect(lambda result: emitted.append(("finished", result)))
+    task.signals.failed.connect(lambda error: emitted.append(("failed", error)))
+    task.signals.cancelled.connect(lambda: emitted.append(("cancelled", None)))
+    task.run()
+    return emitted
+
+
+def test_cancel_before_progress_point_cancels():
+    def function(progress):
+        task.cancel()
+        progress(1, 2)
+        return "resultado"
+
+    task = Task(function)
+    assert run(task) == [("cancelled", None)]
+
+
+def test_cancel_after_last_progress_point_finishes():
+    def function(progress):
+        progress(2, 2)
+        task.cancel()
+        return "resultado"
+
+    task = Task(function)
+    assert run(task) == [("finished", "resultado")]
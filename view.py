@@ -1,13 +1,20 @@
 # -*- coding: utf-8 -*-
 """ @author: Gabriel Maccari """
 
+import numpy
+import pandas
 from PyQt6 import QtWidgets, QtGui, QtCore
 from platform import platform
 
-from model import DTYPES_DICT, get_dtype_key
+from model import DTYPES_DICT, get_dtype_key, format_bytes
 
 OS = platform()
 
+# Número de valores carregados por vez na lista de valores únicos (ver UniqueValuesModel)
+LIST_FETCH_SIZE = 1000
+# Espera após a digitação antes de filtrar a lista de valores únicos, em milissegundos
+LIST_FILTER_DELAY = 200
+
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
@@ -37,6 +44,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.graph_button = ToolbarButton(self, "Criar gráfico", "graph.png", click_menu=True)
         self.layout.addWidget(self.graph_button, 0, 4, 1, 1)
 
+        # Os ícones de desfazer/refazer vêm do tema do sistema (ou do estilo do Qt, caso o tema não tenha o ícone)
+        undo_icon = QtGui.QIcon.fromTheme(QtGui.QIcon.ThemeIcon.EditUndo, self.style().standardIcon(
+            QtWidgets.QStyle.StandardPixmap.SP_ArrowBack))
+        redo_icon = QtGui.QIcon.fromTheme(QtGui.QIcon.ThemeIcon.EditRedo, self.style().standardIcon(
+            QtWidgets.QStyle.StandardPixmap.SP_ArrowForward))
+        self.undo_button = ToolbarButton(self, "Desfazer (Ctrl+Z)", undo_icon)
+        self.undo_button.setShortcut(QtGui.QKeySequence("Ctrl+Z"))
+        self.layout.addWidget(self.undo_button, 0, 5, 1, 1)
+        self.redo_button = ToolbarButton(self, "Refazer (Ctrl+Y)", redo_icon)
+        self.redo_button.setShortcut(QtGui.QKeySequence("Ctrl+Y"))
+        self.layout.addWidget(self.redo_button, 0, 6, 1, 1)
+        self.recipe_button = ToolbarButton(self, "Salvar as ações feitas na tabela como uma receita, para repeti-las "
+                                                 "em outros arquivos pela linha de comando", "save.png")
+        self.layout.addWidget(self.recipe_button, 0, 7, 1, 1)
+
         self.graph_stereogram_action = self.graph_button.click_menu.addAction("Estereograma")
         self.graph_rosediagram_action = self.graph_button.click_menu.addAction("Diagrama de roseta")
 
@@ -60,8 +82,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.import_stack_layout = QtWidgets.QGridLayout(self.import_stack)
         self.sheet_lbl = QtWidgets.QLabel("Planilha:", self.import_stack)
         self.sheet_cbx = QtWidgets.QComboBox(self.import_stack)
+        self.select_columns_btn = QtWidgets.QPushButton(icon=QtGui.QIcon("icons/list.png"))
+        self.select_columns_btn.setFlat(True)
+        self.select_columns_btn.setToolTip("Selecionar as colunas a serem importadas")
         self.crs_lbl = QtWidgets.QLabel("SRC:", self.import_stack)
         self.crs_cbx = QtWidgets.QComboBox(self.import_stack)
+        self.suggest_crs_btn = QtWidgets.QPushButton(icon=QtGui.QIcon("icons/globe.png"))
+        self.suggest_crs_btn.setFlat(True)
+        self.suggest_crs_btn.setToolTip("Sugerir SRCs com base nas coordenadas das colunas X e Y selecionadas")
         self.coords_lbl = QtWidgets.QLabel("Coordenadas:", self.import_stack)
         self.dms_chk = QtWidgets.QCheckBox("Formato GMS (GG°MM'SS.sss\")", self.import_stack)
         self.x_lbl = QtWidgets.QLabel("X:", self.import_stack)
@@ -79,17 +107,22 @@ class MainWindow(QtWidgets.QMainWindow):
         self.z_ok_icon.setFlat(True)
         self.z_ok_icon.setEnabled(False)
         self.no_coordinates_chk = QtWidgets.QCheckBox("O arquivo não possui coordenadas", self.import_stack)
+        self.optimize_dtypes_chk = QtWidgets.QCheckBox("Otimizar tipos de dados (reduz o uso de memória)", self.import_stack)
+        self.optimize_dtypes_chk.setToolTip("Converte colunas de texto com valores repetidos para categorias e reduz\n"
+                                            "colunas numéricas ao menor tipo que comporta seus valores, sem perdas.")
         self.import_ok_btn = QtWidgets.QPushButton("OK", self.import_stack)
         self.import_cancel_btn = QtWidgets.QPushButton("Cancelar", self.import_stack)
 
         row = 0
         self.import_stack_layout.addWidget(self.sheet_lbl, row, 0, 1, 20)
         row += 1
-        self.import_stack_layout.addWidget(self.sheet_cbx, row, 0, 1, 20)
+        self.import_stack_layout.addWidget(self.sheet_cbx, row, 0, 1, 19)
+        self.import_stack_layout.addWidget(self.select_columns_btn, row, 19, 1, 1)
         row += 1
         self.import_stack_layout.addWidget(self.crs_lbl, row, 0, 1, 20)
         row += 1
-        self.import_stack_layout.addWidget(self.crs_cbx, row, 0, 1, 20)
+        self.import_stack_layout.addWidget(self.crs_cbx, row, 0, 1, 19)
+        self.import_stack_layout.addWidget(self.suggest_crs_btn, row, 19, 1, 1)
         row += 1
         self.import_stack_layout.addWidget(self.coords_lbl, row, 0, 1, 20)
         row += 1
@@ -109,6 +142,8 @@ class MainWindow(QtWidgets.QMainWindow):
         row += 1
         self.import_stack_layout.addWidget(self.no_coordinates_chk, row, 0, 1, 20)
         row += 1
+        self.import_stack_layout.addWidget(self.optimize_dtypes_chk, row, 0, 1, 20)
+        row += 1
         self.import_stack_layout.addWidget(self.import_ok_btn, row, 0, 1, 4)
         self.import_stack_layout.addWidget(self.import_cancel_btn, row, 4, 1, 4)
         row += 1
@@ -189,7 +224,7 @@ class MainWindow(QtWidgets.QMainWindow):
 class ToolbarButton(QtWidgets.QToolButton):
     def __init__(self, parent, tooltip, icon, enabled=False, click_menu=False):
         super().__init__(parent=parent)
-        self.setIcon(QtGui.QIcon(f"icons/{icon}"))
+        self.setIcon(icon if isinstance(icon, QtGui.QIcon) else QtGui.QIcon(f"icons/{icon}"))
         self.setIconSize(QtCore.QSize(30, 30))
         self.setToolTip(tooltip)
         self.setFixedSize(40, 40)
@@ -200,7 +235,7 @@ class ToolbarButton(QtWidgets.QToolButton):
 
 
 class ListRow(QtWidgets.QWidget):
-    def __init__(self, column_name, column_dtype):
+    def __init__(self, column_name, column_dtype, memory=None):
         super().__init__()
 
         self.field = column_name
@@ -208,12 +243,19 @@ class ListRow(QtWidgets.QWidget):
 
         self.column_lbl = QtWidgets.QLabel(self)
         self.column_lbl.setText(self.field)
-        self.column_lbl.setGeometry(5, 0, 225, 30)
+        self.column_lbl.setGeometry(5, 0, 175, 30)
+
+        self.memory_lbl = QtWidgets.QLabel(self)
+        self.memory_lbl.setText(format_bytes(memory) if memory is not None else "")
+        self.memory_lbl.setToolTip("Memória ocupada pela coluna")
+        self.memory_lbl.setStyleSheet("font-size: 7pt; color: gray")
+        self.memory_lbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
+        self.memory_lbl.setGeometry(180, 0, 50, 30)
 
         self.dtype_cbx = QtWidgets.QComboBox(self)
         y = 4 if OS.startswith("Windows") else 2
         h = 22 if OS.startswith("Windows") else 26
-        self.dtype_cbx.setGeometry(240, y, 120, h)
+        self.dtype_cbx.setGeometry(235, y, 120, h)
 
         if self.dtype == "geometry":
             self.dtype_cbx.addItems(["POINT"])
@@ -241,8 +283,88 @@ class ListRow(QtWidgets.QWidget):
         self.context_menu.exec(event.globalPos())
 
 
+class UniqueValuesModel(QtCore.QAbstractListModel):
+    """
+    Modelo da lista de valores únicos de uma coluna, lido sob demanda: a lista recebe os valores em blocos de
+    LIST_FETCH_SIZE à medida que é rolada (ver canFetchMore e fetchMore), então a janela abre no mesmo tempo qualquer
+    que seja o número de valores. O filtro é aplicado de uma vez sobre o array de valores e, quando o novo texto
+    contém o anterior, apenas sobre os valores que já passavam no filtro anterior.
+    """
+    def __init__(self, values, counts=None, parent=None):
+        """
+        :param values: Os valores, já ordenados (ver model.count_column_values).
+        :param counts: O número de linhas com cada valor, mostrado na dica de cada item (opcional).
+        :param parent: O objeto pai.
+        """
+        super().__init__(parent)
+        self.values = numpy.asarray(values, dtype=object)
+        self.counts = counts
+        # Posições dos valores que passam no filtro (None quando não há filtro)
+        self.matches = None
+        self.filter_text = ""
+        self.loaded = min(LIST_FETCH_SIZE, len(self.values))
+        self._lower_values = None
+
+    @property
+    def match_count(self) -> int:
+        return len(self.values) if self.matches is None else len(self.matches)
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.loaded
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        position = index.row() if self.matches is None else self.matches[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return str(self.values[position])
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and self.counts is not None:
+            return f"{self.counts[position]} linha(s)"
+        return None
+
+    def canFetchMore(self, parent) -> bool:
+        return not parent.isValid() and self.loaded < self.match_count
+
+    def fetchMore(self, parent) -> None:
+        count = min(LIST_FETCH_SIZE, self.match_count - self.loaded)
+        if parent.isValid() or count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def set_filter(self, text: str) -> None:
+        """
+        Mostra apenas os valores que contêm o texto, sem diferenciar maiúsculas e minúsculas.
+        :param text: O texto buscado. Vazio para mostrar todos os valores.
+        :return: Nada.
+        """
+        text = text.lower()
+        if text == self.filter_text:
+            return
+
+        if not text:
+            matches = None
+        else:
+            if self._lower_values is None:
+                self._lower_values = pandas.Series(self.values, dtype=object).str.lower()
+            # Se o novo texto contém o anterior, só os valores que já passavam no filtro podem passar no novo
+            if self.matches is not None and self.filter_text in text:
+                candidates = self.matches
+                found = self._lower_values.iloc[candidates].str.contains(text, regex=False).to_numpy(dtype=bool)
+                matches = candidates[found]
+            else:
+                found = self._lower_values.str.contains(text, regex=False).to_numpy(dtype=bool)
+                matches = numpy.flatnonzero(found)
+
+        self.beginResetModel()
+        self.matches, self.filter_text = matches, text
+        self.loaded = min(LIST_FETCH_SIZE, self.match_count)
+        self.endResetModel()
+
+
 class ListWindow(QtWidgets.QMainWindow):
-    def __init__(self, values_list: list[any], has_nan: bool, parent):
+    def __init__(self, values_list: list[any], has_nan: bool, parent, counts=None):
         super(ListWindow, self).__init__(parent)
         self.parent = parent
 
@@ -256,9 +378,28 @@ class ListWindow(QtWidgets.QMainWindow):
 
         self.setCentralWidget(self.widget)
 
-        self.list_wgt = QtWidgets.QListWidget(self)
-        self.list_wgt.addItems(values_list)
-        self.layout.addWidget(self.list_wgt)
+        self.filter_edt = QtWidgets.QLineEdit(self)
+        self.filter_edt.setPlaceholderText("Buscar...")
+        self.filter_edt.setClearButtonEnabled(True)
+        self.layout.addWidget(self.filter_edt)
+
+        # Os valores são carregados sob demanda pelo modelo, em vez de criar um item para cada valor
+        self.list_model = UniqueValuesModel(values_list, counts, self)
+        self.list_view = QtWidgets.QListView(self)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.list_model)
+        self.layout.addWidget(self.list_view)
+
+        self.count_lbl = QtWidgets.QLabel(self)
+        self.layout.addWidget(self.count_lbl)
+        self.update_count_label()
+
+        # O filtro só é aplicado quando a digitação para por um instante
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(LIST_FILTER_DELAY)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edt.textChanged.connect(self.filter_timer.start)
 
         if has_nan:
             self.nan_lbl = QtWidgets.QLabel("Obs: A coluna possui células vazias/nulas.")
@@ -268,6 +409,17 @@ class ListWindow(QtWidgets.QMainWindow):
         self.close_button.clicked.connect(self.close)
         self.layout.addWidget(self.close_button)
 
+    def apply_filter(self):
+        self.list_model.set_filter(self.filter_edt.text())
+        self.update_count_label()
+
+    def update_count_label(self):
+        total = len(self.list_model.values)
+        if self.list_model.filter_text:
+            self.count_lbl.setText(f"{self.list_model.match_count} de {total} valores")
+        else:
+            self.count_lbl.setText(f"{total} valores únicos")
+
 
 def center_window_on_point(window, center_point):
     geometry = window.geometry()